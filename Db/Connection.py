@@ -5,37 +5,149 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
 import os
+import time
 import logging
+import threading
 from urllib.parse import quote_plus
-from sqlalchemy.pool import NullPool
-from sqlalchemy.sql import text 
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import text
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-db_user = os.getenv("DB_USER")
-db_pass = quote_plus(os.getenv("DB_PASS", ""))
-db_host = os.getenv("DB_HOST")
-db_port = os.getenv("DB_PORT")
-db_name = os.getenv("DB_NAME")
+# Pool de conexões (as três consultas de enriquecimento de um comparativo reaproveitam o mesmo login TDS)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))             # conexões mantidas abertas
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))      # extras sob pico (fechadas ao devolver)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))    # segundos esperando uma conexão livre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))    # recria conexões mais velhas que isso (s)
 
-if not all([db_user, db_host, db_port, db_name]):
-    raise Exception("Uma ou mais variáveis de banco de dados não estão definidas no .env!")
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
 
-logger.info(f"Conectando ao banco de dados {db_name} no host {db_host}:{db_port} com o usuário {db_user}.")
-DATABASE_URL = f"mssql+pymssql://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
 
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=NullPool
-)
+class _PoolStats:
+    """
+    Contadores de checkout do pool: quantos, quanto tempo esperando, quantos falharam (timeout/erro).
+    A espera média/máxima é só dos checkouts que deram certo: um timeout de DB_POOL_TIMEOUT
+    distorceria a média e já aparece em `falhas`.
+    """
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.falhas = 0
+        self.espera_total_s = 0.0
+        self.espera_max_s = 0.0
+
+    def registrar(self, espera_s: float, falha: bool = False) -> None:
+        with self._lock:
+            if falha:
+                self.falhas += 1
+                return
+            self.checkouts += 1
+            self.espera_total_s += espera_s
+            self.espera_max_s = max(self.espera_max_s, espera_s)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            media = self.espera_total_s / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "falhas": self.falhas,
+                "espera_media_ms": round(media * 1000, 2),
+                "espera_max_ms": round(self.espera_max_s * 1000, 2),
+            }
+
+
+_stats = _PoolStats()
+
+
+class _PoolMedido(QueuePool):
+    """QueuePool que mede o tempo de espera de cada checkout (inclui abrir conexão nova)."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            _stats.registrar(time.perf_counter() - t0, falha=True)
+            raise
+        _stats.registrar(time.perf_counter() - t0)
+        return conn
+
+
+def _database_url() -> str:
+    # URL completa (ex.: sqlite:///... nos testes locais em Debug/) tem precedência sobre as variáveis do SQL Server
+    if os.getenv("DB_URL"):
+        return os.environ["DB_URL"]
+
+    db_user = os.getenv("DB_USER")
+    db_pass = quote_plus(os.getenv("DB_PASS", ""))
+    db_host = os.getenv("DB_HOST")
+    db_port = os.getenv("DB_PORT")
+    db_name = os.getenv("DB_NAME")
+
+    if not all([db_user, db_host, db_port, db_name]):
+        raise Exception("Uma ou mais variáveis de banco de dados não estão definidas no .env!")
+
+    logger.info(f"Conectando ao banco de dados {db_name} no host {db_host}:{db_port} com o usuário {db_user}.")
+    return f"mssql+pymssql://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
+
+
+def get_engine():
+    """
+    Engine SQLAlchemy criada no primeiro uso (o app sobe mesmo sem o .env do banco;
+    a falta das variáveis só aparece quando alguma consulta for feita).
+    """
+    global _engine, _session_factory
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(
+                    _database_url(),
+                    poolclass=_PoolMedido,
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_timeout=DB_POOL_TIMEOUT,
+                    pool_recycle=DB_POOL_RECYCLE,
+                    pool_pre_ping=True,  # descarta conexões derrubadas pelo servidor/firewall antes de usar
+                )
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+                _engine = engine
+                logger.info("Engine SQLAlchemy configurada ✅")
+    return _engine
+
+
+def pool_stats() -> dict:
+    """Estado do pool para ajuste sob comparativos concorrentes (vazio até o 1º uso do banco)."""
+    if _engine is None:
+        return {"inicializado": False}
+    pool = _engine.pool
+    return {
+        "inicializado": True,
+        "tamanho": pool.size(),
+        "em_uso": pool.checkedout(),
+        "livres": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        **_stats.snapshot(),
+    }
+
+
+def __getattr__(name: str):
+    # Compatibilidade: `engine` e `SessionLocal` continuam acessíveis, mas só criados no primeiro acesso
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        get_engine()
+        return _session_factory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-logger.info("Engine SQLAlchemy configurada ✅")
 
 def get_db():
-    db = SessionLocal()
+    get_engine()
+    db = _session_factory()
     try:
         yield db
     except SQLAlchemyError as e:
@@ -44,12 +156,12 @@ def get_db():
         raise
     finally:
         db.close()
-        
+
 def test_connection():
     try:
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             # --- CORREÇÃO AQUI: Envolver a string SQL em text() ---
-            result = connection.execute(text("SELECT TOP 10 * FROM tb_ctc_esp")) 
+            result = connection.execute(text("SELECT TOP 10 * FROM tb_ctc_esp"))
             logger.info("Conexão com o banco de dados bem-sucedida.")
             print( "10 primeiras linhas da tabela tb_ctc_esp:" )
             print( result.fetchall() )
@@ -58,6 +170,6 @@ def test_connection():
         # Se você ainda tiver problemas de conexão, o erro real aparecerá aqui.
         logger.error(f"Falha na conexão com o banco de dados: {e}")
         return False
-    
+
 if __name__ == "__main__":
-    test_connection()
\ No newline at end of file
+    test_connection()
@@ -1 +1,9 @@
-from .Connection import engine
\ No newline at end of file
+from .Connection import get_engine, pool_stats
+
+
+def __getattr__(name: str):
+    # `from Db import engine` continua funcionando, criando a engine só no primeiro acesso
+    if name in ("engine", "SessionLocal"):
+        from . import Connection
+        return getattr(Connection, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,167 @@
+# C:\Programs\Aéreo-Comparativos\Debug\TESTS_LATAM\TestRepositoriesDbQueries.py
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import warnings
+import numpy as np
+import pandas as pd
+
+# --- Raiz do projeto: sobe duas pastas (Debug/TESTS_LATAM -> Debug -> RAIZ) ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Banco local de teste: SQLite com as três tabelas do enriquecimento (nunca o SQL Server)
+PASTA = tempfile.mkdtemp()
+BANCO = os.path.join(PASTA, "enriquecimento.db")
+os.environ["DB_URL"] = f"sqlite:///{BANCO}"
+os.environ["ENRIQUECIMENTO_CACHE_PATH"] = os.path.join(PASTA, "cache_enriquecimento.sqlite")
+
+from sqlalchemy import event, text  # noqa: E402
+from Db import get_engine, pool_stats  # noqa: E402
+from Repositories import Db_Queries  # noqa: E402
+from Repositories.Repositorio_CacheEnriquecimento import get_enriquecimento_cache  # noqa: E402
+
+SEMENTE = int(os.getenv("SEMENTE", "2025"))
+N_DOCS = int(os.getenv("N_DOCS", "60000"))
+
+@event.listens_for(get_engine(), "connect")
+def _concat_sqlite(dbapi_conn, _):
+    # CONCAT do SQL Server (nulo vira ''); o SQLite só tem concat() a partir da 3.44
+    dbapi_conn.create_function("CONCAT", -1, lambda *v: "".join("" if x is None else str(x) for x in v))
+
+def popular(n_docs: int) -> list[str]:
+    rnd = np.random.default_rng(SEMENTE)
+    docs = (rnd.choice(10**9, n_docs, replace=False) + 1).astype(str)
+    n_ctc = n_docs * 2
+    awb = pd.DataFrame({"codawb": np.arange(n_docs), "nOca": docs,
+                        "Tipo_Servico": rnd.choice(["ESTANDAR 10", "VELOZ", "E-COMMERCE", None], n_docs)})
+    nota = pd.DataFrame({"codawb": rnd.integers(0, n_docs, n_ctc), "filialctc": np.arange(n_ctc)})
+    ctc = pd.DataFrame({"filialctc": np.arange(n_ctc), "motivodoc": rnd.choice(["ENT", "DEV"], n_ctc),
+                        "modal": rnd.choice(["AER", "ROD"], n_ctc), "data": "2025-01-01",
+                        "pesotax": rnd.uniform(0, 50, n_ctc).round(2), "peso": rnd.uniform(0, 50, n_ctc).round(2)})
+    with get_engine().begin() as conn:
+        awb.to_sql("tb_airAWB", conn, if_exists="replace", index=False)
+        nota.to_sql("tb_airAWBnota", conn, if_exists="replace", index=False)
+        ctc.to_sql("tb_ctc_esp", conn, if_exists="replace", index=False)
+        conn.execute(text("CREATE INDEX ix_awb_noca ON tb_airAWB (nOca)"))
+        conn.execute(text("CREATE INDEX ix_nota_awb ON tb_airAWBnota (codawb)"))
+        conn.execute(text("CREATE INDEX ix_ctc_filial ON tb_ctc_esp (filialctc)"))
+    return list(docs)
+
+# --- Referência: o IN com as chaves interpoladas no texto, como era antes ---
+SQL_PESO = """
+    SELECT t1.nOca AS Documento, SUM(c.pesotax) AS Peso_Taxado_CTC, SUM(c.peso) AS Peso_Bruto_CTC
+    FROM tb_airAWB t1
+    JOIN tb_airAWBnota b ON t1.codawb = b.codawb
+    JOIN tb_ctc_esp c ON b.filialctc = c.filialctc
+    WHERE t1.nOca IN {nocas}
+    GROUP BY t1.nOca
+"""
+
+def consulta_literal(nocas: list[str]) -> pd.DataFrame:
+    lista = ", ".join(f"'{n}'" for n in set(nocas))
+    with get_engine().connect() as conn:
+        return pd.read_sql(text(SQL_PESO.format(nocas=f"({lista})")), conn)
+
+def consulta_blocos(nocas: list[str], chunk_size: int | None = None, max_workers: int | None = None) -> pd.DataFrame:
+    return Db_Queries.consultar_por_nocas(SQL_PESO.format(nocas=":nocas"), nocas, chunk_size, max_workers)
+
+def _ordenado(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values("Documento").reset_index(drop=True)
+
+def conferir_equivalencia(docs: list[str]) -> bool:
+    rnd = np.random.default_rng(SEMENTE)
+    ok = True
+    for n in (1, 7, 499, 500, 501, 3_000):
+        nocas = list(rnd.choice(docs, n)) + ["nao-existe", "", None]
+        esperado = _ordenado(consulta_literal([x for x in nocas if x]))
+        for chunk, workers in ((None, None), (1, 1), (7, 4), (500, 1), (500, 8)):
+            if n > 500 and chunk == 1:
+                continue
+            obtido = _ordenado(consulta_blocos(nocas, chunk, workers))
+            if not esperado.equals(obtido):
+                ok = False
+                print(f"n={n} bloco={chunk} workers={workers}: diverge do IN literal")
+    # 1º bloco inteiro sem CTC (AWBs recentes): bloco vazio não pode mudar o resultado nem gerar aviso
+    nocas = [f"0-sem-ctc-{i:03d}" for i in range(500)] + list(rnd.choice(docs, 100))
+    with warnings.catch_warnings(record=True) as avisos:
+        warnings.simplefilter("always")
+        obtido = _ordenado(consulta_blocos(nocas))
+    if avisos or not _ordenado(consulta_literal(nocas)).equals(obtido):
+        ok = False
+        print(f"bloco vazio: diverge do IN literal ou gerou aviso ({[str(a.message)[:60] for a in avisos]})")
+    # Chave maliciosa vira só um valor que não existe
+    injecao = consulta_blocos(["1' OR '1'='1"])
+    if not injecao.empty:
+        ok = False
+        print("chave com aspas alterou a consulta")
+    print(f"- blocos parametrizados x IN literal: {'OK' if ok else 'ERRO'}")
+    return ok
+
+def conferir_cache(docs: list[str]) -> bool:
+    cache = get_enriquecimento_cache()
+    cache.limpar()
+    nocas = docs[:2_000] + ["nao-existe"]
+    frio = Db_Queries.get_enriquecimento(nocas).sort_values("Documento").reset_index(drop=True)
+    antes = cache.estatisticas()
+    quente = Db_Queries.get_enriquecimento(nocas).sort_values("Documento").reset_index(drop=True)
+    depois = cache.estatisticas()
+    ok = frio.equals(quente) and depois["misses"] == antes["misses"] and depois["hits_negativos"] == antes["hits_negativos"] + 1
+    print(f"- cache de enriquecimento (banco x cache, entrada negativa): {'OK' if ok else 'ERRO'}")
+    return ok
+
+def conferir_ttl_sem_ctc(docs: list[str]) -> bool:
+    """AWB cadastrado mas ainda sem CTC vence com o TTL curto (negativo); com CTC, só com o TTL cheio."""
+    cache = get_enriquecimento_cache()
+    cache.limpar()
+    df = Db_Queries.get_enriquecimento(docs[:2_000])
+    sem_ctc = df.loc[df["CTCs"].isna() & df["PesoUsado_CIA"].isna(), "Documento"].tolist()
+    com_ctc = df.loc[df["CTCs"].notna(), "Documento"].tolist()
+    # Envelhece tudo além do TTL negativo, mas ainda dentro do TTL positivo
+    idade = cache.ttl_neg_s + 60
+    with sqlite3.connect(cache.caminho) as conn:
+        conn.execute("UPDATE enriquecimento SET gravado = gravado - ?", (idade,))
+    conn.close()
+    _, faltando = cache.buscar(sem_ctc + com_ctc)
+    ok = bool(sem_ctc) and bool(com_ctc) and set(faltando) == set(sem_ctc)
+    print(f"- TTL curto para AWB sem CTC ({len(sem_ctc)} sem CTC, {len(com_ctc)} com CTC): {'OK' if ok else 'ERRO'}")
+    return ok
+
+def benchmark(docs: list[str]) -> pd.DataFrame:
+    rnd = np.random.default_rng(SEMENTE)
+    linhas = []
+    for n in (1_000, 10_000, 50_000):
+        nocas = list(rnd.choice(docs, min(n, len(docs)), replace=False))
+        tempos = {}
+        for rotulo, func in (
+            ("Literal_s", lambda: consulta_literal(nocas)),
+            ("Blocos_serial_s", lambda: consulta_blocos(nocas, max_workers=1)),
+            ("Blocos_paralelo_s", lambda: consulta_blocos(nocas)),
+            ("Enriquecimento_s", lambda: (get_enriquecimento_cache().limpar(), Db_Queries.get_enriquecimento(nocas))),
+            ("Enriquecimento_cache_s", lambda: Db_Queries.get_enriquecimento(nocas)),
+        ):
+            t0 = time.perf_counter(); func(); tempos[rotulo] = round(time.perf_counter() - t0, 3)
+        linhas.append({"nOcas": len(nocas), "Bloco": Db_Queries.DB_IN_CHUNK_SIZE,
+                       "Workers": Db_Queries.DB_IN_WORKERS, **tempos})
+    return pd.DataFrame(linhas)
+
+def main():
+    print(f"Banco de teste: {BANCO} ({N_DOCS} nOcas)\n")
+    docs = popular(N_DOCS)
+    if not conferir_equivalencia(docs):
+        print("\nERRO: consulta em blocos diverge do IN literal.")
+    if not conferir_cache(docs):
+        print("\nERRO: cache de enriquecimento diverge do banco.")
+    if not conferir_ttl_sem_ctc(docs):
+        print("\nERRO: AWB sem CTC ficou em cache com o TTL cheio.")
+    print("\nBenchmark (IN literal x blocos parametrizados):\n")
+    print(benchmark(docs).to_string(index=False))
+    print(f"\nPool: {pool_stats()}")
+    print(f"Cache de enriquecimento: {get_enriquecimento_cache().estatisticas()}")
+
+if __name__ == "__main__":
+    main()
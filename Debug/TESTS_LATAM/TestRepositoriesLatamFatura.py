@@ -0,0 +1,281 @@
+# C:\Programs\Aéreo-Comparativos\Debug\TESTS_LATAM\TestRepositoriesLatamFatura.py
+
+import os
+import re
+import sys
+import glob
+import time
+import random
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# --- Config Pandas ---
+pd.set_option('display.max_columns', 100)
+pd.set_option('display.width', 220)
+pd.set_option('display.precision', 2)
+
+# --- Raiz do projeto: sobe duas pastas (Debug/TESTS_LATAM -> Debug -> RAIZ) ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from Repositories import Repositorio_FaturaLatam as repo  # noqa: E402
+
+# --- Paths base: PDFs enviados pelo app (data/Uploads) ---
+UPLOAD_DIRS = [os.path.join(PROJECT_ROOT, "data", "Uploads"), os.path.join(PROJECT_ROOT, "Data", "Uploads")]
+
+WORKERS = [2, 4]
+PAGE_COUNTS = [10, 25, 50, 100, 200, 400]
+LINHAS_SINTETICAS = [1_000, 10_000, 50_000]
+LINHAS_NORMALIZACAO = [10_000, 50_000, 200_000]
+
+def escolher_pdf() -> str:
+    """
+    Usa o PDF passado na linha de comando; se não houver, pega o PDF mais recente de Uploads.
+    """
+    if len(sys.argv) > 1:
+        return sys.argv[1]
+    todos = sorted(
+        [p for d in UPLOAD_DIRS for p in glob.glob(os.path.join(d, "*.pdf"))],
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    if not todos:
+        raise FileNotFoundError(f"Nenhum PDF em {UPLOAD_DIRS}. Informe o caminho: python {os.path.basename(__file__)} fatura.pdf")
+    return todos[0]
+
+def _cronometrar(func, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = func(*args, **kwargs)
+    return out, time.perf_counter() - t0
+
+def benchmark_paginas(pdf_path: str) -> pd.DataFrame:
+    """
+    Mede a extração sequencial vs. fatiada por páginas para PDFs de tamanhos crescentes
+    (primeiras N páginas do mesmo arquivo) e confere que as tabelas saem iguais e na mesma ordem.
+    """
+    total = repo._count_pages(pdf_path)
+    motor, _ = repo._choose_engine(pdf_path, total)
+    linhas = []
+    for n in [p for p in PAGE_COUNTS if p < total] + [total]:
+        serial, t_serial = _cronometrar(repo._extract_tables_from_pdf, pdf_path, motor, (2, n))
+        linha = {"Paginas": n, "Tabelas": len(serial), "Serial_s": round(t_serial, 2)}
+        for w in WORKERS:
+            fatiado, t_fatiado = _cronometrar(repo._extract_tables_sharded, pdf_path, motor, w, last_page=n)
+            iguais = len(serial) == len(fatiado) and all(a.equals(b) for a, b in zip(serial, fatiado))
+            linha[f"{w}w_s"] = round(t_fatiado, 2)
+            linha[f"{w}w_speedup"] = round(t_serial / t_fatiado, 2) if t_fatiado else None
+            linha[f"{w}w_iguais"] = iguais
+        linhas.append(linha)
+        print(linha)
+    return pd.DataFrame(linhas)
+
+# --- Implementação antiga (iterrows), mantida aqui só como referência da regressão ---
+def _fix_merged_data_rows_legado(df: pd.DataFrame) -> pd.DataFrame:
+    splitter = re.compile(r'\s{2,}')
+    repaired_rows = []
+    for _, row in df.iterrows():
+        is_merged = (pd.isna(row.get('Origem')) or pd.isna(row.get('Documento'))) and \
+                    isinstance(row.iloc[0], str) and len(row.iloc[0]) > 40
+        if is_merged:
+            parts = splitter.split(row.iloc[0].strip())
+            if len(parts) >= 9:
+                num_cols_to_fill = min(len(parts), len(df.columns))
+                row.iloc[:num_cols_to_fill] = parts[:num_cols_to_fill]
+        repaired_rows.append(row)
+    return pd.DataFrame(repaired_rows).reset_index(drop=True)
+
+def _fatura_sintetica(n_linhas: int, seed: int = 7) -> pd.DataFrame:
+    """Linhas normais + linhas 'mescladas' (tudo na 1ª coluna), com 5 a 14 pedaços e ruído."""
+    rnd = random.Random(seed)
+    cols = ["Data", "Documento", "Origem", "Destino", "Taxado", "Valor_Frete", "Outras Taxas", "Vlr Total", "Vlr Advalorem", "extra_0"]
+    linhas = []
+    for i in range(n_linhas):
+        sorteio = rnd.random()
+        if sorteio < 0.15:
+            pedacos = [f"{rnd.randint(1, 28):02d}/05/2024", f"957{rnd.randint(10**7, 10**8 - 1)}", "GRU", "POA",
+                       f"{rnd.randint(1, 900)},{rnd.randint(0, 99):02d}", "1.234,56", "12,00", "1.246,56", "0,00",
+                       "XX", "YY", "ZZ", "WW"][:rnd.randint(5, 13)]
+            texto = (" " * rnd.randint(0, 2)) + (" " * rnd.randint(2, 4)).join(pedacos) + (" " * rnd.randint(0, 3))
+            linha = [texto] + [None] * (len(cols) - 1)
+            if rnd.random() < 0.3: linha[2] = "GRU"  # Origem preenchida: não é linha mesclada
+        elif sorteio < 0.2:
+            linha = [rnd.choice([None, 12.5, "texto curto", "x" * 50])] + [None] * (len(cols) - 1)
+        else:
+            linha = ["10/05/2024", f"957{i:08d}", "GRU", "REC", "10,0", "100,00", "1,00", "101,00", "0,00", None]
+        linhas.append(linha)
+    return pd.DataFrame(linhas, columns=cols)
+
+def regressao_linhas_mescladas(pdf_path: str | None) -> bool:
+    """
+    Confere que a versão vetorizada de `_fix_merged_data_rows` gera exatamente a mesma saída
+    da versão com iterrows: em faturas sintéticas e, se houver, no PDF de exemplo (pipeline completo).
+    """
+    ok = True
+    for n in LINHAS_SINTETICAS:
+        df = _fatura_sintetica(n)
+        legado, t_legado = _cronometrar(_fix_merged_data_rows_legado, df)
+        novo, t_novo = _cronometrar(repo._fix_merged_data_rows, df)
+        iguais = legado.equals(novo) and list(legado.dtypes) == list(novo.dtypes)
+        ok &= iguais
+        print({"Linhas": n, "Legado_s": round(t_legado, 3), "Vetorizado_s": round(t_novo, 3),
+               "Speedup": round(t_legado / t_novo, 1) if t_novo else None, "Iguais": iguais})
+
+    sem_origem = _fatura_sintetica(500).drop(columns=["Origem"])
+    iguais = _fix_merged_data_rows_legado(sem_origem).equals(repo._fix_merged_data_rows(sem_origem))
+    ok &= iguais
+    print({"Caso": "sem coluna Origem", "Iguais": iguais})
+
+    if pdf_path:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            novo = repo.extract_invoice_table(pdf_path, cache_dir=cache_dir)
+            original = repo._fix_merged_data_rows
+            repo._fix_merged_data_rows = _fix_merged_data_rows_legado
+            try:
+                legado = repo.extract_invoice_table(pdf_path, cache_dir=cache_dir)
+            finally:
+                repo._fix_merged_data_rows = original
+        iguais = legado.equals(novo)
+        ok &= iguais
+        print({"Caso": os.path.basename(pdf_path), "Linhas": len(novo), "Iguais": iguais})
+    return ok
+
+# --- Cadeia antiga de normalização (uma cópia do frame por etapa), mantida para regressão/benchmark ---
+def _normalizacao_legado(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    if 'Peso' in df.columns and 'Taxado' in df.columns:
+        df['Taxado'] = df['Taxado'].where(df['Taxado'].notna(), df['Peso'])
+        df = df.rename(columns={'Taxado': 'Peso Taxado'}).drop(columns=['Peso'])
+
+    df = df.copy()
+    if not df.empty:
+        mask_noise = df.iloc[:, 0].astype(str).str.contains(r"Sub\s*Total|Copyright|Total", case=False, regex=True, na=False)
+        df = df[~mask_noise]
+        if "Documento" in df.columns:
+            is_data_row = df["Documento"].astype(str).str.contains(r"\d", regex=True, na=False)
+            is_service_header = df.iloc[:, 0].astype(str).str.contains(r"RESERVADO|ESTANDAR|VELOZ|EFACIL", case=False, na=False)
+            df = df[is_data_row | is_service_header]
+        df = df.dropna(how="all")
+
+    df = df.copy()
+    pattern = '|'.join(repo.SERVICE_KEYWORDS)
+    is_service_header = df.iloc[:, 0].astype(str).str.contains(pattern, case=False, na=False)
+    df['Tipo_Serviço'] = df.iloc[:, 0].where(is_service_header)
+    df['Tipo_Serviço'] = df['Tipo_Serviço'].ffill().fillna('Não especificado').str.strip()
+    df = df[~is_service_header].reset_index(drop=True)
+
+    df = df.copy()
+    for col in repo.NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", "", regex=False), errors="coerce")
+    if "Documento" in df.columns:
+        df["Documento"] = df["Documento"].astype(str).str.replace(r"[^\d\-]", "", regex=True).str.replace("-", "", regex=False)
+
+    df = df.copy()
+    if "Valor_Frete" in df.columns and "Peso Taxado" in df.columns:
+        valor_frete = pd.to_numeric(df["Valor_Frete"], errors='coerce')
+        peso_taxado = pd.to_numeric(df["Peso Taxado"], errors='coerce')
+        df["Valor_Tarifa"] = np.where(peso_taxado.notna() & (peso_taxado != 0), valor_frete / peso_taxado, pd.NA)
+    return df
+
+def _fatura_bruta_sintetica(n_linhas: int, seed: int = 11) -> pd.DataFrame:
+    """Frame como sai do PDF (tudo texto): seções de serviço, cabeçalhos repetidos, subtotais, Peso/Taxado quebrados."""
+    rnd = random.Random(seed)
+    cols = ["Origem", "Data", "Destino", "Valor_Frete", "Outras Taxas", "Peso", "Taxado",
+            "Vlr Total", "Numero Fiscal", "Documento", "Vlr Advalorem", "Tipo de Cte"]
+    linhas = []
+    for i in range(n_linhas):
+        sorteio = rnd.random()
+        if sorteio < 0.01:
+            linhas.append([rnd.choice(repo.SERVICE_KEYWORDS) + "  "] + [None] * (len(cols) - 1))
+        elif sorteio < 0.02:
+            linhas.append(["Sub Total", None, None, "12,345.67", None, None, None, "12,400.00", None, None, None, None])
+        elif sorteio < 0.03:
+            linhas.append(cols[:])
+        elif sorteio < 0.035:
+            linhas.append([None] * len(cols))
+        else:
+            peso = f"{rnd.randint(1, 900)}.{rnd.randint(0, 99):02d}"
+            taxado, peso_col = (peso, None) if rnd.random() < 0.7 else (None, peso)
+            linhas.append([rnd.choice(["GRU", "REC", "SSA", "POA"]), "10/05/2024", rnd.choice(["MAO", "CWB", "FOR"]),
+                           f"{rnd.randint(1, 9)},{rnd.randint(100, 999)}.{rnd.randint(0, 99):02d}", f"{rnd.randint(0, 99)}.00",
+                           peso_col, taxado, "1,234.56", str(rnd.randint(1000, 99999)), f"957-{rnd.randint(10**7, 10**8 - 1)}",
+                           rnd.choice(["0.00", "", None]), "NORMAL"])
+    return pd.DataFrame(linhas, columns=cols)
+
+def _com_cabecalhos_vazios(df: pd.DataFrame) -> pd.DataFrame:
+    """Mesma fatura com duas colunas de cabeçalho vazio ("") e valores diferentes, como o Camelot devolve."""
+    df = df.copy()
+    df.insert(1, "", df["Origem"].where(df.index % 2 == 0))
+    df.insert(df.shape[1], "", "x", allow_duplicates=True)
+    return df
+
+def _medir(func, *args):
+    """Tempo (execução limpa) e pico de memória alocada (2ª execução sob tracemalloc, que distorce o tempo)."""
+    out, dt = _cronometrar(func, *args)
+    tracemalloc.start()
+    func(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, dt, pico / 2**20
+
+def benchmark_normalizacao() -> bool:
+    """Cadeia antiga x `_normalize_invoice_frame` (passada única): saída idêntica, tempo e pico de memória."""
+    ok = True
+    casos = [(n, "normal", _fatura_bruta_sintetica(n)) for n in LINHAS_NORMALIZACAO]
+    casos.append((LINHAS_NORMALIZACAO[0], "cabecalhos vazios", _com_cabecalhos_vazios(_fatura_bruta_sintetica(LINHAS_NORMALIZACAO[0]))))
+    for n, caso, df in casos:
+        legado, t_legado, mem_legado = _medir(_normalizacao_legado, df)
+        (novo, _), t_novo, mem_novo = _medir(repo._normalize_invoice_frame, df)
+        iguais = legado.equals(novo) and list(legado.columns) == list(novo.columns) and list(legado.dtypes) == list(novo.dtypes)
+        ok &= iguais
+        print({"Linhas": n, "Caso": caso, "Legado_s": round(t_legado, 3), "Passada_unica_s": round(t_novo, 3),
+               "Legado_MB": round(mem_legado, 1), "Passada_unica_MB": round(mem_novo, 1), "Iguais": iguais})
+    return ok
+
+def conferir_streaming(pdf_path: str) -> bool:
+    """O modo streaming (chunks de páginas) precisa reproduzir a extração completa, linha a linha."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        completo = repo._stream_chunk(repo.extract_invoice_table(pdf_path, cache_dir=cache_dir), 0)
+        ok = True
+        for paginas in (1, repo.STREAM_PAGES_PER_CHUNK):
+            chunks = list(repo.iter_invoice_chunks(pdf_path, paginas, cache_dir=cache_dir))
+            iguais = bool(chunks) and pd.concat(chunks).equals(completo)
+            ok &= iguais
+            print({"Paginas_por_chunk": paginas, "Chunks": len(chunks), "Linhas": sum(map(len, chunks)), "Iguais": iguais})
+    return ok
+
+def main():
+    try:
+        pdf_path = escolher_pdf()
+        print(f"\nRegressão de linhas mescladas (legado x vetorizado) em: {pdf_path}")
+        if not regressao_linhas_mescladas(pdf_path):
+            print("\nERRO: _fix_merged_data_rows divergiu da implementação antiga.")
+            return
+
+        print("\nNormalização: cadeia antiga x passada única")
+        if not benchmark_normalizacao():
+            print("\nERRO: _normalize_invoice_frame divergiu da cadeia antiga.")
+            return
+
+        print("\nStreaming por chunks x extração completa:")
+        if not conferir_streaming(pdf_path):
+            print("\nERRO: iter_invoice_chunks divergiu de extract_invoice_table.")
+            return
+
+        print(f"\nBenchmark de extração por páginas em: {pdf_path}")
+        motor, sonda = repo._choose_engine(pdf_path, repo._count_pages(pdf_path))
+        print(f"Motor escolhido: {motor} ({sonda['motivo']}, sonda {sonda['sonda_s']}s) | Fatia: {repo.PAGE_SHARD_SIZE} páginas\n")
+
+        df_bench = benchmark_paginas(pdf_path)
+        print("\n--- SPEEDUP x NÚMERO DE PÁGINAS ---")
+        print(df_bench.to_string(index=False))
+
+    except (FileNotFoundError, ValueError, IOError) as e:
+        print("\nERRO no benchmark da fatura.")
+        print(f"Detalhes: {e}")
+
+if __name__ == "__main__":
+    main()
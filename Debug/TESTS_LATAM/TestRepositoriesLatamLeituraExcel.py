@@ -0,0 +1,149 @@
+# C:\Programs\Aéreo-Comparativos\Debug\TESTS_LATAM\TestRepositoriesLatamLeituraExcel.py
+
+import os
+import sys
+import glob
+import time
+import contextlib
+import io
+import pandas as pd
+
+# --- Config Pandas ---
+pd.set_option('display.max_columns', 100)
+pd.set_option('display.width', 220)
+pd.set_option('display.precision', 3)
+
+# --- Raiz do projeto: sobe duas pastas (Debug/TESTS_LATAM -> Debug -> RAIZ) ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from Repositories.Repositorio_TabelasFretesLatam import ProcessarTabelaLatam  # noqa: E402
+from Utils.Excel_Helpers import EXCEL_ENGINES, engine_available  # noqa: E402
+
+# --- Paths base ---
+LATAM_DIR = os.path.join(PROJECT_ROOT, "Debug", "Archives", "LATAM", "ACORDO")
+PADRAO_DIR = os.path.join(PROJECT_ROOT, "Data", "Tabelas", "LATAM", "PADRAO")
+ABAS = ["JUN E RES", "PROXIMOVOO"]
+REPETICOES = 3
+
+def escolher_arquivo_latam() -> str:
+    """
+    Usa o arquivo passado na linha de comando; se não houver, prioriza o ACORDO mais recente.
+    """
+    if len(sys.argv) > 1:
+        return sys.argv[1]
+    candidatos = sorted(glob.glob(os.path.join(LATAM_DIR, "*ACORDO*.xls*")), key=os.path.getmtime, reverse=True)
+    if not candidatos:
+        raise FileNotFoundError(f"Nenhum arquivo de ACORDO em {LATAM_DIR}")
+    return candidatos[0]
+
+# --- Leitura antiga: cabeçalho (nrows=2) e corpo (skiprows=2) em duas chamadas ao read_excel ---
+def _ler_aba_legado(self, sheet_name: str) -> pd.DataFrame:
+    header_df = pd.read_excel(self.xls, sheet_name=sheet_name, nrows=2, header=None)
+    final_header = header_df.iloc[1].fillna(header_df.iloc[0])
+    df_raw = pd.read_excel(self.xls, sheet_name=sheet_name, header=None, skiprows=2)
+    df_raw.columns = final_header
+    return df_raw
+
+def _processar(arquivo: str, legado: bool):
+    """Abre o workbook e processa as duas abas, no caminho antigo ou no novo (sem os prints de debug)."""
+    original = ProcessarTabelaLatam._ler_aba_cabecalho_duplo
+    if legado:
+        ProcessarTabelaLatam._ler_aba_cabecalho_duplo = _ler_aba_legado
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            proc = ProcessarTabelaLatam(arquivo)
+            if not legado:
+                proc.carregar_abas(ABAS)
+            return proc.processar_servicos_bases(), proc.processar_servico_veloz()
+    finally:
+        ProcessarTabelaLatam._ler_aba_cabecalho_duplo = original
+
+def _melhor_tempo(func, *args):
+    tempos, out = [], None
+    for _ in range(REPETICOES):
+        t0 = time.perf_counter()
+        out = func(*args)
+        tempos.append(time.perf_counter() - t0)
+    return out, min(tempos)
+
+def comparar_leituras(arquivo: str) -> pd.DataFrame:
+    linhas = []
+
+    # Só a leitura das abas (cabeçalho + corpo)
+    proc = ProcessarTabelaLatam(arquivo)
+    for aba in [a for a in ABAS if a in proc.xls.sheet_names]:
+        antigo, t_antigo = _melhor_tempo(_ler_aba_legado, proc, aba)
+
+        def ler_novo():
+            proc._abas.pop(aba, None)
+            return proc._ler_aba_cabecalho_duplo(aba)
+
+        novo, t_novo = _melhor_tempo(ler_novo)
+        linhas.append({"Etapa": f"leitura '{aba}'", "Antigo_s": t_antigo, "Novo_s": t_novo,
+                       "Iguais": antigo.equals(novo) and list(antigo.columns) == list(novo.columns)})
+
+    # Processamento completo (abre o workbook + JUN E RES + PROXIMOVOO)
+    (b_antigo, v_antigo), t_antigo = _melhor_tempo(_processar, arquivo, True)
+    (b_novo, v_novo), t_novo = _melhor_tempo(_processar, arquivo, False)
+    linhas.append({"Etapa": "processar bases + veloz", "Antigo_s": t_antigo, "Novo_s": t_novo,
+                   "Iguais": b_antigo.equals(b_novo) and v_antigo.equals(v_novo)})
+
+    df = pd.DataFrame(linhas)
+    df["Speedup"] = (df["Antigo_s"] / df["Novo_s"]).round(2)
+    return df
+
+def comparar_motores(arquivo: str) -> pd.DataFrame:
+    """
+    Mesmo processamento (ACORDO: bases + veloz; PADRAO: pasta inteira) com cada motor de Excel
+    instalado, conferindo que o resultado é idêntico ao do openpyxl.
+    """
+    motores = [m for m in EXCEL_ENGINES if engine_available(m)]
+    anterior = os.environ.get("EXCEL_ENGINE")
+    resultados, linhas = {}, []
+    try:
+        for motor in motores:
+            os.environ["EXCEL_ENGINE"] = motor
+            acordo, t_acordo = _melhor_tempo(_processar, arquivo, False)
+            with contextlib.redirect_stdout(io.StringIO()):
+                padrao, t_padrao = _melhor_tempo(ProcessarTabelaLatam.processar_tabelas_padrao, PADRAO_DIR)
+            resultados[motor] = (*acordo, padrao)
+            linhas.append({"Motor": motor, "ACORDO_s": t_acordo, "PADRAO_s": t_padrao})
+    finally:
+        if anterior is None:
+            os.environ.pop("EXCEL_ENGINE", None)
+        else:
+            os.environ["EXCEL_ENGINE"] = anterior
+
+    df = pd.DataFrame(linhas)
+    ref = resultados.get("openpyxl")
+    df["Iguais_openpyxl"] = [
+        ref is not None and all(a.equals(b) for a, b in zip(ref, resultados[m])) for m in df["Motor"]
+    ]
+    if "openpyxl" in resultados:
+        base = df.set_index("Motor").loc["openpyxl", "ACORDO_s"]
+        df["Speedup_ACORDO"] = (base / df["ACORDO_s"]).round(2)
+    return df
+
+def main():
+    try:
+        arquivo = escolher_arquivo_latam()
+        print(f"\nComparando leitura dupla x leitura única em: {arquivo} (melhor de {REPETICOES})\n")
+        df = comparar_leituras(arquivo)
+        print(df.to_string(index=False))
+        if not df["Iguais"].all():
+            print("\nERRO: a leitura única gerou dados diferentes da leitura dupla.")
+
+        print(f"\nMotores de Excel instalados: {[m for m in EXCEL_ENGINES if engine_available(m)]}\n")
+        df_motores = comparar_motores(arquivo)
+        print(df_motores.to_string(index=False))
+        if not df_motores["Iguais_openpyxl"].all():
+            print("\nERRO: algum motor gerou dados diferentes do openpyxl.")
+
+    except (FileNotFoundError, ValueError, IOError) as e:
+        print("\nERRO na comparação de leitura do Excel.")
+        print(f"Detalhes: {e}")
+
+if __name__ == "__main__":
+    main()
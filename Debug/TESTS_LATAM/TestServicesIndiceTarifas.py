@@ -0,0 +1,185 @@
+# C:\Programs\Aéreo-Comparativos\Debug\TESTS_LATAM\TestServicesIndiceTarifas.py
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# --- Raiz do projeto: sobe duas pastas (Debug/TESTS_LATAM -> Debug -> RAIZ) ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from Services.Latam.IndiceTarifasLatam import FaixasPesoLatam, IndiceTarifasLatam  # noqa: E402
+
+RODADAS = int(os.getenv("RODADAS", "100"))
+SEMENTE = int(os.getenv("SEMENTE", "2025"))
+KEYS = ["Origem", "Destino", "Tipo_Serviço"]
+ROTAS = ["SAO", "REC", "SSA", "POA", "MAO", "BR"]
+TIPOS = ["ESTANDAR 10", "VELOZ", "E-COMMERCE"]
+PESO_MAX_VELOZ = 30  # LatamFreightComparer.PESO_MAX_VELOZ (o comparador importa o banco)
+
+# --- Referência: os merges encadeados que o índice substitui ---
+def _merge_candidatos(consultas: pd.DataFrame, tabela: pd.DataFrame, usar_curinga: bool) -> pd.DataFrame:
+    tab = tabela.reset_index(drop=True).rename_axis("__LINHA__").reset_index()
+    got = pd.merge(consultas, tab, on=KEYS, how="inner")
+    if not usar_curinga:
+        return got
+    partes = [got]
+    falta = consultas[~consultas["__Q__"].isin(got["__Q__"])]
+    for curinga, chaves in (("Origem", ["Destino", "Tipo_Serviço"]), ("Destino", ["Origem", "Tipo_Serviço"])):
+        sub = tab[tab[curinga] == "BR"].drop(columns=[curinga])
+        g = pd.merge(falta, sub, on=chaves, how="inner")
+        partes.append(g)
+        falta = falta[~falta["__Q__"].isin(g["__Q__"])]
+    return pd.concat(partes, ignore_index=True)
+
+def referencia(consultas: pd.DataFrame, tabela: pd.DataFrame, regra: str, usar_curinga: bool) -> np.ndarray:
+    got = _merge_candidatos(consultas, tabela, usar_curinga).sort_values(["__Q__", "__LINHA__"], kind="stable")
+    if regra == "primeira":
+        best = got.drop_duplicates("__Q__")
+    else:
+        past = got[got["Data_Efetivacao_Tarifa"] <= got["Data"]]
+        future = got[got["Data_Efetivacao_Tarifa"] > got["Data"]]
+        past = past.sort_values("Data_Efetivacao_Tarifa", ascending=False, kind="stable")
+        future = future.sort_values("Data_Efetivacao_Tarifa", ascending=True, kind="stable")
+        best = pd.concat([past.drop_duplicates("__Q__"), future.drop_duplicates("__Q__")]).drop_duplicates("__Q__")
+    out = np.full(len(consultas), -1, dtype=np.int64)
+    out[best["__Q__"].to_numpy()] = best["__LINHA__"].to_numpy()
+    return out
+
+# --- Dados sintéticos: várias vigências por rota, datas repetidas e nulas ---
+def gerar(rnd: np.random.Generator, n_tabela: int, n_consultas: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    datas = pd.to_datetime("2024-01-01") + pd.to_timedelta(rnd.integers(0, 60, n_tabela) * 7, unit="D")
+    tabela = pd.DataFrame({
+        "Origem": rnd.choice(ROTAS, n_tabela), "Destino": rnd.choice(ROTAS, n_tabela),
+        "Tipo_Serviço": rnd.choice(TIPOS, n_tabela), "Data_Efetivacao_Tarifa": datas,
+    })
+    tabela.loc[rnd.random(n_tabela) < 0.03, "Data_Efetivacao_Tarifa"] = pd.NaT
+    tabela = tabela.sort_values("Data_Efetivacao_Tarifa", ascending=False)  # como sai do repositório
+    consultas = pd.DataFrame({
+        "Origem": rnd.choice(ROTAS[:-1], n_consultas), "Destino": rnd.choice(ROTAS[:-1], n_consultas),
+        "Tipo_Serviço": rnd.choice(TIPOS, n_consultas),
+        "Data": pd.to_datetime("2023-10-01") + pd.to_timedelta(rnd.integers(0, 500, n_consultas), unit="D"),
+    })
+    consultas.loc[rnd.random(n_consultas) < 0.03, "Data"] = pd.NaT
+    consultas["__Q__"] = np.arange(n_consultas)
+    return tabela, consultas
+
+CASOS = [("primeira", True), ("primeira", False), ("mais_proxima", True), ("mais_proxima", False)]
+
+def conferir_equivalencia() -> bool:
+    rnd = np.random.default_rng(SEMENTE)
+    falhas = {caso: 0 for caso in CASOS}
+    for _ in range(RODADAS):
+        tabela, consultas = gerar(rnd, int(rnd.integers(0, 80)), int(rnd.integers(0, 120)))
+        idx = IndiceTarifasLatam(tabela, curinga="BR")
+        for regra, curinga in CASOS:
+            obtido = idx.resolver(consultas["Origem"], consultas["Destino"], consultas["Tipo_Serviço"],
+                                  datas=consultas["Data"], regra=regra, usar_curinga=curinga)
+            if not np.array_equal(obtido, referencia(consultas, tabela, regra, curinga)):
+                falhas[(regra, curinga)] += 1
+    print(f"{RODADAS} tabelas aleatórias (semente {SEMENTE})")
+    for (regra, curinga), n in falhas.items():
+        print(f"- {regra} (curinga={curinga}): {'OK' if n == 0 else f'{n} divergências'}")
+    return not any(falhas.values())
+
+def benchmark(n_consultas: int = 200_000, n_tabela: int = 5_000) -> pd.DataFrame:
+    tabela, consultas = gerar(np.random.default_rng(SEMENTE), n_tabela, n_consultas)
+    linhas = []
+    for regra, curinga in CASOS:
+        t0 = time.perf_counter(); referencia(consultas, tabela, regra, curinga); t_merge = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        IndiceTarifasLatam(tabela, curinga="BR").resolver(
+            consultas["Origem"], consultas["Destino"], consultas["Tipo_Serviço"],
+            datas=consultas["Data"], regra=regra, usar_curinga=curinga)
+        t_idx = time.perf_counter() - t0
+        linhas.append({"Regra": regra, "Curinga": curinga, "Consultas": n_consultas,
+                       "Merges_s": round(t_merge, 3), "Indice_s": round(t_idx, 3),
+                       "Speedup": round(t_merge / t_idx, 1)})
+    return pd.DataFrame(linhas)
+
+# --- Faixas de peso VELOZ: regressão contra o apply linha a linha que existia em _match_veloz ---
+def _pick_veloz_legado(best: pd.DataFrame, peso_max: float) -> pd.DataFrame:
+    raw_cols = [c for c in best.columns if isinstance(c, str) and pd.Series(c).str.match(r"^\d+(p\d+)?\+$").any()]
+    weight_cols = sorted(((float(c.replace("p", ".").replace("+", "")), c) for c in raw_cols),
+                         key=lambda x: x[0], reverse=True)
+
+    def _pick(row: pd.Series) -> pd.Series:
+        peso = row.get("Peso Taxado")
+        out_idx = ["Valor_Tarifa_Acordo", "Faixa_Peso_Usada", "__Status_Veloz"]
+        if pd.isna(peso):
+            return pd.Series([np.nan, np.nan, np.nan], index=out_idx)
+        if peso > peso_max:
+            return pd.Series([np.nan, np.nan, "PESO EXCEDENTE"], index=out_idx)
+        for lim, col_name in weight_cols:
+            if peso >= lim:
+                return pd.Series([row[col_name], col_name, np.nan], index=out_idx)
+        return pd.Series([np.nan, np.nan, "FAIXA NAO LOCALIZADA"], index=out_idx)
+
+    return best.apply(_pick, axis=1)
+
+def _faixas_vetorizado(best: pd.DataFrame, peso_max: float) -> pd.DataFrame:
+    """Mesma conta de LatamFreightComparer._match_veloz, com a tabela já na ordem das consultas."""
+    faixas = FaixasPesoLatam(best)
+    peso = best["Peso Taxado"].to_numpy(dtype=np.float64)
+    excedente = peso > peso_max
+    col = np.where(excedente, -1, faixas.faixa(peso))
+    status = np.full(len(best), np.nan, dtype=object)
+    status[excedente] = "PESO EXCEDENTE"
+    status[~np.isnan(peso) & ~excedente & (col < 0)] = "FAIXA NAO LOCALIZADA"
+    return pd.DataFrame({
+        "Valor_Tarifa_Acordo": faixas.tarifas(np.arange(len(best)), col),
+        "Faixa_Peso_Usada": np.where(col >= 0, np.array(faixas.colunas, dtype=object)[col], np.nan),
+        "__Status_Veloz": status,
+    }, index=best.index)
+
+FAIXAS = ["0+", "0p5+", "1+", "1p0+", "5+", "10+", "20+", "45+"]
+PESOS_LIMITE = [np.nan, -1.0, 0.0, 0.2, 0.5, 0.99, 1.0, 5.0, 20.0, 29.99, 30.0, 30.01, 45.0, 100.0]
+
+def tabela_faixas(rnd: np.random.Generator, n: int) -> pd.DataFrame:
+    cols = [c for c in FAIXAS if rnd.random() < 0.7] or ["1+"]
+    best = pd.DataFrame(np.round(rnd.uniform(1, 30, (n, len(cols))), 2), columns=cols)
+    best = best.mask(rnd.random(best.shape) < 0.05)  # tarifa em branco na planilha
+    pesos = np.where(rnd.random(n) < 0.5, rnd.choice(PESOS_LIMITE, n), np.round(rnd.uniform(0, 40, n), 1))
+    best["Peso Taxado"] = pesos
+    return best
+
+def conferir_faixas() -> bool:
+    rnd = np.random.default_rng(SEMENTE)
+    peso_max = PESO_MAX_VELOZ
+    falhas = 0
+    for _ in range(RODADAS):
+        best = tabela_faixas(rnd, int(rnd.integers(1, 80)))
+        esperado = _pick_veloz_legado(best, peso_max)
+        obtido = _faixas_vetorizado(best, peso_max)
+        iguais = (
+            np.allclose(esperado["Valor_Tarifa_Acordo"].astype(float), obtido["Valor_Tarifa_Acordo"], equal_nan=True)
+            and esperado["Faixa_Peso_Usada"].fillna("-").equals(obtido["Faixa_Peso_Usada"].fillna("-"))
+            and esperado["__Status_Veloz"].fillna("-").equals(obtido["__Status_Veloz"].fillna("-"))
+        )
+        falhas += not iguais
+    print(f"- faixas de peso VELOZ: {'OK' if falhas == 0 else f'{falhas} divergências'}")
+    return falhas == 0
+
+def benchmark_faixas(n: int = 100_000) -> pd.DataFrame:
+    best = tabela_faixas(np.random.default_rng(SEMENTE), n)
+    peso_max = PESO_MAX_VELOZ
+    t0 = time.perf_counter(); _pick_veloz_legado(best, peso_max); t_apply = time.perf_counter() - t0
+    t0 = time.perf_counter(); _faixas_vetorizado(best, peso_max); t_vet = time.perf_counter() - t0
+    return pd.DataFrame([{"Linhas": n, "Apply_s": round(t_apply, 3), "Vetorizado_s": round(t_vet, 3),
+                          "Speedup": round(t_apply / t_vet, 1)}])
+
+def main():
+    if not conferir_equivalencia():
+        print("\nERRO: índice diverge dos merges encadeados.")
+    if not conferir_faixas():
+        print("\nERRO: faixas de peso vetorizadas divergem do apply linha a linha.")
+    print("\nBenchmark (merges x índice, incluindo a montagem do índice):\n")
+    print(benchmark().to_string(index=False))
+    print("\nFaixas de peso VELOZ (apply x searchsorted):\n")
+    print(benchmark_faixas().to_string(index=False))
+
+if __name__ == "__main__":
+    main()
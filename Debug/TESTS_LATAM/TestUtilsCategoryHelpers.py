@@ -0,0 +1,88 @@
+# C:\Programs\Aéreo-Comparativos\Debug\TESTS_LATAM\TestUtilsCategoryHelpers.py
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+# --- Raiz do projeto: sobe duas pastas (Debug/TESTS_LATAM -> Debug -> RAIZ) ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from Utils.Category_Helpers import (  # noqa: E402
+    STATUS_VOCAB, as_category, concat_categorical, map_category, replace_category,
+)
+from Utils.Parse import std_text  # noqa: E402
+
+SEMENTE = int(os.getenv("SEMENTE", "2025"))
+AEROPORTOS = np.array(["GRU", "gru ", " CGH", "REC", "ssa", "POA", "SAO PAULO", "BRASIL", None, np.nan], dtype=object)
+
+def coluna_rotas(rnd: np.random.Generator, n: int) -> pd.Series:
+    return pd.Series(rnd.choice(AEROPORTOS, n), index=rnd.permutation(n), name="Origem")
+
+def conferir_equivalencia() -> bool:
+    rnd = np.random.default_rng(SEMENTE)
+    ok = True
+    for n in (0, 1, 10, 1_000):
+        s = coluna_rotas(rnd, n)
+        casos = {
+            "std_text": (map_category(s, std_text), s.apply(std_text)),
+            "str.strip.upper": (map_category(s, lambda v: str(v).strip().upper()), s.astype(str).str.strip().str.upper()),
+            "replace": (replace_category(s, {"GRU": "SAO"}), s.replace({"GRU": "SAO"})),
+        }
+        for nome, (cat, esperado) in casos.items():
+            igual = cat.astype(object).equals(esperado.astype(object)) and cat.index.equals(s.index)
+            if not igual:
+                ok = False
+                print(f"[{nome}] n={n}: category diverge do apply")
+    # concat mantém category mesmo com categorias diferentes em cada pedaço
+    a = pd.DataFrame({"Origem": as_category(pd.Series(["GRU", "REC"]))})
+    b = pd.DataFrame({"Origem": as_category(pd.Series(["POA"]))})
+    c = concat_categorical([a, b], ignore_index=True)
+    if not isinstance(c["Origem"].dtype, pd.CategoricalDtype) or c["Origem"].tolist() != ["GRU", "REC", "POA"]:
+        ok = False
+        print("concat_categorical perdeu o tipo category")
+    st = as_category(pd.Series(["DEVOLUCAO", "OUTRO"]), STATUS_VOCAB)
+    if list(st.cat.categories[:len(STATUS_VOCAB)]) != STATUS_VOCAB:
+        ok = False
+        print("as_category não respeitou o vocabulário de status")
+    print(f"- equivalência com .apply / concat / vocabulário: {'OK' if ok else 'ERRO'}")
+    return ok
+
+def benchmark(n: int = 1_000_000) -> pd.DataFrame:
+    rnd = np.random.default_rng(SEMENTE)
+    df = pd.DataFrame({
+        "Origem": rnd.choice(["GRU", "CGH", "REC", "SSA", "POA", "MAO", "BEL", "FOR"], n),
+        "Destino": rnd.choice(["GRU", "CGH", "REC", "SSA", "POA", "MAO", "BEL", "FOR"], n),
+        "Status": rnd.choice(STATUS_VOCAB[:5], n),
+        "Valor_Frete": rnd.uniform(0, 900, n),
+    })
+    linhas = []
+    for rotulo, frame in (("object", df), ("category", df.assign(**{c: as_category(df[c]) for c in ("Origem", "Destino", "Status")}))):
+        t0 = time.perf_counter()
+        norm = frame["Origem"].apply(std_text) if rotulo == "object" else map_category(frame["Origem"], std_text)
+        t_norm = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        frame.groupby(["Origem", "Destino"], observed=True)["Valor_Frete"].agg(["sum", "count"])
+        t_group = time.perf_counter() - t0
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "batch.feather")
+            t0 = time.perf_counter(); frame.to_feather(path); pd.read_feather(path); t_io = time.perf_counter() - t0
+            tamanho = os.path.getsize(path)
+        mem = frame[["Origem", "Destino", "Status"]].memory_usage(deep=True).sum()
+        linhas.append({"Tipo": rotulo, "Linhas": n, "std_text_s": round(t_norm, 3), "Groupby_s": round(t_group, 3),
+                       "Feather_s": round(t_io, 3), "Feather_MB": round(tamanho / 2**20, 1),
+                       "Memoria_MB": round(mem / 2**20, 1), "Iguais": norm.astype(object).equals(df["Origem"].apply(std_text))})
+    return pd.DataFrame(linhas)
+
+def main():
+    if not conferir_equivalencia():
+        print("\nERRO: helpers de category divergem das versões com .apply.")
+    print("\nBenchmark (colunas-chave object x category):\n")
+    print(benchmark().to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# C:\Programs\Aéreo-Comparativos\Debug\TESTS_LATAM\TestUtilsNumericHelpers.py
+
+import os
+import sys
+import time
+import random
+from datetime import date, datetime
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+
+# --- Raiz do projeto: sobe duas pastas (Debug/TESTS_LATAM -> Debug -> RAIZ) ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from Utils.Numeric_Helpers import (  # noqa: E402
+    parse_money, parse_money_series, smart_to_numeric, smart_to_numeric_series, to_numeric_cols,
+)
+from Utils.Parse import to_num, to_num_series, std_text, std_text_series  # noqa: E402
+
+# Conversores escalares x vetorizados que precisam dar exatamente o mesmo resultado
+PARES = {
+    "parse_money": (parse_money, parse_money_series),
+    "smart_to_numeric": (smart_to_numeric, smart_to_numeric_series),
+    "to_num": (to_num, to_num_series),
+}
+RODADAS = int(os.getenv("RODADAS", "300"))
+SEMENTE = int(os.getenv("SEMENTE", "2025"))
+
+# --- Gerador de valores "de planilha" (teste por propriedade, sem dependências extras) ---
+ALFABETO = "0123456789" * 3 + ".,-+ eE$Rr\t_/" + "–—" + "١٢"
+
+def _numero_formatado(rnd: random.Random) -> str:
+    x = rnd.choice([rnd.uniform(-1e7, 1e7), rnd.uniform(0, 100), float(rnd.randint(0, 10**6))])
+    casas = rnd.randint(0, 4)
+    us = f"{x:,.{casas}f}"
+    br = us.replace(",", "_").replace(".", ",").replace("_", ".")
+    s = rnd.choice([us, br, us.replace(",", ""), br.replace(".", ""), repr(x), f"{x:.{rnd.randint(0, 17)}e}"])
+    prefixo = rnd.choice(["", "", "R$ ", "r$", "  ", "US$ "])
+    sufixo = rnd.choice(["", "", " ", " kg", "%"])
+    return prefixo + s + sufixo
+
+def valor_aleatorio(rnd: random.Random):
+    tipo = rnd.random()
+    if tipo < 0.40:
+        return _numero_formatado(rnd)
+    if tipo < 0.60:
+        return "".join(rnd.choice(ALFABETO) for _ in range(rnd.randint(0, 9)))
+    if tipo < 0.70:
+        return rnd.choice(["", "-", "–", "—", " ", "nan", "NaN", "inf", "-0", "1_000", "1e400", "R$",
+                           "13/08/2025", "1/2", "31/12/99", "12/5/1", "0/0", "R$\t 1.5", "\u20031,5\u2003",
+                           "1,5\x00", "\x1c13/08\x1c", "9" * 80, "1." + "0" * 70 + "1"])
+    if tipo < 0.82:
+        return rnd.choice([rnd.uniform(-1e6, 1e6), rnd.randint(-10**6, 10**6), -0.0, 0.0, True, False,
+                           np.float32(rnd.random()), np.int64(rnd.randint(0, 999)), float("inf")])
+    if tipo < 0.92:
+        return rnd.choice([None, np.nan, pd.NA])
+    return rnd.choice([Decimal("1.5"), Decimal("-2"), date(2025, 8, 13), datetime(2024, 1, 31, 10),
+                       pd.Timestamp("2025-10-23"), np.bool_(True)])
+
+def serie_aleatoria(rnd: random.Random) -> pd.Series:
+    n = rnd.randint(0, 60)
+    valores = [valor_aleatorio(rnd) for _ in range(n)]
+    if valores and rnd.random() < 0.3:  # repete valores, como nas planilhas reais
+        valores = [rnd.choice(valores) for _ in range(n)]
+    idx = pd.Index(rnd.sample(range(1000), n)) if rnd.random() < 0.3 else None
+    if rnd.random() < 0.1:  # colunas já numéricas
+        return pd.Series([rnd.uniform(-1e3, 1e3) for _ in range(n)], index=idx, dtype=float, name="num")
+    return pd.Series(valores, index=idx, dtype=object, name="col")
+
+def _mesmo_float(a: float, b: float) -> bool:
+    if np.isnan(a) or np.isnan(b):
+        return bool(np.isnan(a) and np.isnan(b))
+    return a == b and np.signbit(a) == np.signbit(b)
+
+def conferir_equivalencia() -> bool:
+    rnd = random.Random(SEMENTE)
+    falhas = {nome: 0 for nome in PARES}
+    falhas["std_text"] = 0
+    casos = 0
+    for _ in range(RODADAS):
+        s = serie_aleatoria(rnd)
+        casos += len(s)
+        for nome, (escalar, vetorizada) in PARES.items():
+            esperado = s.apply(escalar).astype(float) if len(s) else pd.Series(dtype=float)
+            obtido = vetorizada(s)
+            if obtido.dtype != np.float64 or not obtido.index.equals(s.index) or obtido.name != s.name:
+                falhas[nome] += 1
+                print(f"[{nome}] dtype/índice/nome diferentes: {obtido.dtype}, {obtido.name!r}")
+                continue
+            for v, a, b in zip(s, esperado, obtido):
+                if not _mesmo_float(a, b):
+                    falhas[nome] += 1
+                    if falhas[nome] <= 5:
+                        print(f"[{nome}] {v!r}: escalar={a!r} vetorizado={b!r}")
+        if len(s) and s.dtype == object:
+            texto = s.astype(str)
+            if not std_text_series(texto).equals(texto.apply(std_text)):
+                falhas["std_text"] += 1
+
+    print(f"\n{RODADAS} séries aleatórias, {casos} valores (semente {SEMENTE})")
+    for nome, n in falhas.items():
+        print(f"- {nome}: {'OK' if n == 0 else f'{n} divergências'}")
+    return not any(falhas.values())
+
+def _valor_planilha(rnd: random.Random) -> str:
+    """Como chega das planilhas/faturas: pt-BR ou US, às vezes com 'R$'."""
+    x = rnd.uniform(0, 20_000)
+    us = f"{x:,.2f}"
+    s = rnd.choice([us.replace(",", "_").replace(".", ",").replace("_", "."), us, f"{x:.2f}"])
+    return rnd.choice(["", "", "R$ "]) + s
+
+def benchmark(n: int = 200_000) -> pd.DataFrame:
+    rnd = random.Random(SEMENTE)
+    base = [_valor_planilha(rnd) for _ in range(2_000)] + [None, "", "-"]
+    colunas = {
+        "repetida": pd.Series([rnd.choice(base) for _ in range(n)], dtype=object),
+        "distinta": pd.Series([_valor_planilha(rnd) for _ in range(n)], dtype=object),
+    }
+    linhas = []
+    for rotulo, s in colunas.items():
+        for nome, (escalar, vetorizada) in PARES.items():
+            t0 = time.perf_counter(); s.apply(escalar); t_esc = time.perf_counter() - t0
+            t0 = time.perf_counter(); vetorizada(s); t_vet = time.perf_counter() - t0
+            linhas.append({"Coluna": rotulo, "Conversor": nome, "Linhas": n,
+                           "Escalar_s": round(t_esc, 3), "Vetorizado_s": round(t_vet, 3),
+                           "Speedup": round(t_esc / t_vet, 1)})
+    return pd.DataFrame(linhas)
+
+# --- to_numeric_cols: frame no formato do merge do LatamFreightComparer._comparar_bloco ---
+COLS_COMPARADOR = [
+    "Valor_Tarifa", "Valor_Frete", "Peso Taxado", "Valor_Tarifa_Acordo",
+    "Frete_Minimo", "Peso_Taxado_CTC", "Peso_Bruto_CTC", "PesoUsado_CIA",
+]
+TAMANHOS_FRAME = [10_000, 100_000, 1_000_000]
+
+def _to_numeric_cols_legado(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    df_out = df.copy()
+    for c in cols:
+        if c in df_out.columns:
+            df_out[c] = df_out[c].apply(smart_to_numeric)
+    return df_out
+
+def frame_comparador(n: int, rnd: random.Random) -> pd.DataFrame:
+    """Valores da fatura como texto pt-BR, tarifas/pesos do acordo e do banco já em float (com NaN)."""
+    np_rnd = np.random.default_rng(rnd.randint(0, 2**32 - 1))
+    def texto_br(vals):
+        return pd.Series([f"{v:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".") for v in vals],
+                         dtype=object)
+    df = pd.DataFrame({
+        "Valor_Tarifa": texto_br(np_rnd.choice(np.round(np_rnd.uniform(1, 30, 500), 2), n)),
+        "Valor_Frete": texto_br(np.round(np_rnd.uniform(50, 9_000, n), 2)),
+        "Peso Taxado": pd.Series(np_rnd.integers(1, 800, n).astype(str), dtype=object),
+        "Valor_Tarifa_Acordo": np_rnd.choice(np.r_[np.round(np_rnd.uniform(1, 30, 300), 2), np.nan], n),
+        "Frete_Minimo": np_rnd.choice(np.r_[np.round(np_rnd.uniform(40, 120, 50), 2), np.nan], n),
+        "Peso_Taxado_CTC": np.round(np_rnd.uniform(1, 800, n), 1),
+        "Peso_Bruto_CTC": np.round(np_rnd.uniform(1, 800, n), 1),
+        "PesoUsado_CIA": pd.Series(np_rnd.integers(1, 800, n), dtype=object),
+    })
+    df["Documento"] = np.arange(n).astype(str)
+    return df
+
+def benchmark_to_numeric_cols() -> pd.DataFrame:
+    rnd = random.Random(SEMENTE)
+    linhas = []
+    for n in TAMANHOS_FRAME:
+        df = frame_comparador(n, rnd)
+        t0 = time.perf_counter(); antigo = _to_numeric_cols_legado(df, COLS_COMPARADOR); t_antigo = time.perf_counter() - t0
+        t0 = time.perf_counter(); novo = to_numeric_cols(df, COLS_COMPARADOR); t_novo = time.perf_counter() - t0
+        linhas.append({"Linhas": n, "Legado_s": round(t_antigo, 3), "Vetorizado_s": round(t_novo, 3),
+                       "Speedup": round(t_antigo / t_novo, 1), "Iguais": antigo.equals(novo)})
+    return pd.DataFrame(linhas)
+
+def main():
+    ok = conferir_equivalencia()
+    if not ok:
+        print("\nERRO: versões vetorizadas divergem das escalares.")
+    print("\nBenchmark (apply escalar x vetorizado):\n")
+    print(benchmark().to_string(index=False))
+    print(f"\nto_numeric_cols nas {len(COLS_COMPARADOR)} colunas do comparador (legado x vetorizado):\n")
+    df = benchmark_to_numeric_cols()
+    print(df.to_string(index=False))
+    if not df["Iguais"].all():
+        print("\nERRO: to_numeric_cols vetorizado gerou dados diferentes do legado.")
+
+if __name__ == "__main__":
+    main()
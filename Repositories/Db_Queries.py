@@ -1,6 +1,69 @@
 # Adicione esta função a um arquivo que tenha acesso ao 'engine' de conexão do DB
-from Db import engine # Importar sua conexão de banco de dados
+from Db import get_engine # Engine com pool, criada no primeiro uso
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+from sqlalchemy import bindparam, text
+from Repositories.Repositorio_CacheEnriquecimento import get_enriquecimento_cache, tipar_enriquecimento
+
+# ---------------------------------------------------------------------------
+# Consultas por lista de nOcas: as chaves vão como parâmetros (nunca interpoladas no SQL),
+# em blocos de tamanho fixo, porque o SQL Server aceita até 2100 parâmetros por comando.
+# Os blocos rodam em paralelo em conexões do pool e os resultados são concatenados.
+# ---------------------------------------------------------------------------
+DB_IN_CHUNK_SIZE = int(os.getenv("DB_IN_CHUNK_SIZE", "500"))  # nOcas por comando (máx. ~2000)
+DB_IN_WORKERS = int(os.getenv("DB_IN_WORKERS", "4"))          # blocos simultâneos (<= tamanho do pool)
+
+def _blocos_chaves(chaves: list[str], tamanho: int) -> list[list[str]]:
+    """Divide as chaves em blocos de até `tamanho` (o último pode ser menor)."""
+    return [chaves[i:i + tamanho] for i in range(0, len(chaves), tamanho)]
+
+def consultar_por_nocas(sql_query: str, noca_list: list[str],
+                        chunk_size: int | None = None, max_workers: int | None = None) -> pd.DataFrame:
+    """
+    Executa `sql_query` (com `IN :nocas` no WHERE) para todas as nOcas válidas da lista,
+    em blocos parametrizados e concorrentes. Consultas agregadas devem agrupar por nOca:
+    cada nOca cai inteiro num bloco só. Erros do banco sobem para quem chamou.
+    """
+    chaves = sorted({n for n in noca_list if n and isinstance(n, str)})
+    if not chaves:
+        return pd.DataFrame()
+
+    stmt = text(sql_query).bindparams(bindparam("nocas", expanding=True))
+    blocos = _blocos_chaves(chaves, max(1, chunk_size or DB_IN_CHUNK_SIZE))
+
+    def _consultar(bloco: list[str]) -> pd.DataFrame:
+        with get_engine().connect() as conn:
+            return pd.read_sql(stmt, conn, params={"nocas": bloco})
+
+    workers = min(max_workers or DB_IN_WORKERS, len(blocos))
+    if workers <= 1:
+        partes = [_consultar(b) for b in blocos]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-in") as pool:
+            partes = list(pool.map(_consultar, blocos))
+    return _juntar_partes(partes)
+
+def _juntar_partes(partes: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatena os resultados dos blocos. Blocos sem linhas (ex.: AWBs recentes, ainda sem CTC)
+    ficam de fora e colunas toda nulas num bloco recebem o tipo que a coluna tem nos demais:
+    o tipo do resultado não depende de qual bloco veio vazio (e o pandas não emite FutureWarning).
+    """
+    partes = [p for p in partes if not p.empty] or partes[:1]
+    if len(partes) == 1:
+        return partes[0]
+    tipos = {}
+    for parte in partes:
+        for col in parte.columns:
+            if col not in tipos and parte[col].notna().any():
+                tipos[col] = parte[col].dtype
+    partes = [
+        parte.astype({c: tipos[c] for c in parte.columns if c in tipos and parte[c].isna().all()})
+        for parte in partes
+    ]
+    return pd.concat(partes, ignore_index=True)
 
 def get_first_ctc_motivodoc(noca: str) -> str | None:
     """
@@ -16,7 +79,7 @@ def get_first_ctc_motivodoc(noca: str) -> str | None:
 
     # Consulta SQL para buscar o motivodoc do primeiro CTC
     # Usamos TOP 1 e ORDER BY para garantir que pegamos o primeiro CTC associado ao AWB
-    sql_query = f"""
+    sql_query = """
     SELECT TOP 1
         t2.motivodoc
     FROM 
@@ -26,15 +89,15 @@ def get_first_ctc_motivodoc(noca: str) -> str | None:
     JOIN
         tb_ctc_esp t2 ON t_nota.filialctc = t2.filialctc
     WHERE 
-        t1.nOca = '{noca}'
+        t1.nOca = :noca
     ORDER BY 
         t2.data
     """
     
     try:
         # Usa o engine para executar a query e ler o resultado
-        with engine.connect() as conn:
-            result = pd.read_sql(sql_query, conn)
+        with get_engine().connect() as conn:
+            result = pd.read_sql(text(sql_query), conn, params={"noca": str(noca)})
             
             if not result.empty:
                 # Retorna o motivodoc (esperado que seja 'DEV', 'ENT', etc.)
@@ -54,11 +117,8 @@ def get_ctcs(noca_list: list[str]) -> pd.DataFrame:
     if not noca_list:
         return pd.DataFrame()
 
-    # Formata a lista de nOcas para uso na cláusula IN ('noca1', 'noca2', ...)
-    noca_str = ", ".join(f"'{noca}'" for noca in noca_list)
-
     # Consulta SQL otimizada para buscar todos os CTCs de todos os nOcas de uma vez
-    sql_query = f"""
+    sql_query = """
     SELECT 
         t1.nOca,
         CONCAT(t2.motivodoc,' - ', t2.filialctc,  ' | (', t2.modal,') | ') AS ctc_e_motivo
@@ -69,20 +129,18 @@ def get_ctcs(noca_list: list[str]) -> pd.DataFrame:
     JOIN
         tb_ctc_esp t2 ON t_nota.filialctc = t2.filialctc
     WHERE 
-        t1.nOca IN ({noca_str})
+        t1.nOca IN :nocas
     """
     
     try:
-        # Usa o engine para executar a query e ler o resultado
-        with engine.connect() as conn:
-            result = pd.read_sql(sql_query, conn)
-            
-            if not result.empty:
-                # Otimização: Agrupa os resultados por nOca e concatena os CTCs
-                ctc_map_df = result.groupby('nOca')['ctc_e_motivo'].agg(lambda x: ', '.join(x.unique())).reset_index()
-                ctc_map_df.columns = ['Documento', 'CTCs'] # Renomeia para facilitar o merge
-                print("CTCs encontrados:", ctc_map_df)
-                return ctc_map_df
+        result = consultar_por_nocas(sql_query, noca_list)
+        
+        if not result.empty:
+            # Otimização: Agrupa os resultados por nOca e concatena os CTCs
+            ctc_map_df = result.groupby('nOca')['ctc_e_motivo'].agg(lambda x: ', '.join(x.unique())).reset_index()
+            ctc_map_df.columns = ['Documento', 'CTCs'] # Renomeia para facilitar o merge
+            print("CTCs encontrados:", ctc_map_df)
+            return ctc_map_df
         print("Nenhum CTC encontrado para as nOcas fornecidas.")
         return pd.DataFrame()
     
@@ -101,13 +159,7 @@ def get_ctc_peso(noca_list: list[str]) -> pd.DataFrame:
     if not noca_list:
         return pd.DataFrame()
 
-    valid_noca_list = [n for n in set(noca_list) if n and isinstance(n, str)]
-    if not valid_noca_list:
-        return pd.DataFrame()
-        
-    noca_str = ", ".join(f"'{noca}'" for noca in valid_noca_list)
-
-    sql_query = f"""
+    sql_query = """
     SELECT
         t1.nOca AS Documento,
         SUM(c.pesotax) AS Peso_Taxado_CTC,
@@ -127,25 +179,24 @@ def get_ctc_peso(noca_list: list[str]) -> pd.DataFrame:
     JOIN
         tb_ctc_esp c ON b.filialctc = c.filialctc
     WHERE 
-        t1.nOca IN ({noca_str})
+        t1.nOca IN :nocas
     GROUP BY 
         t1.nOca
     """
     
     try:
-        with engine.connect() as conn:
-            result = pd.read_sql(sql_query, conn)
-            
-            if not result.empty:
-                # Converte as colunas de peso para float
-                result['Peso_Taxado_CTC'] = pd.to_numeric(result['Peso_Taxado_CTC'], errors='coerce')
-                result['Peso_Bruto_CTC'] = pd.to_numeric(result['Peso_Bruto_CTC'], errors='coerce')
-                result['PesoUsado_CIA'] = pd.to_numeric(result['PesoUsado_CIA'], errors='coerce')
-                # A LINHA ABAIXO FOI REMOVIDA - TipoPeso_CIA é texto
-                # result['TipoPeso_CIA'] = pd.to_numeric(result['TipoPeso_CIA'], errors='coerce')
+        result = consultar_por_nocas(sql_query, noca_list)
+        
+        if not result.empty:
+            # Converte as colunas de peso para float
+            result['Peso_Taxado_CTC'] = pd.to_numeric(result['Peso_Taxado_CTC'], errors='coerce')
+            result['Peso_Bruto_CTC'] = pd.to_numeric(result['Peso_Bruto_CTC'], errors='coerce')
+            result['PesoUsado_CIA'] = pd.to_numeric(result['PesoUsado_CIA'], errors='coerce')
+            # A LINHA ABAIXO FOI REMOVIDA - TipoPeso_CIA é texto
+            # result['TipoPeso_CIA'] = pd.to_numeric(result['TipoPeso_CIA'], errors='coerce')
 
-                print("Dados de peso CTC encontrados:", result)
-                return result.dropna(subset=['PesoUsado_CIA'])
+            print("Dados de peso CTC encontrados:", result)
+            return result.dropna(subset=['PesoUsado_CIA'])
 
         print("Nenhum dado de peso CTC encontrado para as nOcas fornecidas.")
         return pd.DataFrame()
@@ -164,32 +215,22 @@ def get_tipo_servico(noca_list: list[str]) -> pd.DataFrame:
     if not noca_list:
         return pd.DataFrame()
 
-    # Formata a lista de nOcas para uso na cláusula IN ('noca1', 'noca2', ...)
-    # Filtra valores vazios e únicos para a string do SQL
-    valid_noca_list = [n for n in set(noca_list) if n and isinstance(n, str)]
-    if not valid_noca_list:
-         return pd.DataFrame()
-         
-    noca_str = ", ".join(f"'{noca}'" for noca in valid_noca_list)
-    
-    sql_query = f"""
+    sql_query = """
     SELECT 
         t1.nOca AS Documento,
         t1.Tipo_Servico
     FROM 
         tb_airAWB t1
     WHERE 
-        t1.nOca IN ({noca_str})
+        t1.nOca IN :nocas
     """
     try:
-        with engine.connect() as conn:
-            # pd.read_sql já traz o resultado do agrupamento
-            result = pd.read_sql(sql_query, conn)
-            
-            if not result.empty:
-                result["Tipo_Servico"] = result["Tipo_Servico"].str.upper().str.strip()
-                print("Tipo de Serviço encontrado:", result)
-                return result
+        result = consultar_por_nocas(sql_query, noca_list)
+        
+        if not result.empty:
+            result["Tipo_Servico"] = result["Tipo_Servico"].str.upper().str.strip()
+            print("Tipo de Serviço encontrado:", result)
+            return result
         print("Nenhum tipo de serviço encontrado para as nOcas fornecidas.")
         return pd.DataFrame()
     
@@ -197,6 +238,100 @@ def get_tipo_servico(noca_list: list[str]) -> pd.DataFrame:
         print(f"Erro ao buscar tipo de serviço em volume: {e}")
         return pd.DataFrame()
 
+def get_enriquecimento(noca_list: list[str]) -> pd.DataFrame:
+    """
+    Tipo de serviço, CTCs e pesos de uma lista de nOcas numa única ida ao banco
+    (substitui get_tipo_servico + get_ctcs + get_ctc_peso, que repetiam o mesmo join).
+
+    O join AWB -> nota -> CTC é feito uma vez com LEFT JOIN (AWB sem CTC ainda traz o tipo
+    de serviço) e a agregação por nOca acontece no pandas, com as mesmas regras das três
+    consultas antigas. Retorna uma linha por 'Documento' com as colunas 'Tipo_Servico',
+    'CTCs', 'Peso_Taxado_CTC', 'Peso_Bruto_CTC', 'PesoUsado_CIA' e 'TipoPeso_CIA'.
+
+    Só as nOcas sem entrada válida no cache local (Repositorio_CacheEnriquecimento) vão ao banco.
+    """
+    chaves = sorted({n for n in noca_list if n and isinstance(n, str)})
+    if not chaves:
+        return pd.DataFrame()
+
+    cache = get_enriquecimento_cache()
+    try:
+        do_cache, faltando = cache.buscar(chaves)
+    except Exception as e:
+        print(f"Aviso: cache de enriquecimento indisponível, consultando tudo no banco: {e}")
+        do_cache, faltando = tipar_enriquecimento(pd.DataFrame()), chaves
+    partes = [do_cache]
+
+    sql_query = """
+    SELECT
+        t1.nOca AS Documento,
+        t1.Tipo_Servico,
+        CASE WHEN c.filialctc IS NOT NULL
+             THEN CONCAT(c.motivodoc,' - ', c.filialctc,  ' | (', c.modal,') | ')
+        END AS ctc_e_motivo,
+        c.pesotax,
+        c.peso
+    FROM
+        tb_airAWB t1
+    LEFT JOIN
+        tb_airAWBnota b ON t1.codawb = b.codawb
+    LEFT JOIN
+        tb_ctc_esp c ON b.filialctc = c.filialctc
+    WHERE
+        t1.nOca IN :nocas
+    """
+
+    if faltando:
+        try:
+            result = consultar_por_nocas(sql_query, faltando)
+        except Exception as e:
+            # Sem banco, segue só com o que havia em cache (nada é gravado como ausente)
+            print(f"Erro ao buscar enriquecimento em volume: {e}")
+            result = None
+        if result is not None:
+            novos = tipar_enriquecimento(_agregar_enriquecimento(result) if not result.empty else pd.DataFrame())
+            try:
+                cache.gravar(novos, faltando)
+            except Exception as e:
+                print(f"Aviso: falha ao gravar cache de enriquecimento: {e}")
+            partes.append(novos)
+    print(f"Enriquecimento: {len(chaves) - len(faltando)} nOcas do cache, {len(faltando)} consultadas no banco.")
+
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        print("Nenhum dado de enriquecimento encontrado para as nOcas fornecidas.")
+        return pd.DataFrame()
+    return _juntar_partes(partes)
+
+def _agregar_enriquecimento(result: pd.DataFrame) -> pd.DataFrame:
+    """Agrega as linhas do join (uma por AWB x CTC) em uma linha por Documento."""
+    docs = result.groupby("Documento", sort=False)
+
+    # Tipo de serviço: primeiro valor não vazio do nOca
+    tipo = result["Tipo_Servico"].astype("string").str.upper().str.strip().replace("", pd.NA)
+    out = tipo.groupby(result["Documento"], sort=False).first().to_frame("Tipo_Servico")
+
+    # CTCs: 'motivo - filial | (modal) | ' distintos, separados por vírgula
+    ctcs = result.dropna(subset=["ctc_e_motivo"]).drop_duplicates(["Documento", "ctc_e_motivo"])
+    out["CTCs"] = ctcs.groupby("Documento", sort=False)["ctc_e_motivo"].agg(", ".join)
+
+    # Pesos: SUM do SQL (nulo quando o nOca não tem CTC); o maior entre taxado e bruto é o da Cia.
+    taxado = docs["pesotax"].sum(min_count=1).astype("float64")
+    bruto = docs["peso"].sum(min_count=1).astype("float64")
+    # (sem peso usado, o nOca fica sem nenhuma coluna de peso, como no dropna de get_ctc_peso)
+    usa_taxado = taxado > bruto
+    usado = bruto.where(~usa_taxado, taxado)
+    tem_peso = usado.notna()
+    out["Peso_Taxado_CTC"] = taxado.where(tem_peso)
+    out["Peso_Bruto_CTC"] = bruto.where(tem_peso)
+    out["PesoUsado_CIA"] = usado
+    out["TipoPeso_CIA"] = pd.Series(
+        np.where(usa_taxado, "Peso Taxado CTC", "Peso Bruto CTC"), index=out.index
+    ).where(tem_peso)
+
+    return out.rename_axis("Documento").reset_index()
+
 # get_ctcs(['95705988286', '95706171620'])  # Exemplo de uso
 # get_ctc_peso(['95705988286', '95706171620'])  # Exemplo de uso
-# get_tipo_servico(['95705988286', '95706171620'])  # Exemplo de uso
\ No newline at end of file
+# get_tipo_servico(['95705988286', '95706171620'])  # Exemplo de uso
+# get_enriquecimento(['95705988286', '95706171620'])  # Exemplo de uso
\ No newline at end of file
@@ -0,0 +1,198 @@
+# C:\Programs\Aéreo-Comparativos\Repositories\Repositorio_CacheEnriquecimento.py
+
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from Utils.Cache_Helpers import source_version
+
+# ---------------------------------------------------------------------------
+# Cache persistente (SQLite local) do enriquecimento por Documento (nOca): tipo de serviço,
+# CTCs e pesos. As mesmas nOcas voltam em vários batches e re-comparativos; só as que faltam
+# (ou venceram) vão ao SQL Server. nOcas que o banco não conhece (entrada negativa) e AWBs
+# ainda sem CTC (sem CTCs nem peso) ficam com validade menor, para cadastros e CTCs recentes
+# aparecerem logo. O arquivo fica em Appconfig.paths.CACHE_DIR, passado por create_app().
+# ---------------------------------------------------------------------------
+
+ENRIQUECIMENTO_CACHE_PATH = os.getenv("ENRIQUECIMENTO_CACHE_PATH")                       # sobrepõe CACHE_DIR
+ENRIQUECIMENTO_CACHE_TTL_H = float(os.getenv("ENRIQUECIMENTO_CACHE_TTL_H", "24"))          # 0 desliga o cache
+ENRIQUECIMENTO_CACHE_TTL_NEG_H = float(os.getenv("ENRIQUECIMENTO_CACHE_TTL_NEG_H", "1"))   # nOca ausente no banco ou sem CTC
+ENRIQUECIMENTO_CACHE_MAX = int(os.getenv("ENRIQUECIMENTO_CACHE_MAX", "500000"))            # linhas; as mais antigas saem
+
+# Muda sozinha quando a consulta/agregação (Db_Queries) ou este arquivo mudam: entradas antigas viram miss
+ENRIQUECIMENTO_VERSION = source_version("enriquecimento-1", __file__, Path(__file__).with_name("Db_Queries.py"))
+
+# Colunas do DataFrame de enriquecimento -> colunas da tabela SQLite
+COLUNAS = {
+    "Tipo_Servico": "tipo_servico",
+    "CTCs": "ctcs",
+    "Peso_Taxado_CTC": "peso_taxado",
+    "Peso_Bruto_CTC": "peso_bruto",
+    "PesoUsado_CIA": "peso_usado",
+    "TipoPeso_CIA": "tipo_peso",
+}
+COLUNAS_PESO = ["Peso_Taxado_CTC", "Peso_Bruto_CTC", "PesoUsado_CIA"]
+
+
+def tipar_enriquecimento(df: pd.DataFrame) -> pd.DataFrame:
+    """Mesmos tipos venha do banco ou do cache: pesos float64, textos object com NaN nos nulos."""
+    out = df.reindex(columns=["Documento", *COLUNAS]).copy()
+    for col in out.columns:
+        if col in COLUNAS_PESO:
+            out[col] = pd.to_numeric(out[col], errors="coerce").astype("float64")
+        else:
+            s = out[col].astype(object)
+            out[col] = s.where(s.notna(), np.nan)
+    return out
+
+
+class CacheEnriquecimento:
+    """
+    Enriquecimento por Documento em SQLite, com validade (TTL) e limite de linhas.
+    Uma conexão por operação (o Flask atende em várias threads) e WAL para leitores não
+    esperarem a gravação. Contadores de acerto/erro valem para o processo.
+    Sem `caminho` (app não configurado) o cache fica desligado e tudo vai ao banco.
+    """
+
+    def __init__(self, caminho: str | Path | None, ttl_h: float, ttl_neg_h: float, max_linhas: int, versao: str):
+        self.caminho = Path(caminho) if caminho is not None else None
+        self.ttl_s = ttl_h * 3600
+        self.ttl_neg_s = ttl_neg_h * 3600
+        self.max_linhas = max_linhas
+        self.versao = versao
+        self._lock = threading.Lock()
+        self._criado = False
+        self.hits = 0
+        self.hits_negativos = 0
+        self.misses = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.ttl_s > 0 and self.caminho is not None
+
+    def _conectar(self) -> sqlite3.Connection:
+        if not self._criado:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.caminho, timeout=10)
+        if not self._criado:
+            with self._lock:
+                conn.execute("PRAGMA journal_mode=WAL")
+                cols = ", ".join(f"{c} {'REAL' if k in COLUNAS_PESO else 'TEXT'}" for k, c in COLUNAS.items())
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS enriquecimento ("
+                    f"documento TEXT PRIMARY KEY, {cols}, encontrado INTEGER NOT NULL, "
+                    f"versao TEXT NOT NULL, gravado REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_enriquecimento_gravado ON enriquecimento (gravado)")
+                conn.commit()
+                self._criado = True
+        return conn
+
+    def buscar(self, documentos: list[str]) -> Tuple[pd.DataFrame, list[str]]:
+        """
+        Retorna (linhas válidas em cache, documentos que precisam ir ao banco).
+        Entradas negativas válidas não voltam em nenhum dos dois.
+        """
+        if not self.ativo or not documentos:
+            return tipar_enriquecimento(pd.DataFrame()), list(documentos)
+
+        agora = time.time()
+        partes = []
+        with self._conectar() as conn:
+            # Em blocos: o SQLite limita o número de parâmetros por comando
+            for i in range(0, len(documentos), 900):
+                bloco = documentos[i:i + 900]
+                partes.append(pd.read_sql_query(
+                    f"SELECT * FROM enriquecimento WHERE documento IN ({', '.join('?' * len(bloco))})",
+                    conn, params=bloco,
+                ))
+        conn.close()
+        achados = pd.concat(partes, ignore_index=True)
+        # AWB cadastrado mas ainda sem CTC: validade curta, como a entrada negativa
+        sem_ctc = achados["ctcs"].isna() & achados["peso_usado"].isna()
+        validade = np.where(achados["encontrado"].astype(bool) & ~sem_ctc, self.ttl_s, self.ttl_neg_s)
+        validos = achados[(achados["versao"] == self.versao) & (agora - achados["gravado"].astype(float) < validade)]
+
+        positivos = validos[validos["encontrado"].astype(bool)]
+        conhecidos = set(validos["documento"])
+        faltando = [d for d in documentos if d not in conhecidos]
+        with self._lock:
+            self.hits += len(positivos)
+            self.hits_negativos += len(validos) - len(positivos)
+            self.misses += len(faltando)
+
+        df = positivos.rename(columns={v: k for k, v in COLUNAS.items()} | {"documento": "Documento"})
+        return tipar_enriquecimento(df), faltando
+
+    def gravar(self, df: pd.DataFrame, consultados: list[str]) -> None:
+        """Grava as linhas vindas do banco e, como negativas, as `consultadas` que não vieram."""
+        if not self.ativo or not consultados:
+            return
+        agora = time.time()
+        df = tipar_enriquecimento(df)
+        vindos = set(df["Documento"])
+        linhas = [
+            (row[0], *(None if pd.isna(v) else v for v in row[1:]), 1, self.versao, agora)
+            for row in df.itertuples(index=False, name=None)
+        ]
+        linhas += [(d, *([None] * len(COLUNAS)), 0, self.versao, agora) for d in consultados if d not in vindos]
+        campos = ["documento", *COLUNAS.values(), "encontrado", "versao", "gravado"]
+        with self._conectar() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO enriquecimento ({', '.join(campos)}) VALUES ({', '.join('?' * len(campos))})",
+                linhas,
+            )
+            # Limite de tamanho: remove as entradas gravadas há mais tempo
+            excesso = conn.execute("SELECT COUNT(*) FROM enriquecimento").fetchone()[0] - self.max_linhas
+            if excesso > 0:
+                conn.execute(
+                    "DELETE FROM enriquecimento WHERE documento IN "
+                    "(SELECT documento FROM enriquecimento ORDER BY gravado LIMIT ?)", (excesso,)
+                )
+        conn.close()
+
+    def limpar(self) -> None:
+        """Descarta todas as entradas (ex.: após correção de dados no banco)."""
+        if self.caminho is None:
+            return
+        with self._conectar() as conn:
+            conn.execute("DELETE FROM enriquecimento")
+        conn.close()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.hits_negativos + self.misses
+            return {
+                "ativo": self.ativo,
+                "hits": self.hits,
+                "hits_negativos": self.hits_negativos,
+                "misses": self.misses,
+                "taxa_acerto": round((self.hits + self.hits_negativos) / consultas, 4) if consultas else 0.0,
+            }
+
+
+_CACHE: CacheEnriquecimento | None = None
+_CACHE_LOCK = threading.Lock()
+
+def get_enriquecimento_cache(cache_dir: str | Path | None = None) -> CacheEnriquecimento:
+    """
+    Cache de enriquecimento do processo (criado sob demanda). create_app() passa
+    `cache_dir` (Appconfig.paths.CACHE_DIR) na subida; ENRIQUECIMENTO_CACHE_PATH tem precedência.
+    """
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = CacheEnriquecimento(
+                ENRIQUECIMENTO_CACHE_PATH, ENRIQUECIMENTO_CACHE_TTL_H, ENRIQUECIMENTO_CACHE_TTL_NEG_H,
+                ENRIQUECIMENTO_CACHE_MAX, ENRIQUECIMENTO_VERSION,
+            )
+        if _CACHE.caminho is None and cache_dir is not None:
+            _CACHE.caminho = Path(cache_dir) / "enriquecimento.sqlite"
+        return _CACHE
@@ -1,13 +1,13 @@
 from __future__ import annotations
 
-import re
-from typing import List
+import time
+from typing import Iterator, List, Tuple
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
-# Tenta usar Camelot; se não rolar, usa pdfplumber
+# Camelot é o motor preferido; pdfplumber cobre quando ele não está instalado ou não acha tabelas
 try:
     import camelot
     HAS_CAMELOT = True
@@ -16,6 +16,24 @@ except Exception:
 
 import pdfplumber
 
+from Utils.Parallel_Helpers import map_ordered
+from Utils.Cache_Helpers import source_version, atomic_write, write_feather_stream
+from Utils import Header_Helpers
+from Utils.Header_Helpers import HeaderAliasMatcher
+
+# Páginas por fatia na extração paralela de um único PDF
+PAGE_SHARD_SIZE = 25
+
+# Cache por página das tabelas brutas (antes da normalização pandas).
+# Trocar RAW_TABLES_VERSION apenas quando mudar a LEITURA do PDF (parâmetros do Camelot/pdfplumber);
+# mudanças no pós-processamento reaproveitam as páginas já lidas.
+RAW_TABLES_VERSION = "raw-1"
+PAGE_CACHE_CHUNK = 10  # páginas por chamada do Camelot quando há cache (progresso salvo a cada bloco)
+PROBE_PAGES = 2  # páginas de amostra na sonda que escolhe o motor por documento
+
+# Versão do extrator para o cache por conteúdo: muda sozinha a cada alteração deste arquivo (ou do matcher de cabeçalhos)
+EXTRACTOR_VERSION = source_version("latam-1", __file__, Header_Helpers.__file__)
+
 # Cabeçalhos (alvo) padronizados
 TARGET_COLS = [
     "Tipo_Serviço", "Origem", "Data", "Destino", "Valor_Frete", "Outras Taxas",
@@ -23,6 +41,13 @@ TARGET_COLS = [
     "Tipo de Cte",
 ]
 
+NUMERIC_COLS = ["Valor_Frete", "Outras Taxas", "Peso Taxado", "Vlr Total", "Vlr Advalorem"]
+
+# Esquema fixo dos chunks do modo streaming (mesmas colunas e tipos em todos os pedaços)
+STREAM_COLS = TARGET_COLS + ["Valor_Tarifa"]
+STREAM_DTYPES = {c: ("float64" if c in NUMERIC_COLS + ["Valor_Tarifa"] else "string") for c in STREAM_COLS}
+STREAM_PAGES_PER_CHUNK = 10
+
 # Aliases para mapear variações de nomes de colunas
 HEADER_ALIASES = {
     r"^origem$": "Origem", r"^data$": "Data", r"^destino$": "Destino",
@@ -33,148 +58,455 @@ HEADER_ALIASES = {
     r"^tipo\s*de\s*cte$": "Tipo de Cte",
 }
 
+# Células que o PDF grudou: o '|' marca onde separar
+HEADER_SPLITS = [
+    ("TaxasPeso", "Taxas|Peso"), ("TotalNumero", "Total|Numero"),
+    ("FiscalDocumento", "Fiscal|Documento"), ("AdvaloremTipo", "Advalorem|Tipo"),
+    ("Destino Peso", "Destino|Peso"), ("Advalorem Outras", "Advalorem|Outras"),
+]
+
+_HEADER_MATCHER = HeaderAliasMatcher(HEADER_ALIASES, HEADER_SPLITS)
+
 def _normalize_header(cols: List[str]) -> List[str]:
-    norm = []
-    for c in cols:
-        c0 = re.sub(r"\s+", " ", str(c or "")).strip()
-        replacements = {
-            "TaxasPeso": "Taxas|Peso", "TotalNumero": "Total|Numero",
-            "FiscalDocumento": "Fiscal|Documento", "AdvaloremTipo": "Advalorem|Tipo",
-            "Destino Peso": "Destino|Peso", "Advalorem Outras": "Advalorem|Outras"
-        }
-        for old, new in replacements.items():
-            c0 = c0.replace(old, new)
-        parts = [p.strip() for p in re.split(r"\|", c0)]
-        norm.extend(parts)
-
-    out = []
-    for c in norm:
-        key = c.lower()
-        mapped = next((tgt for rx, tgt in HEADER_ALIASES.items() if re.search(rx, key, flags=re.I)), c)
-        out.append(mapped)
-    return out
-
-def _coerce_numbers(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
-    df = df.copy()
-    for col in cols:
-        if col in df.columns:
-            s = df[col].astype(str).str.replace(",", "", regex=False)
-            df[col] = pd.to_numeric(s, errors="coerce")
-    return df
+    return _HEADER_MATCHER(cols)
 
-def _clean_documento(df: pd.DataFrame) -> pd.DataFrame:
-    if "Documento" in df.columns:
-        df["Documento"] = (
-            df["Documento"].astype(str)
-            .str.replace(r"[^\d\-]", "", regex=True).str.replace("-", "", regex=False)
-        )
-    return df
+NOISE_PATTERN = r"Sub\s*Total|Copyright|Total"
+SERVICE_HEADER_PATTERN = r"RESERVADO|ESTANDAR|VELOZ|EFACIL"  # reconhece linhas de tipo de serviço
+SERVICE_KEYWORDS = ['RESERVADO MEDS', 'ESTANDAR 10 BASICO', 'ESTANDAR 2 BASICO', 'ESTANDAR 2 MEDS', 'VELOZ', 'EFACIL 3 BASICO']
 
-def _drop_noise_rows(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    if df.empty: return df
-    mask_noise = df.iloc[:, 0].astype(str).str.contains(
-        r"Sub\s*Total|Copyright|Total", case=False, regex=True, na=False
-    )
-    df = df[~mask_noise]
-    if "Documento" in df.columns:
-        is_data_row = df["Documento"].astype(str).str.contains(r"\d", regex=True, na=False)
-        is_service_header = df.iloc[:, 0].astype(str).str.contains(
-            r"RESERVADO|ESTANDAR|VELOZ|EFACIL", case=False, na=False # reconhece linhas de tipo de serviço
-        )
-        df = df[is_data_row | is_service_header]
-    return df.dropna(how="all")
-
-def _add_service_type_and_clean(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    service_keywords = ['RESERVADO MEDS', 'ESTANDAR 10 BASICO', 'ESTANDAR 2 BASICO', 'ESTANDAR 2 MEDS', 'VELOZ', 'EFACIL 3 BASICO']
-    pattern = '|'.join(service_keywords)
-    is_service_header = df.iloc[:, 0].astype(str).str.contains(pattern, case=False, na=False)
-    df['Tipo_Serviço'] = df.iloc[:, 0].where(is_service_header)
-    df['Tipo_Serviço'] = df['Tipo_Serviço'].ffill().fillna('Não especificado').str.strip()
-    df = df[~is_service_header].reset_index(drop=True)
-    return df
+def _normalize_invoice_frame(df: pd.DataFrame, tipo_inicial: str | None = None) -> Tuple[pd.DataFrame, str | None]:
+    """
+    Limpeza da fatura numa passada só: junta Peso/Taxado, descarta ruído (subtotais, rodapé,
+    linhas sem documento), propaga o tipo de serviço dos cabeçalhos de seção, converte os
+    números, limpa o Documento e calcula Valor_Tarifa. Todas as máscaras são calculadas sobre
+    as colunas originais e o frame de saída é montado uma única vez, só com as linhas mantidas.
 
-def _add_valor_tarifa(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    if "Valor_Frete" in df.columns and "Peso Taxado" in df.columns:
-        valor_frete = pd.to_numeric(df["Valor_Frete"], errors='coerce')
-        peso_taxado = pd.to_numeric(df["Peso Taxado"], errors='coerce')
-        df["Valor_Tarifa"] = np.where(peso_taxado.notna() & (peso_taxado != 0), valor_frete / peso_taxado, pd.NA)
-    return df
+    `tipo_inicial` é o tipo de serviço vigente antes da 1ª linha (continuação de um chunk anterior).
+    Retorna o frame e o tipo de serviço vigente na última linha.
+    """
+    names = list(df.columns)
+    cols = [df.iloc[:, i] for i in range(df.shape[1])]
+
+    # Peso/Taxado: o PDF às vezes quebra "Peso Taxado" em duas colunas
+    if "Peso" in names and "Taxado" in names:
+        i_tax = names.index("Taxado")
+        peso = cols[names.index("Peso")]
+        cols[i_tax] = cols[i_tax].where(cols[i_tax].notna(), peso)
+        names[i_tax] = "Peso Taxado"
+        keep_cols = [i for i, n in enumerate(names) if n != "Peso"]
+        names, cols = [names[i] for i in keep_cols], [cols[i] for i in keep_cols]
+
+    n_rows = len(df)
+    keep = np.ones(n_rows, dtype=bool)
+    is_service_header = np.zeros(n_rows, dtype=bool)
+    if n_rows and cols:
+        # A 1ª coluna repete poucos valores (aeroportos, seções): regex só sobre os valores distintos
+        codes, uniques = pd.factorize(cols[0])
+        first_str = pd.Series(uniques, dtype=object).astype(str)
+
+        def first_matches(pattern: str) -> np.ndarray:
+            hit = np.append(first_str.str.contains(pattern, case=False, regex=True, na=False).to_numpy(), False)
+            return hit[codes]  # código -1 (vazio) cai no False do fim
+
+        keep &= ~first_matches(NOISE_PATTERN)
+        if "Documento" in names:
+            is_data_row = cols[names.index("Documento")].astype(str).str.contains(r"\d", regex=True, na=False).to_numpy()
+            keep &= is_data_row | first_matches(SERVICE_HEADER_PATTERN)
+        keep &= ~np.logical_and.reduce([c.isna().to_numpy() for c in cols])
+        is_service_header = first_matches('|'.join(SERVICE_KEYWORDS))
+
+    # Tipo de serviço: cabeçalhos de seção propagados sobre as linhas mantidas
+    if cols:
+        first_kept = cols[0][keep]
+        headers = first_kept.where(is_service_header[keep])
+        vistos = headers.dropna()
+        tipo_final = str(vistos.iloc[-1]).strip() if len(vistos) else tipo_inicial
+        tipo = headers.ffill().fillna(tipo_inicial or 'Não especificado').str.strip()
+        rows_in_kept = ~is_service_header[keep]
+        tipo = tipo.to_numpy()[rows_in_kept]
+    else:
+        tipo_final, tipo, rows_in_kept = tipo_inicial, np.array([], dtype=object), np.zeros(0, dtype=bool)
+    rows = np.flatnonzero(keep)[rows_in_kept]
+
+    # Saída posicional (lista de nomes + lista de arrays): cabeçalhos repetidos, como as células
+    # vazias ("") que o Camelot/pdfplumber devolvem, continuam como colunas separadas e no lugar
+    out_names: List[str] = []
+    out_values: list = []
+
+    def _definir(name: str, values) -> None:
+        if name in out_names:
+            out_values[out_names.index(name)] = values
+        else:
+            out_names.append(name)
+            out_values.append(values)
+
+    def _valores(name: str):
+        return out_values[out_names.index(name)]
+
+    for name, col in zip(names, cols):
+        values = col.to_numpy()[rows]
+        if name in NUMERIC_COLS:
+            s = pd.Series(values, dtype=col.dtype).astype(str).str.replace(",", "", regex=False)
+            values = pd.to_numeric(s, errors="coerce").to_numpy()
+        elif name == "Documento":
+            values = (
+                pd.Series(values, dtype=col.dtype).astype(str)
+                .str.replace(r"[^\d\-]", "", regex=True).str.replace("-", "", regex=False)
+            ).to_numpy()
+        out_names.append(name)
+        out_values.append(values)
+    _definir("Tipo_Serviço", tipo)
+
+    if "Valor_Frete" in out_names and "Peso Taxado" in out_names:
+        valor_frete = pd.to_numeric(pd.Series(_valores("Valor_Frete")), errors='coerce')
+        peso_taxado = pd.to_numeric(pd.Series(_valores("Peso Taxado")), errors='coerce')
+        _definir("Valor_Tarifa", np.where(peso_taxado.notna() & (peso_taxado != 0), valor_frete / peso_taxado, pd.NA))
+
+    out = pd.DataFrame(dict(enumerate(out_values)), index=pd.RangeIndex(len(rows)), copy=False)
+    out.columns = out_names
+    return out, tipo_final
 
 def _final_column_order(df: pd.DataFrame) -> pd.DataFrame:
     cols = [c for c in TARGET_COLS if c in df.columns]
     extras = [c for c in df.columns if c not in cols]
     return df[cols + extras]
 
-def _combine_split_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    if 'Peso' in df.columns and 'Taxado' in df.columns:
-        df['Taxado'].fillna(df['Peso'], inplace=True)
-        df = df.rename(columns={'Taxado': 'Peso Taxado'}).drop(columns=['Peso'])
-    return df
-
 # ---- reparo linhas mescladas ----
 def _fix_merged_data_rows(df: pd.DataFrame) -> pd.DataFrame:
-    splitter = re.compile(r'\s{2,}')
-    repaired_rows = []
-    for _, row in df.iterrows():
-        is_merged = (pd.isna(row.get('Origem')) or pd.isna(row.get('Documento'))) and \
-                    isinstance(row.iloc[0], str) and len(row.iloc[0]) > 40
-        if is_merged:
-            parts = splitter.split(row.iloc[0].strip())
-            if len(parts) >= 9:
-                num_cols_to_fill = min(len(parts), len(df.columns))
-                row.iloc[:num_cols_to_fill] = parts[:num_cols_to_fill]
-        repaired_rows.append(row)
-    return pd.DataFrame(repaired_rows).reset_index(drop=True)
-
-def _extract_tables_from_pdf(pdf_path: str, use_camelot: bool) -> List[pd.DataFrame]:
-    if use_camelot and HAS_CAMELOT:
-        try:
-            tables = camelot.read_pdf(pdf_path, pages="2-end", flavor="stream", edge_tol=500)
-            if tables.n > 0: 
-                return [t.df for t in tables]
-        except Exception:
-            pass
+    """
+    Repara linhas em que o Camelot juntou todas as células na primeira coluna (texto longo
+    separado por 2+ espaços e sem Origem/Documento): só essas linhas são quebradas e os
+    pedaços voltam para as primeiras colunas, coluna a coluna.
+    """
+    if len(df) == 0:
+        return pd.DataFrame()
+    df = df.reset_index(drop=True)
+
+    sem_chave = pd.Series(False, index=df.index)
+    for col in ("Origem", "Documento"):
+        sem_chave |= df[col].isna() if col in df.columns else True
+    first = df.iloc[:, 0]
+    textos = first[sem_chave & first.map(lambda v: isinstance(v, str))]
+    textos = textos[textos.str.len() > 40] if len(textos) else textos
+    if textos.empty:
+        return df
+
+    parts = textos.str.strip().str.split(r"\s{2,}", regex=True)
+    n_parts = parts.str.len()
+    parts = parts[n_parts >= 9]
+    if parts.empty:
+        return df
+
+    rows = parts.index.to_numpy()
+    n_parts = n_parts[parts.index].to_numpy()
+    for j in range(min(int(n_parts.max()), df.shape[1])):
+        sel = n_parts > j
+        values = df.iloc[:, j].to_numpy(dtype=object, copy=True)
+        values[rows[sel]] = [p[j] for p in parts[sel]]
+        df.isetitem(j, values)
+    return df
+
+def _count_pages(pdf_path: str) -> int:
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+# ---- cache de tabelas brutas por página ----
+def _page_file(store_dir: Path, engine: str, page: int) -> Path:
+    return Path(store_dir) / "pages" / RAW_TABLES_VERSION / engine / f"p{page:05d}.feather"
+
+def _save_page_tables(path: Path, tables: List[pd.DataFrame]) -> None:
+    """Grava as tabelas de uma página num único feather (lista vazia também é gravada: página já lida)."""
+    parts = []
+    for i, tb in enumerate(tables):
+        part = tb.copy()
+        part.columns = [str(c) for c in range(tb.shape[1])]
+        part.insert(0, "__ncols", tb.shape[1])
+        part.insert(0, "__tabela", i)
+        parts.append(part)
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame({"__tabela": [], "__ncols": []}, dtype="int64")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, lambda tmp: df.to_feather(tmp))
+
+def _load_page_tables(path: Path) -> List[pd.DataFrame] | None:
+    if not path.exists():
+        return None
+    try:
+        df = pd.read_feather(path)
+    except Exception:
+        return None
+    tables = []
+    for _, part in df.groupby("__tabela", sort=True):
+        ncols = int(part["__ncols"].iloc[0])
+        tb = part[[str(c) for c in range(ncols)]].reset_index(drop=True)
+        tb.columns = range(ncols)
+        tables.append(tb)
+    return tables
+
+def _read_cached_pages(pdf_path: str, engine: str, pages: Tuple[int, int] | None, store_dir: Path,
+                       read_pages) -> List[pd.DataFrame]:
+    """
+    Lê as páginas do intervalo reaproveitando as que já estão no cache; as que faltam são lidas
+    por `read_pages(lista_de_paginas) -> {pagina: [tabelas]}` em blocos, gravando cada bloco
+    assim que termina. Uma falha no meio preserva o que já foi lido para a próxima tentativa.
+    """
+    first, last = pages if pages is not None else (2, _count_pages(pdf_path))
+    by_page: dict[int, List[pd.DataFrame]] = {}
+    missing = []
+    for page in range(first, last + 1):
+        cached = _load_page_tables(_page_file(store_dir, engine, page))
+        if cached is None:
+            missing.append(page)
+        else:
+            by_page[page] = cached
+
+    for i in range(0, len(missing), PAGE_CACHE_CHUNK):
+        chunk = missing[i:i + PAGE_CACHE_CHUNK]
+        found = read_pages(chunk)
+        for page in chunk:
+            tables = found.get(page, [])
+            _save_page_tables(_page_file(store_dir, engine, page), tables)
+            by_page[page] = tables
+
+    return [tb for page in range(first, last + 1) for tb in by_page[page]]
+
+def _read_camelot(pdf_path: str, pages: Tuple[int, int] | None = None, store_dir: Path | None = None) -> List[pd.DataFrame]:
+    """Camelot (stream) sobre um intervalo 1-based inclusivo; None = da página 2 até o fim."""
+    if store_dir is None:
+        page_spec = "2-end" if pages is None else f"{pages[0]}-{pages[1]}"
+        tables = camelot.read_pdf(pdf_path, pages=page_spec, flavor="stream", edge_tol=500)
+        return [t.df for t in tables]
+
+    def read_pages(page_list: List[int]) -> dict[int, List[pd.DataFrame]]:
+        tables = camelot.read_pdf(pdf_path, pages=",".join(map(str, page_list)), flavor="stream", edge_tol=500)
+        found: dict[int, List[pd.DataFrame]] = {}
+        for t in tables:
+            found.setdefault(int(t.page), []).append(t.df)
+        return found
+
+    return _read_cached_pages(pdf_path, "camelot", pages, store_dir, read_pages)
+
+def _read_pdfplumber(pdf_path: str, pages: Tuple[int, int] | None = None, store_dir: Path | None = None) -> List[pd.DataFrame]:
+    """pdfplumber sobre um intervalo 1-based inclusivo; None = da página 2 até o fim."""
+    def read_pages(page_list: List[int]) -> dict[int, List[pd.DataFrame]]:
+        found: dict[int, List[pd.DataFrame]] = {}
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_no in page_list:
+                tables = pdf.pages[page_no - 1].extract_tables()
+                found[page_no] = [pd.DataFrame(tb) for tb in tables or [] if tb]
+        return found
+
+    if store_dir is not None:
+        return _read_cached_pages(pdf_path, "pdfplumber", pages, store_dir, read_pages)
 
     frames = []
     with pdfplumber.open(pdf_path) as pdf:
-        for i, page in enumerate(pdf.pages):
-            if i == 0: 
-                continue
+        first, last = pages if pages is not None else (2, len(pdf.pages))
+        for page in pdf.pages[first - 1:last]:
             tables = page.extract_tables()
             for tb in tables or []:
                 if tb: frames.append(pd.DataFrame(tb))
     return frames
 
-def extract_invoice_table(pdf_path: str) -> pd.DataFrame:
-    raw_tables = _extract_tables_from_pdf(pdf_path, use_camelot=True)
-    if not raw_tables: raw_tables = _extract_tables_from_pdf(pdf_path, use_camelot=False)
-    if not raw_tables: return pd.DataFrame()
+def _extract_tables_from_pdf(pdf_path: str, engine: str, pages: Tuple[int, int] | None = None,
+                             store_dir: Path | None = None) -> List[pd.DataFrame]:
+    """Roda UM motor ('camelot' ou 'pdfplumber'); falha do Camelot vira lista vazia e o fallback fica com o chamador."""
+    if engine == "camelot":
+        if not HAS_CAMELOT:
+            return []
+        try:
+            return _read_camelot(pdf_path, pages, store_dir)
+        except Exception:
+            return []
+    return _read_pdfplumber(pdf_path, pages, store_dir)
+
+def _page_shards(last_page: int, shard_size: int) -> List[Tuple[int, int]]:
+    # A página 1 é a capa da fatura e nunca tem tabela útil
+    return [(first, min(first + shard_size - 1, last_page)) for first in range(2, last_page + 1, shard_size)]
+
+def _extract_tables_sharded(pdf_path: str, engine: str, page_workers: int,
+                            shard_size: int = PAGE_SHARD_SIZE, last_page: int | None = None,
+                            store_dir: Path | None = None) -> List[pd.DataFrame]:
+    """
+    Versão paralela de `_extract_tables_from_pdf`: divide as páginas em fatias de `shard_size`,
+    extrai cada fatia em um processo e remonta as tabelas na ordem das páginas.
+
+    O motor vale para o documento inteiro: se o Camelot falhar em qualquer fatia,
+    o resultado é vazio (como na extração sequencial) e o chamador parte para o fallback.
+    """
+    last_page = last_page or _count_pages(pdf_path)
+    shards = _page_shards(last_page, shard_size)
+    if not shards:
+        return []
+
+    if engine == "camelot":
+        if not HAS_CAMELOT:
+            return []
+        results = map_ordered(_read_camelot, [(pdf_path, sh, store_dir) for sh in shards], page_workers)
+        if any(err is not None for _, err in results):
+            return []
+        return [t for shard_tables, _ in results for t in shard_tables]
+
+    frames: List[pd.DataFrame] = []
+    for shard_tables, err in map_ordered(_read_pdfplumber, [(pdf_path, sh, store_dir) for sh in shards], page_workers):
+        if err is not None:
+            raise err
+        frames.extend(shard_tables)
+    return frames
 
-    processed_frames = []
-    for table in raw_tables:
-        if table.empty: continue
-        header = _normalize_header(table.iloc[0].tolist())
-        body = table.copy()
-        if len(header) < len(body.columns):
-            header.extend([f'extra_{i}' for i in range(len(body.columns) - len(header))])
-        body.columns = header[:len(body.columns)]
-        processed_frames.append(body)
+def _extract_tables(pdf_path: str, engine: str, page_workers: int = 1,
+                    store_dir: Path | None = None, last_page: int | None = None) -> List[pd.DataFrame]:
+    if page_workers > 1:
+        n_pages = last_page or _count_pages(pdf_path)
+        if n_pages - 1 > PAGE_SHARD_SIZE:
+            return _extract_tables_sharded(pdf_path, engine, page_workers, last_page=n_pages, store_dir=store_dir)
+    pages = (2, last_page) if last_page and last_page >= 2 else None
+    return _extract_tables_from_pdf(pdf_path, engine, pages, store_dir)
 
-    DF_FATURA = pd.concat(processed_frames, ignore_index=True)
+def _frame_with_header(table: pd.DataFrame) -> pd.DataFrame:
+    # A 1ª linha da tabela é o cabeçalho; ela continua no corpo e sai depois como ruído
+    header = _normalize_header(table.iloc[0].tolist())
+    body = table.copy()
+    if len(header) < len(body.columns):
+        header.extend([f'extra_{i}' for i in range(len(body.columns) - len(header))])
+    body.columns = header[:len(body.columns)]
+    return body
+
+def _normalize_tables(raw_tables: List[pd.DataFrame], tipo_inicial: str | None = None) -> Tuple[pd.DataFrame, str | None]:
+    """
+    Junta tabelas brutas e aplica toda a limpeza (sem a ordenação final de colunas).
+    Retorna também o tipo de serviço vigente na última linha, para continuar no próximo chunk.
+    """
+    processed_frames = [_frame_with_header(t) for t in raw_tables if not t.empty]
+    if not processed_frames:
+        return pd.DataFrame(), tipo_inicial
+    df = pd.concat(processed_frames, ignore_index=True)
 
     # reparo antes de processar
-    DF_FATURA = _fix_merged_data_rows(DF_FATURA)
-
-    DF_FATURA = _combine_split_columns(DF_FATURA)
-    DF_FATURA = _drop_noise_rows(DF_FATURA)
-    DF_FATURA = _add_service_type_and_clean(DF_FATURA)
-    DF_FATURA = _coerce_numbers(DF_FATURA, ["Valor_Frete", "Outras Taxas", "Peso Taxado", "Vlr Total", "Vlr Advalorem"])
-    DF_FATURA = _clean_documento(DF_FATURA)
-    DF_FATURA = _add_valor_tarifa(DF_FATURA)
+    df = _fix_merged_data_rows(df)
+
+    return _normalize_invoice_frame(df, tipo_inicial)
+
+def _probe_pages(last_page: int) -> List[int]:
+    # Amostra: 1ª página de dados e a última (layouts costumam mudar no rodapé/resumo)
+    return sorted({2, last_page})[:PROBE_PAGES] if last_page >= 2 else []
+
+def _choose_engine(pdf_path: str, last_page: int, store_dir: Path | None = None) -> Tuple[str, dict]:
+    """
+    Sonda barata do layout: roda o Camelot só nas páginas de amostra. Se ele achar alguma tabela,
+    o documento vai de Camelot (mesma preferência de antes); se não achar nada, vai direto de
+    pdfplumber, sem pagar o Camelot no PDF inteiro para descobrir que ele não serve.
+    Com `store_dir`, as páginas lidas na sonda ficam no cache por página e não são lidas de novo.
+    """
+    info = {"paginas": last_page, "sonda_paginas": _probe_pages(last_page)}
+    if not HAS_CAMELOT:
+        info.update(motivo="camelot indisponível", sonda_s=0.0)
+        return "pdfplumber", info
+
+    t0 = time.perf_counter()
+    achou = 0
+    for page in info["sonda_paginas"]:
+        achou += sum(not t.empty for t in _extract_tables_from_pdf(pdf_path, "camelot", (page, page), store_dir))
+        if achou:
+            break
+    info.update(sonda_s=round(time.perf_counter() - t0, 3), sonda_tabelas_camelot=achou)
+    if achou or not info["sonda_paginas"]:
+        info["motivo"] = "camelot achou tabelas na amostra"
+        return "camelot", info
+    info["motivo"] = "camelot sem tabelas na amostra"
+    return "pdfplumber", info
+
+def extract_invoice_table(pdf_path: str, page_workers: int = 1, cache_dir: str | Path | None = None) -> pd.DataFrame:
+    """
+    Extrai e normaliza a tabela da fatura LATAM.
+    Com `page_workers > 1`, PDFs com mais de PAGE_SHARD_SIZE páginas são extraídos em fatias
+    de páginas paralelas (não usar quando a chamada já roda dentro de um worker do pool).
+    Com `cache_dir` (pasta da entrada do PDF no cache), as tabelas brutas de cada página são
+    persistidas: uma nova tentativa só lê as páginas que faltam e refaz apenas a normalização.
+
+    O motor é escolhido por documento (`_choose_engine`) e o outro só roda se o escolhido não
+    achar nada. A escolha e os tempos ficam em `df.attrs["extracao"]`.
+    """
+    store_dir = Path(cache_dir) if cache_dir is not None else None
+    last_page = _count_pages(pdf_path)
+    engine, info = _choose_engine(pdf_path, last_page, store_dir)
+
+    t0 = time.perf_counter()
+    raw_tables = _extract_tables(pdf_path, engine, page_workers, store_dir, last_page)
+    info.update(motor=engine, extracao_s=round(time.perf_counter() - t0, 3))
+    if not raw_tables:
+        fallback = "pdfplumber" if engine == "camelot" else "camelot"
+        t0 = time.perf_counter()
+        raw_tables = _extract_tables(pdf_path, fallback, page_workers, store_dir, last_page)
+        info.update(fallback=fallback, fallback_s=round(time.perf_counter() - t0, 3))
+        if raw_tables: info["motor"] = fallback
+    info["tabelas"] = len(raw_tables)
+    if not raw_tables:
+        vazio = pd.DataFrame()
+        vazio.attrs["extracao"] = info
+        return vazio
+
+    DF_FATURA, _ = _normalize_tables(raw_tables)
     DF_FATURA = _final_column_order(DF_FATURA)
 
-    return DF_FATURA.dropna(how="all").reset_index(drop=True)
\ No newline at end of file
+    DF_FATURA = DF_FATURA.dropna(how="all").reset_index(drop=True)
+    DF_FATURA.attrs["extracao"] = info
+    return DF_FATURA
+
+# ---- extração em streaming (memória limitada) ----
+def _stream_chunk(df: pd.DataFrame, offset: int) -> pd.DataFrame:
+    df = df.dropna(how="all").reindex(columns=STREAM_COLS)
+    for col, dtype in STREAM_DTYPES.items():
+        if dtype == "float64":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    return df
+
+def iter_invoice_chunks(pdf_path: str, pages_per_chunk: int = STREAM_PAGES_PER_CHUNK,
+                        cache_dir: str | Path | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Versão geradora de `extract_invoice_table`: lê `pages_per_chunk` páginas por vez e devolve
+    cada pedaço já normalizado, sem montar a fatura inteira em memória.
+
+    - O `Tipo_Serviço` vigente no fim de um chunk continua valendo no começo do próximo.
+    - Todos os chunks têm as colunas de STREAM_COLS (colunas extras do PDF são descartadas) e o
+      índice continua a numeração do chunk anterior. As numéricas de STREAM_DTYPES saem float64;
+      as de texto ficam object, como em `extract_invoice_table` (o esquema string só é imposto
+      na gravação, por `write_feather_stream`).
+    - Cada chunk usa os cabeçalhos das próprias tabelas (a fatura repete o cabeçalho por página).
+    - Se o Camelot falhar num pedaço, só aquele pedaço é relido com pdfplumber; se o motor
+      escolhido não achar nada no documento inteiro, o outro motor é usado do início.
+    """
+    store_dir = Path(cache_dir) if cache_dir is not None else None
+    last_page = _count_pages(pdf_path)
+    engine, _ = _choose_engine(pdf_path, last_page, store_dir)
+    engines = [engine, "pdfplumber" if engine == "camelot" else "camelot"]
+
+    for engine in engines:
+        if engine == "camelot" and not HAS_CAMELOT:
+            continue
+        tipo_atual: str | None = None
+        offset = 0
+        achou = False
+        for first, last in _page_shards(last_page, pages_per_chunk):
+            tables = _extract_tables_from_pdf(pdf_path, engine, (first, last), store_dir)
+            if not tables and engine == "camelot":
+                tables = _read_pdfplumber(pdf_path, (first, last), store_dir)
+            # Tabela sem coluna Documento no cabeçalho (ex.: continuação de página sem cabeçalho) não
+            # sobrevive ao filtro de linhas de dados na extração completa; aqui é descartada direto
+            tables = [t for t in tables if not t.empty and "Documento" in _frame_with_header(t.head(1)).columns]
+            if not tables:
+                continue
+            achou = True
+
+            df, tipo_atual = _normalize_tables(tables, tipo_atual)
+            chunk = _stream_chunk(df, offset)
+            if len(chunk):
+                offset += len(chunk)
+                yield chunk
+        if achou:
+            return
+
+def extract_invoice_to_feather(pdf_path: str, dest: str | Path, pages_per_chunk: int = STREAM_PAGES_PER_CHUNK,
+                               cache_dir: str | Path | None = None) -> int:
+    """Grava a fatura em feather chunk a chunk (memória limitada ao chunk). Retorna o nº de linhas."""
+    return write_feather_stream(iter_invoice_chunks(pdf_path, pages_per_chunk, cache_dir), Path(dest), STREAM_DTYPES)
@@ -1,13 +1,28 @@
 # Repositories/ProcessadorTabelaLatam.py
 
 from __future__ import annotations
+import hashlib
+import os
+import re
+import threading
+import numpy as np
 import pandas as pd
+from pandas.io.parsers import TextParser
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import Iterable, List, Tuple, Dict
 
 # Supondo que suas funções de utilidade estejam em Utils/Parse.py
 # Se não estiverem, você pode precisar ajustar o import.
-from Utils.Parse import std_text
+from Utils.Parse import std_text, std_text_series
+from Utils import Parse
+from Utils.Cache_Helpers import ContentCache, file_sha256, source_version
+from Utils.Excel_Helpers import open_excel, FALLBACK_ENGINE
+from Utils.Numeric_Helpers import parse_money_series
+
+PADRAO_COLS = ["Tipo_Servico_Sigla", "Tipo_Servico", "Origem", "Destino", "Frete_Minimo", "Valor_Tarifa", "Fonte_Arquivo"]
+
+# Versão do cache de tabelas processadas: muda sozinha quando este arquivo (ou o Parse) muda
+TABELAS_VERSION = source_version("tabelas-latam-1", __file__, Parse.__file__)
 
 class ProcessarTabelaLatam:
     """
@@ -31,10 +46,97 @@ class ProcessarTabelaLatam:
             raise FileNotFoundError(f"O arquivo não foi encontrado em: {self.xlsx_path}")
 
         try:
-            self.xls = pd.ExcelFile(self.xlsx_path)
+            self.xls = open_excel(self.xlsx_path)
         except Exception as e:
             raise IOError(f"Falha ao abrir o arquivo Excel: {self.xlsx_path}. Verifique se o arquivo não está corrompido. Erro: {e}")
 
+        # Linhas cruas de cada aba já lida (valores das células, sem inferência de tipos)
+        self._abas: Dict[str, list] = {}
+
+    def carregar_abas(self, sheet_names: Iterable[str]) -> None:
+        """
+        Lê as abas pedidas (que existirem e ainda não foram lidas) numa única passada pelo
+        workbook, guardando as linhas em memória para os `processar_*` não voltarem ao XML.
+        """
+        faltantes = [sh for sh in sheet_names if sh in self.xls.sheet_names and sh not in self._abas]
+        if not faltantes:
+            return
+        # dtype=object: mantém o valor da célula; a inferência de tipos é feita depois, por trecho
+        try:
+            lidas = pd.read_excel(self.xls, sheet_name=faltantes, header=None, dtype=object)
+        except Exception as e:
+            if self.xls.engine == FALLBACK_ENGINE:
+                raise
+            print(f"Aviso: motor '{self.xls.engine}' falhou ao ler {faltantes} ({e}). Usando {FALLBACK_ENGINE}.")
+            self.xls = open_excel(self.xlsx_path, FALLBACK_ENGINE)
+            lidas = pd.read_excel(self.xls, sheet_name=faltantes, header=None, dtype=object)
+        for sh, df in lidas.items():
+            self._abas[sh] = df.values.tolist()
+
+    def _ler_aba_cabecalho_duplo(self, sheet_name: str) -> pd.DataFrame:
+        """
+        Lê a aba uma vez e separa em memória as duas linhas de cabeçalho do corpo.
+        Cada trecho passa pelo mesmo parser do `read_excel`, então os tipos saem idênticos
+        aos de ler o cabeçalho (nrows=2) e o corpo (skiprows=2) separadamente.
+        """
+        self.carregar_abas([sheet_name])
+        linhas = self._abas[sheet_name]
+
+        header_df = TextParser(linhas[:2], header=None, skip_blank_lines=False).read()
+        header_row1 = header_df.iloc[0]
+        header_row2 = header_df.iloc[1]
+        final_header = header_row2.fillna(header_row1)
+
+        df_raw = TextParser(linhas[2:], header=None, skip_blank_lines=False).read()
+        df_raw.columns = final_header
+        return df_raw
+
+    @classmethod
+    def carregar_acordos(cls, xlsx_path: str | Path, cache_dir: str | Path | None = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Retorna (JUN E RES, PROXIMOVOO) já tratados, usando um cache em Parquet indexado pelo
+        SHA-256 da planilha: a mesma planilha de acordos enviada de novo não passa pelo openpyxl.
+
+        Falha na aba VELOZ não impede o uso dos serviços base (vira DataFrame vazio, sem cache,
+        para o aviso reaparecer). Falha nos serviços base propaga a exceção, como antes.
+
+        Args:
+            xlsx_path (str | Path): Planilha de acordos da Latam.
+            cache_dir (str | Path | None): Pasta do cache; None desliga o cache.
+        """
+        cache = sha = None
+        if cache_dir is not None:
+            try:
+                sha = file_sha256(xlsx_path)
+                cache = ContentCache(cache_dir, TABELAS_VERSION, fmt="parquet")
+                df_bases = cache.load_frame(sha, "bases")
+                df_veloz = cache.load_frame(sha, "veloz")
+                if df_bases is not None and df_veloz is not None:
+                    print(f"[cache] Tabelas de acordo reaproveitadas ({Path(xlsx_path).name}, {sha[:12]})")
+                    return df_bases, df_veloz
+            except OSError as e:
+                print(f"Aviso: cache de tabelas indisponível: {e}")
+                cache = None
+
+        processador = cls(xlsx_path)
+        processador.carregar_abas(["JUN E RES", "PROXIMOVOO"])
+        df_bases = processador.processar_servicos_bases()
+        veloz_ok = True
+        try:
+            df_veloz = processador.processar_servico_veloz()
+        except Exception as e:  # noqa: BLE001
+            print(f"Aviso: falha ao ler VELOZ: {e}")
+            df_veloz, veloz_ok = pd.DataFrame(), False
+
+        if cache is not None:
+            try:
+                cache.save_frame(sha, df_bases, "bases")
+                if veloz_ok:
+                    cache.save_frame(sha, df_veloz, "veloz")
+            except Exception as e:  # noqa: BLE001
+                print(f"Aviso: falha ao gravar cache das tabelas de acordo: {e}")
+        return df_bases, df_veloz
+
     def processar_servicos_bases(self) -> pd.DataFrame:
         """
         Processa a planilha de fretes a partir da aba 'JUN E RES', lidando
@@ -53,16 +155,8 @@ class ProcessarTabelaLatam:
             raise ValueError(f"A aba '{SHEET_NAME}' não foi encontrada no arquivo: {self.xlsx_path}.")
 
         try:
-            # Lê o cabeçalho de duas linhas
-            header_df = pd.read_excel(self.xls, sheet_name=SHEET_NAME, nrows=2, header=None)
-            
-            header_row1 = header_df.iloc[0]
-            header_row2 = header_df.iloc[1]
-            final_header = header_row2.fillna(header_row1)
-
-            # Lê os dados, pulando o cabeçalho que já processamos
-            df_raw = pd.read_excel(self.xls, sheet_name=SHEET_NAME, header=None, skiprows=2)
-            df_raw.columns = final_header
+            # Cabeçalho de duas linhas + dados, numa leitura só da aba
+            df_raw = self._ler_aba_cabecalho_duplo(SHEET_NAME)
 
         except Exception as e:
             raise IOError(f"Falha ao ler os dados da aba '{SHEET_NAME}'. Verifique o formato. Erro: {e}")
@@ -133,14 +227,8 @@ class ProcessarTabelaLatam:
                 return pd.DataFrame()
 
             try:
-                # A leitura do cabeçalho duplo permanece a mesma
-                header_df = pd.read_excel(self.xls, sheet_name=SHEET_NAME, nrows=2, header=None)
-                header_row1 = header_df.iloc[0]
-                header_row2 = header_df.iloc[1]
-                final_header = header_row2.fillna(header_row1)
-
-                df_raw = pd.read_excel(self.xls, sheet_name=SHEET_NAME, header=None, skiprows=2)
-                df_raw.columns = final_header
+                # Cabeçalho duplo + dados, numa leitura só da aba
+                df_raw = self._ler_aba_cabecalho_duplo(SHEET_NAME)
             except Exception as e:
                 raise IOError(f"Falha ao ler os dados da aba '{SHEET_NAME}'. Verifique o formato. Erro: {e}")
 
@@ -215,39 +303,51 @@ class ProcessarTabelaLatam:
         Retorna:
         pd.DataFrame com colunas:
         ['Tipo_Servico_Sigla','Tipo_Servico','Origem','Destino','Frete_Minimo','Valor_Tarifa','Fonte_Arquivo']
+
+        No app, use `get_padrao_store().dataframe()`: mesmo resultado, mantido em memória.
         """
-        import re
-        import numpy as np
-        import os
+        pasta = ProcessarTabelaLatam._pasta_padrao(pasta_padrao)
+        arquivos = ProcessarTabelaLatam._listar_arquivos_padrao(pasta)
+        if arquivos is None:
+            return ProcessarTabelaLatam._padrao_vazio()
+
+        dfs = [df for df in map(ProcessarTabelaLatam._processar_arquivo_padrao, arquivos) if df is not None]
+        return ProcessarTabelaLatam._consolidar_padrao(dfs, pasta)
+
+    @staticmethod
+    def _padrao_vazio() -> pd.DataFrame:
+        return pd.DataFrame(columns=PADRAO_COLS)
 
+    @staticmethod
+    def _pasta_padrao(pasta_padrao: str | Path | None = None) -> Path:
         default_dir = Path(__file__).resolve().parents[1] / "Data" / "Tabelas" / "LATAM" / "PADRAO"
         env_dir = os.getenv("LATAM_TABLES_DIR")
-        pasta = Path(pasta_padrao) if pasta_padrao else (Path(env_dir) if env_dir else default_dir)
+        return Path(pasta_padrao) if pasta_padrao else (Path(env_dir) if env_dir else default_dir)
 
-        if not pasta.exists():
-            print(f"Aviso: Pasta de tabelas padrão não encontrada: {pasta}")
-            # Retorna um DataFrame vazio com a estrutura esperada
-            return pd.DataFrame(columns=[
-                "Tipo_Servico_Sigla","Tipo_Servico","Origem","Destino","Frete_Minimo","Valor_Tarifa","Fonte_Arquivo"
-            ])
+    @staticmethod
+    def _listar_arquivos_padrao(pasta: Path) -> List[Path] | None:
+        """Excel da pasta PADRAO em ordem de nome; None (com aviso) se a pasta não existir ou estiver vazia."""
+        arquivos, aviso = ProcessarTabelaLatam._buscar_arquivos_padrao(pasta)
+        if aviso:
+            print(aviso)
+            return None
+        return arquivos
 
+    @staticmethod
+    def _buscar_arquivos_padrao(pasta: Path) -> Tuple[List[Path], str | None]:
+        """(Excel da pasta PADRAO em ordem de nome, aviso se a pasta não existir ou estiver vazia)."""
+        if not pasta.exists():
+            return [], f"Aviso: Pasta de tabelas padrão não encontrada: {pasta}"
         arquivos = sorted(list(pasta.glob("*.xlsx")) + list(pasta.glob("*.xls")) + list(pasta.glob("*.xlsm")))
         if not arquivos:
-            print(f"Aviso: nenhum Excel em {pasta}")
-            return pd.DataFrame(columns=[
-                "Tipo_Servico_Sigla","Tipo_Servico","Origem","Destino","Frete_Minimo","Valor_Tarifa","Fonte_Arquivo"
-            ])
+            return [], f"Aviso: nenhum Excel em {pasta}"
+        return arquivos, None
 
+    @staticmethod
+    def _processar_arquivo_padrao(arq: Path) -> pd.DataFrame | None:
+        """Lê e trata UM arquivo da pasta PADRAO; None se não der para aproveitar (o motivo é impresso)."""
         MAPA_SIGLAS_SERVICOS: Dict[str, str] = {"ST2MD": "ESTANDAR 2 MEDS"}
 
-        def parse_money(val) -> float | np.nan:  # type: ignore
-            if pd.isna(val): return np.nan
-            if isinstance(val, (int, float, np.number)): return float(val)
-            s = re.sub(r"[^\d,.\-]", "", str(val))
-            s = s.replace(".", "").replace(",", ".") if ("," in s and "." in s) else s.replace(",", ".")
-            try: return float(s)
-            except: return np.nan
-
         def pick_col(cols, patterns: list[str]) -> str | None:
             for pat in patterns:
                 for c in cols:
@@ -255,53 +355,168 @@ class ProcessarTabelaLatam:
                         return c
             return None
 
-        dfs: list[pd.DataFrame] = []
-        for arq in arquivos:
+        try:
+            xls = open_excel(arq)
+            sh = xls.sheet_names[0]
             try:
-                xls = pd.ExcelFile(arq)
-                sh = xls.sheet_names[0]
                 df_raw = pd.read_excel(xls, sheet_name=sh, header=0)
             except Exception as e:
-                print(f"Aviso: falha em '{arq.name}': {e}")
-                continue
-
-            df_raw = df_raw.dropna(how="all").dropna(axis=1, how="all")
-            cols = list(df_raw.columns)
-
-            col_serv = pick_col(cols, [r"^servi[cç]o$", r"^c[oó]digo do produto$"])
-            col_org  = pick_col(cols, [r"^origem$"])
-            col_dst  = pick_col(cols, [r"^destino$"])
-            col_min  = pick_col(cols, [r"^(m[ií]nima|min(\.?| )charge)$"])
-            col_pub  = pick_col(cols, [r"^(p[úu]blico|0\+|tarifa|valor(\s*|_)*tarifa)$"])
-
-            faltantes = [n for n, c in {
-                "SERVIÇO": col_serv, "ORIGEM": col_org, "DESTINO": col_dst, "MÍNIMA": col_min, "PÚBLICO": col_pub
-            }.items() if c is None]
-            if faltantes:
-                print(f"Aviso: colunas faltando em '{arq.name}': {', '.join(faltantes)}")
-                continue
-
-            df = pd.DataFrame({
-                "Tipo_Servico_Sigla": df_raw[col_serv].astype(str).str.strip(),
-                "Origem": df_raw[col_org].astype(str).str.strip().apply(std_text),
-                "Destino": df_raw[col_dst].astype(str).str.strip().apply(std_text),
-                "Frete_Minimo": df_raw[col_min].apply(parse_money),
-                "Valor_Tarifa": df_raw[col_pub].apply(parse_money),
-            })
-            df["Tipo_Servico"] = df["Tipo_Servico_Sigla"].map(MAPA_SIGLAS_SERVICOS).fillna(df["Tipo_Servico_Sigla"])
-            df["Fonte_Arquivo"] = arq.name
-            df.replace({"Origem": {"NAN": np.nan}, "Destino": {"NAN": np.nan}}, inplace=True)
-            df = df.dropna(subset=["Origem", "Destino", "Valor_Tarifa"])
-            df = df[["Tipo_Servico_Sigla","Tipo_Servico","Origem","Destino","Frete_Minimo","Valor_Tarifa","Fonte_Arquivo"]]
-            print(f"[OK] {arq.name}: {len(df)} linhas válidas")
-            dfs.append(df)
+                if xls.engine == FALLBACK_ENGINE:
+                    raise
+                print(f"Aviso: motor '{xls.engine}' falhou em '{arq.name}' ({e}). Usando {FALLBACK_ENGINE}.")
+                df_raw = pd.read_excel(open_excel(arq, FALLBACK_ENGINE), sheet_name=sh, header=0)
+        except Exception as e:
+            print(f"Aviso: falha em '{arq.name}': {e}")
+            return None
+
+        df_raw = df_raw.dropna(how="all").dropna(axis=1, how="all")
+        cols = list(df_raw.columns)
+
+        col_serv = pick_col(cols, [r"^servi[cç]o$", r"^c[oó]digo do produto$"])
+        col_org  = pick_col(cols, [r"^origem$"])
+        col_dst  = pick_col(cols, [r"^destino$"])
+        col_min  = pick_col(cols, [r"^(m[ií]nima|min(\.?| )charge)$"])
+        col_pub  = pick_col(cols, [r"^(p[úu]blico|0\+|tarifa|valor(\s*|_)*tarifa)$"])
 
+        faltantes = [n for n, c in {
+            "SERVIÇO": col_serv, "ORIGEM": col_org, "DESTINO": col_dst, "MÍNIMA": col_min, "PÚBLICO": col_pub
+        }.items() if c is None]
+        if faltantes:
+            print(f"Aviso: colunas faltando em '{arq.name}': {', '.join(faltantes)}")
+            return None
+
+        df = pd.DataFrame({
+            "Tipo_Servico_Sigla": df_raw[col_serv].astype(str).str.strip(),
+            "Origem": std_text_series(df_raw[col_org].astype(str)),
+            "Destino": std_text_series(df_raw[col_dst].astype(str)),
+            "Frete_Minimo": parse_money_series(df_raw[col_min]),
+            "Valor_Tarifa": parse_money_series(df_raw[col_pub]),
+        })
+        df["Tipo_Servico"] = df["Tipo_Servico_Sigla"].map(MAPA_SIGLAS_SERVICOS).fillna(df["Tipo_Servico_Sigla"])
+        df["Fonte_Arquivo"] = arq.name
+        df.replace({"Origem": {"NAN": np.nan}, "Destino": {"NAN": np.nan}}, inplace=True)
+        df = df.dropna(subset=["Origem", "Destino", "Valor_Tarifa"])
+        df = df[PADRAO_COLS]
+        print(f"[OK] {arq.name}: {len(df)} linhas válidas")
+        return df
+
+    @staticmethod
+    def _consolidar_padrao(dfs: List[pd.DataFrame], pasta: Path) -> pd.DataFrame:
         if not dfs:
             print("Aviso: nenhum DataFrame válido gerado das tabelas padrão.")
-            return pd.DataFrame(columns=[
-                "Tipo_Servico_Sigla","Tipo_Servico","Origem","Destino","Frete_Minimo","Valor_Tarifa","Fonte_Arquivo"
-            ])
+            return ProcessarTabelaLatam._padrao_vazio()
 
         DF_PADRAO = pd.concat(dfs, ignore_index=True)
         print(f"Consolidação pronta: {len(DF_PADRAO)} linhas em DF_PADRAO | Pasta: {pasta}")
-        return DF_PADRAO
\ No newline at end of file
+        return DF_PADRAO
+
+
+class TabelasPadraoStore:
+    """
+    Tabelas PADRAO consolidadas e mantidas em memória pelo processo inteiro.
+
+    Carrega uma vez (na subida do app ou no 1º uso) e, com `start()`, uma thread em segundo
+    plano confere mtime/tamanho dos arquivos da pasta a cada `poll_s` segundos, reprocessando
+    só os arquivos novos/alterados e trocando o DataFrame consolidado de uma vez.
+    No caminho da requisição, `dataframe()` não toca no disco.
+    """
+
+    def __init__(self, pasta_padrao: str | Path | None = None):
+        self.pasta = ProcessarTabelaLatam._pasta_padrao(pasta_padrao)
+        self._lock = threading.Lock()          # protege o DataFrame/versão publicados
+        self._reload_lock = threading.Lock()   # uma recarga por vez
+        self._arquivos: Dict[str, Tuple[Tuple[int, int], pd.DataFrame | None]] = {}
+        self._df: pd.DataFrame | None = None
+        self._versao = ""
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._aviso_pasta: str | None = None   # último aviso de pasta ausente/vazia (repete só se mudar)
+
+    @staticmethod
+    def _assinatura(arq: Path) -> Tuple[int, int]:
+        st = arq.stat()
+        return st.st_mtime_ns, st.st_size
+
+    def recarregar(self) -> bool:
+        """Reprocessa os arquivos novos/alterados/removidos. Retorna True se o DataFrame mudou."""
+        with self._reload_lock:
+            arquivos, aviso = ProcessarTabelaLatam._buscar_arquivos_padrao(self.pasta)
+            # A verificação periódica roda a cada poll_s: avisa só quando o estado da pasta muda
+            if aviso and aviso != self._aviso_pasta:
+                print(aviso)
+            self._aviso_pasta = aviso
+
+            atuais: Dict[str, Tuple[Tuple[int, int], pd.DataFrame | None]] = {}
+            mudou = self._df is None or len(arquivos) != len(self._arquivos)
+            for arq in arquivos:
+                try:
+                    sig = self._assinatura(arq)
+                except OSError:
+                    continue  # removido entre o glob e o stat
+                anterior = self._arquivos.get(arq.name)
+                if anterior is not None and anterior[0] == sig:
+                    atuais[arq.name] = anterior
+                    continue
+                atuais[arq.name] = (sig, ProcessarTabelaLatam._processar_arquivo_padrao(arq))
+                mudou = True
+            mudou = mudou or atuais.keys() != self._arquivos.keys()
+            if not mudou:
+                return False
+
+            dfs = [df for _, df in atuais.values() if df is not None]
+            df_novo = ProcessarTabelaLatam._consolidar_padrao(dfs, self.pasta)
+            assinatura = sorted((nome, sig) for nome, (sig, _) in atuais.items())
+            versao = hashlib.sha256(repr(assinatura).encode("utf-8")).hexdigest()[:12]
+            with self._lock:
+                self._arquivos, self._df, self._versao = atuais, df_novo, versao
+            return True
+
+    def dataframe(self) -> pd.DataFrame:
+        """DataFrame consolidado (somente leitura: quem precisar alterar faz uma cópia)."""
+        with self._lock:
+            df = self._df
+        if df is None:
+            self.recarregar()
+            with self._lock:
+                df = self._df
+        return df
+
+    @property
+    def versao(self) -> str:
+        """Hash de (arquivo, mtime, tamanho) dos arquivos carregados; muda a cada recarga efetiva."""
+        if self._df is None:
+            self.recarregar()
+        with self._lock:
+            return self._versao
+
+    def start(self, poll_s: float) -> None:
+        """Carrega agora e inicia a verificação periódica em segundo plano (idempotente)."""
+        self.dataframe()
+        if poll_s <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(poll_s,), name="padrao-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self, poll_s: float) -> None:
+        while not self._stop.wait(poll_s):
+            try:
+                if self.recarregar():
+                    print(f"Tabelas PADRAO recarregadas (versão {self._versao}).")
+            except Exception as e:  # noqa: BLE001
+                print(f"Aviso: falha ao recarregar tabelas PADRAO: {e}")
+
+
+_PADRAO_STORE: TabelasPadraoStore | None = None
+_PADRAO_STORE_LOCK = threading.Lock()
+
+def get_padrao_store() -> TabelasPadraoStore:
+    """Store PADRAO do processo (criado sob demanda)."""
+    global _PADRAO_STORE
+    with _PADRAO_STORE_LOCK:
+        if _PADRAO_STORE is None:
+            _PADRAO_STORE = TabelasPadraoStore()
+        return _PADRAO_STORE
@@ -9,6 +9,9 @@ Comparador de fretes LATAM, com variáveis e comentários mais claros, mantendo
   comentários sobre decisões, validações e tratamento de NaN.
 """
 
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple
 import numpy as np
 import pandas as pd
@@ -20,11 +23,23 @@ from Config import Appconfig
 from Utils.Numeric_Helpers import to_numeric_cols
 from Utils.DataFrame_Helpers import sanitize_header, sanitize_and_dedupe_columns
 from Utils.Parse import std_text
+from Utils.Category_Helpers import STATUS_VOCAB, as_category, map_category, replace_category
+from Utils.Cache_Helpers import source_version
 
 # Repositórios
-from Repositories.Repositorio_TabelasFretesLatam import ProcessarTabelaLatam
-from Repositories.Db_Queries import get_tipo_servico, get_ctcs, get_ctc_peso
+from Repositories.Repositorio_TabelasFretesLatam import ProcessarTabelaLatam, get_padrao_store
+from Repositories.Db_Queries import get_enriquecimento
 
+# Serviços
+from Services.Latam.IndiceTarifasLatam import FaixasPesoLatam, IndiceTarifasLatam
+
+# Versão do comparador para o cache de resultados: muda sozinha a cada alteração deste arquivo,
+# do índice de tarifas, da leitura das planilhas ou dos helpers de normalização usados aqui
+COMPARATOR_VERSION = source_version(
+    "comparativo-latam-1", __file__,
+    *(inspect.getfile(obj) for obj in (IndiceTarifasLatam, ProcessarTabelaLatam, to_numeric_cols,
+                                       sanitize_header, std_text, map_category)),
+)
 
 class LatamFreightComparer:
     """
@@ -38,9 +53,20 @@ class LatamFreightComparer:
     BR_IATA_ALIAS = "BR"
     SAO_IATA_ALIAS = "SAO"
 
+    # VELOZ só tarifa até este peso (kg); acima, PESO EXCEDENTE (regra informada pelo usuário)
+    PESO_MAX_VELOZ = 30
+
     def __init__(self, cfg: Appconfig) -> None:
         self.cfg = cfg
 
+    @staticmethod
+    def versao_referencias() -> str:
+        """
+        Versão das tabelas de referência que não vêm no upload (PADRÃO em memória).
+        Entra na chave do cache de resultados junto com o batch e a planilha de acordos.
+        """
+        return get_padrao_store().versao
+
     # ---------------------------------------------------------------------
     # PÓS-PROCESSAMENTO: organiza DataFrames finais de exportação e exibição
     # ---------------------------------------------------------------------
@@ -124,16 +150,22 @@ class LatamFreightComparer:
         return df_export, df_display
 
     # ---------------------------------------------------------------------
-    # ENRIQUECIMENTO: tipo de serviço vindo do DB
+    # ENRIQUECIMENTO: tipo de serviço, CTCs e pesos vindos do DB (uma consulta só)
     # ---------------------------------------------------------------------
-    def _inject_service_type_from_db(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Mistura o tipo de serviço do DB quando disponível."""
+    # Colunas do DB por grupo; cada grupo só entra quando o banco trouxe algo dele (como nas consultas separadas)
+    DB_COLS_CTC = {"CTCs": ["CTCs"], "PesoUsado_CIA": ["Peso_Taxado_CTC", "Peso_Bruto_CTC", "PesoUsado_CIA", "TipoPeso_CIA"]}
+
+    def _fetch_db_enrichment(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Uma linha por Documento: [Documento, Tipo_Servico, CTCs, pesos do CTC]."""
         nocas = df["Documento"].astype(str).dropna().unique().tolist()
-        df_serv = get_tipo_servico(nocas)  # Esperado: [Documento, Tipo_Servico]
-        if df_serv.empty:
+        return get_enriquecimento(nocas)
+
+    def _inject_service_type_from_db(self, df: pd.DataFrame, df_db: pd.DataFrame) -> pd.DataFrame:
+        """Mistura o tipo de serviço do DB quando disponível."""
+        if df_db.empty:
             return df
 
-        df_serv = df_serv.rename(columns={"Tipo_Servico": "Tipo_Servico_DB"})
+        df_serv = df_db[["Documento", "Tipo_Servico"]].rename(columns={"Tipo_Servico": "Tipo_Servico_DB"})
         df = pd.merge(df, df_serv, on="Documento", how="left")
         df["Tipo_Serviço"] = np.where(
             df["Tipo_Servico_DB"].notna() & (df["Tipo_Servico_DB"] != ""),
@@ -149,45 +181,78 @@ class LatamFreightComparer:
         if df_fatura.empty:
             return pd.DataFrame(), pd.DataFrame()
 
+        t_inicio = time.perf_counter()
+        etapas: dict[str, float] = {}  # tempo de parede por etapa (s), também em df_export.attrs["etapas"]
+
+        def _medir(nome: str, func, *args):
+            t0 = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                etapas[nome] = round(time.perf_counter() - t0, 3)
+
         df_in = df_fatura.copy().reset_index(drop=True)
         df_in["__ROW_ID__"] = np.arange(len(df_in))
-        df_in = self._inject_service_type_from_db(df_in)
 
-        # Carrega tabelas de tarifas
-        try:
-            processador = ProcessarTabelaLatam(acordos_xlsx_path)
-            df_tarifa_bases = processador.processar_servicos_bases()
-            df_tarifa_bases["Fonte_Tarifa"] = "JUN E RES"
+        # Banco, planilha de acordos e PADRÃO não dependem um do outro: rodam juntos e só se
+        # encontram onde o dado é usado (tipo de serviço do banco antes do matching; CTCs/pesos depois)
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="comparativo") as pool:
+            fut_db = pool.submit(_medir, "banco", self._fetch_db_enrichment, df_in)
+            fut_acordos = pool.submit(_medir, "acordos", self._carregar_acordos, acordos_xlsx_path)
+            fut_padrao = pool.submit(_medir, "padrao", self._carregar_padrao)
 
+            t_espera = time.perf_counter()
+            df_db = fut_db.result()
+            df_in = self._inject_service_type_from_db(df_in, df_db)
             try:
-                df_tarifa_veloz = processador.processar_servico_veloz()
-                df_tarifa_veloz["Fonte_Tarifa"] = "VELOZ"
+                df_tarifa_bases, df_tarifa_veloz = fut_acordos.result()
             except Exception as e:  # noqa: BLE001
-                print(f"Aviso: falha ao ler VELOZ: {e}")
-                df_tarifa_veloz = pd.DataFrame()
+                print(f"Erro ao processar a planilha de acordos: {e}")
+                df_in["Status"] = "ERRO"
+                df_in["Observacao"] = f"Não foi possível ler a planilha de acordos: {e}"
+                return self._finalize_dataframe(df_in)
+            df_tarifa_padrao = fut_padrao.result()
+            etapas["espera_paralelo"] = round(time.perf_counter() - t_espera, 3)
 
-            try:
-                df_tarifa_padrao = ProcessarTabelaLatam.processar_tabelas_padrao()
-                if not df_tarifa_padrao.empty:
-                    df_tarifa_padrao = df_tarifa_padrao.rename(columns={"Fonte_Arquivo": "Fonte_Tarifa"})
-            except Exception as e:  # noqa: BLE001
-                print(f"Aviso: falha ao ler PADRÃO: {e}")
-                df_tarifa_padrao = pd.DataFrame()
+        # Core
+        df_raw = _medir("matching", self._comparar_bloco, df_in, df_tarifa_bases, df_tarifa_veloz, df_tarifa_padrao, df_db)
+        df_export, df_display = _medir("finalizacao", self._finalize_dataframe, df_raw)
+        etapas["total"] = round(time.perf_counter() - t_inicio, 3)
 
-        except Exception as e:  # noqa: BLE001
-            print(f"Erro ao processar a planilha de acordos: {e}")
-            df_in["Status"] = "ERRO"
-            df_in["Observacao"] = f"Não foi possível ler a planilha de acordos: {e}"
-            return self._finalize_dataframe(df_in)
+        print(f"Comparativo LATAM ({len(df_in)} linhas) - etapas (s): {etapas}")
+        df_export.attrs["etapas"] = dict(etapas)
+        return df_export, df_display
 
-        # Core
-        df_raw = self._comparar_bloco(
-            df_fatura=df_in,
-            df_acordos=df_tarifa_bases,
-            df_veloz=df_tarifa_veloz,
-            df_padrao=df_tarifa_padrao,
+    def _carregar_acordos(self, acordos_xlsx_path: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """JUN E RES + PROXIMOVOO numa passada só pelo workbook, com cache em Parquet pelo hash da planilha."""
+        df_tarifa_bases, df_tarifa_veloz = ProcessarTabelaLatam.carregar_acordos(
+            acordos_xlsx_path, self.cfg.paths.CACHE_DIR / "tabelas" / "LATAM"
         )
-        return self._finalize_dataframe(df_raw)
+        df_tarifa_bases["Fonte_Tarifa"] = "JUN E RES"
+        df_tarifa_veloz["Fonte_Tarifa"] = "VELOZ"
+        return df_tarifa_bases, df_tarifa_veloz
+
+    def _carregar_padrao(self) -> pd.DataFrame:
+        """Tabelas PADRAO já consolidadas em memória (recarregadas em segundo plano)."""
+        try:
+            df_tarifa_padrao = get_padrao_store().dataframe()
+            if not df_tarifa_padrao.empty:
+                df_tarifa_padrao = df_tarifa_padrao.rename(columns={"Fonte_Arquivo": "Fonte_Tarifa"})
+            return df_tarifa_padrao
+        except Exception as e:  # noqa: BLE001
+            print(f"Aviso: falha ao ler PADRÃO: {e}")
+            return pd.DataFrame()
+
+    # ---------------------------------------------------------------------
+    # ALIASES: SAO (CGH/GRU/VCP na fatura, 'SAO PAULO' nas tabelas) e BR ('BRASIL')
+    # ---------------------------------------------------------------------
+    def _aliases_tabela(self) -> dict:
+        return {"SAO PAULO": self.SAO_IATA_ALIAS, "BRASIL": self.BR_IATA_ALIAS}
+
+    def _rota_fatura(self, df_fatura: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+        """Origem/Destino da fatura com os aeroportos de São Paulo trocados por SAO."""
+        sao = dict.fromkeys(self.SAO_IATAS, self.SAO_IATA_ALIAS)
+        return replace_category(df_fatura["Origem"], sao), replace_category(df_fatura["Destino"], sao)
 
     # ---------------------------------------------------------------------
     # MATCH: VELOZ (com faixas de peso e aliases SAO/BR)
@@ -196,86 +261,52 @@ class LatamFreightComparer:
         if df_fatura.empty or df_veloz_raw.empty:
             return pd.DataFrame()
 
-        # Normaliza fatura para aliases SAO
-        df_f = df_fatura.copy()
-        df_f["Origem"] = df_f["Origem"].replace(self.SAO_IATAS, self.SAO_IATA_ALIAS)
-        df_f["Destino"] = df_f["Destino"].replace(self.SAO_IATAS, self.SAO_IATA_ALIAS)
-
-        # Normaliza planilha veloz
+        # Normaliza planilha veloz (aliases SAO/BR entram na montagem do índice)
         df_v = df_veloz_raw.copy().rename(columns={"Tipo_Servico": "Tipo_Serviço"})
         if "Tipo_Serviço" in df_v.columns:
-            df_v["Tipo_Serviço"] = df_v["Tipo_Serviço"].apply(std_text)
+            df_v["Tipo_Serviço"] = map_category(df_v["Tipo_Serviço"], std_text)
         for col in ("Origem", "Destino"):
             if col in df_v.columns:
-                df_v[col] = df_v[col].astype(str).apply(std_text)
-                df_v[col] = df_v[col].replace("SAO PAULO", self.SAO_IATA_ALIAS)
-                df_v[col] = df_v[col].replace("BRASIL", self.BR_IATA_ALIAS)
-
-        # Estágios de match tratando BR
-        keys = ["Origem", "Destino", "Tipo_Serviço"]
-        s1 = pd.merge(df_f, df_v, on=keys, how="left")
-        s1_unmatched_ids = s1[s1["Data_Efetivacao_Tarifa"].isna()]["__ROW_ID__"]
-        f2 = df_f[df_f["__ROW_ID__"].isin(s1_unmatched_ids)].copy()
-
-        v_br_as_origem = df_v[df_v["Origem"] == self.BR_IATA_ALIAS].drop(columns="Origem")
-        s2 = pd.merge(f2, v_br_as_origem, on=["Destino", "Tipo_Serviço"], how="left")
-        s2_unmatched_ids = s2[s2["Data_Efetivacao_Tarifa"].isna()]["__ROW_ID__"]
-        f3 = f2[f2["__ROW_ID__"].isin(s2_unmatched_ids)].copy()
-
-        v_br_as_destino = df_v[df_v["Destino"] == self.BR_IATA_ALIAS].drop(columns="Destino")
-        s3 = pd.merge(f3, v_br_as_destino, on=["Origem", "Tipo_Serviço"], how="left")
-
-        got1 = s1[s1["Data_Efetivacao_Tarifa"].notna()]
-        got2 = s2[s2["Data_Efetivacao_Tarifa"].notna()]
-        got3 = s3[s3["Data_Efetivacao_Tarifa"].notna()]
-        all_found = pd.concat([got1, got2, got3], ignore_index=True)
-        if all_found.empty:
-            return pd.DataFrame()
+                df_v[col] = map_category(df_v[col], lambda v: std_text(str(v)))
 
-        # Escolha por data: passado mais recente ou futuro mais próximo
-        past = all_found[all_found["Data_Efetivacao_Tarifa"] <= all_found["Data"]].copy()
-        future = all_found[all_found["Data_Efetivacao_Tarifa"] > all_found["Data"]]
-        best_past = past.sort_values("Data_Efetivacao_Tarifa", ascending=False).drop_duplicates("__ROW_ID__", keep="first")
-        best_future = future.sort_values("Data_Efetivacao_Tarifa", ascending=True).drop_duplicates("__ROW_ID__", keep="first")
-        best = pd.concat([best_past, best_future]).drop_duplicates("__ROW_ID__", keep="first")
-        if best.empty:
+        # Estágios exato -> BR como origem -> BR como destino; por data: passado mais recente ou futuro mais próximo
+        indice = IndiceTarifasLatam(df_v, aliases=self._aliases_tabela(), curinga=self.BR_IATA_ALIAS)
+        origem, destino = self._rota_fatura(df_fatura)
+        linhas = indice.resolver(
+            origem, destino, df_fatura["Tipo_Serviço"], datas=df_fatura["Data"], regra="mais_proxima", usar_curinga=True
+        )
+        achou = linhas >= 0
+        if not achou.any():
             return pd.DataFrame()
 
-        # Mapa de faixas
-        raw_cols = [c for c in best.columns if isinstance(c, str) and pd.Series(c).str.match(r"^\d+(p\d+)?\+$").any()]
-        if not raw_cols:
+        # Faixas de peso: limites crescentes + matriz de tarifas, resolvidas por busca binária
+        faixas = FaixasPesoLatam(indice.tabela)
+        if not len(faixas):
             print("Aviso: VELOZ sem colunas de faixa de peso.")
             return pd.DataFrame()
 
-        weight_cols: list[tuple[float, str]] = []
-        for c in raw_cols:
-            try:
-                weight_cols.append((float(c.replace("p", ".").replace("+", "")), c))
-            except ValueError:
-                pass
-        weight_cols.sort(key=lambda x: x[0], reverse=True)
-
-        def _pick_veloz_tariff(row: pd.Series) -> pd.Series:
-            peso = row.get("Peso Taxado")
-            out_idx = ["Valor_Tarifa_Acordo", "Faixa_Peso_Usada", "__Status_Veloz"]
-            if pd.isna(peso):
-                return pd.Series([np.nan, np.nan, np.nan], index=out_idx)
-            if peso > 30:  # regra informada pelo usuário
-                return pd.Series([np.nan, np.nan, "PESO EXCEDENTE"], index=out_idx)
-            for lim, col_name in weight_cols:
-                if peso >= lim:
-                    return pd.Series([row[col_name], col_name, np.nan], index=out_idx)
-            return pd.Series([np.nan, np.nan, "FAIXA NAO LOCALIZADA"], index=out_idx)
-
-        details = best.apply(_pick_veloz_tariff, axis=1)
-        best["Valor_Tarifa_Acordo"] = details["Valor_Tarifa_Acordo"]
-        best["Faixa_Peso_Usada"] = details["Faixa_Peso_Usada"]
-        best["__Status_Veloz"] = details["__Status_Veloz"]
-
-        keep = ["__ROW_ID__", "Valor_Tarifa_Acordo", "Faixa_Peso_Usada", "Data_Efetivacao_Tarifa", "Fonte_Tarifa", "__Status_Veloz"]
-        if "Frete_Minimo" in best.columns:
+        linhas = linhas[achou]
+        if "Peso Taxado" in df_fatura.columns:
+            peso = pd.to_numeric(df_fatura["Peso Taxado"], errors="coerce").to_numpy(dtype=np.float64)[achou]
+        else:
+            peso = np.full(len(linhas), np.nan)
+        excedente = peso > self.PESO_MAX_VELOZ
+        col = np.where(excedente, -1, faixas.faixa(peso))
+        status = np.full(len(linhas), np.nan, dtype=object)
+        status[excedente] = "PESO EXCEDENTE"
+        status[~np.isnan(peso) & ~excedente & (col < 0)] = "FAIXA NAO LOCALIZADA"
+
+        keep = ["Data_Efetivacao_Tarifa", "Fonte_Tarifa"]
+        if "Frete_Minimo" in indice.tabela.columns:
             keep.append("Frete_Minimo")
-        return best[keep].copy()
+        best = indice.tabela.iloc[linhas][keep].reset_index(drop=True)
+        best["__ROW_ID__"] = df_fatura["__ROW_ID__"].to_numpy()[achou]
+        best["Valor_Tarifa_Acordo"] = faixas.tarifas(linhas, col)
+        best["Faixa_Peso_Usada"] = np.where(col >= 0, np.array(faixas.colunas, dtype=object)[col], np.nan)
+        best["__Status_Veloz"] = status
+
+        cols = ["__ROW_ID__", "Valor_Tarifa_Acordo", "Faixa_Peso_Usada", "Data_Efetivacao_Tarifa", "Fonte_Tarifa", "__Status_Veloz"] + keep[2:]
+        return best[cols].drop_duplicates("__ROW_ID__", keep="first")
 
     # ---------------------------------------------------------------------
     # MATCH: PADRÃO (sem data e sem faixas; usa aliases SAO/BR)
@@ -284,43 +315,91 @@ class LatamFreightComparer:
         if df_fatura.empty or df_padrao_raw.empty:
             return pd.DataFrame()
 
-        df_f = df_fatura.copy()
-        df_f["Origem"] = df_f["Origem"].replace(self.SAO_IATAS, self.SAO_IATA_ALIAS)
-        df_f["Destino"] = df_f["Destino"].replace(self.SAO_IATAS, self.SAO_IATA_ALIAS)
-
         df_p = df_padrao_raw.copy().rename(columns={"Tipo_Servico": "Tipo_Serviço", "Valor_Tarifa": "Valor_Tarifa_Acordo"})
         if "Tipo_Serviço" in df_p.columns:
-            df_p["Tipo_Serviço"] = df_p["Tipo_Serviço"].apply(std_text)
+            df_p["Tipo_Serviço"] = map_category(df_p["Tipo_Serviço"], std_text)
         for col in ("Origem", "Destino"):
             if col in df_p.columns:
-                df_p[col] = df_p[col].astype(str).replace("SAO PAULO", self.SAO_IATA_ALIAS).replace("BRASIL", self.BR_IATA_ALIAS)
-
-        keys = ["Origem", "Destino", "Tipo_Serviço"]
-        s1 = pd.merge(df_f, df_p, on=keys, how="left")
-        s1_unmatched_ids = s1[s1["Fonte_Tarifa"].isna()]["__ROW_ID__"]
-        f2 = df_f[df_f["__ROW_ID__"].isin(s1_unmatched_ids)].copy()
-
-        p_br_as_origem = df_p[df_p["Origem"] == self.BR_IATA_ALIAS].drop(columns="Origem")
-        s2 = pd.merge(f2, p_br_as_origem, on=["Destino", "Tipo_Serviço"], how="left")
-        s2_unmatched_ids = s2[s2["Fonte_Tarifa"].isna()]["__ROW_ID__"]
-        f3 = f2[f2["__ROW_ID__"].isin(s2_unmatched_ids)].copy()
-
-        p_br_as_destino = df_p[df_p["Destino"] == self.BR_IATA_ALIAS].drop(columns="Destino")
-        s3 = pd.merge(f3, p_br_as_destino, on=["Origem", "Tipo_Serviço"], how="left")
-
-        got1 = s1[s1["Fonte_Tarifa"].notna()]
-        got2 = s2[s2["Fonte_Tarifa"].notna()]
-        got3 = s3[s3["Fonte_Tarifa"].notna()]
-        all_found = pd.concat([got1, got2, got3], ignore_index=True)
-        if all_found.empty:
+                df_p[col] = map_category(df_p[col], str)
+
+        # Estágios exato -> BR como origem -> BR como destino; vale a 1ª linha da tabela
+        indice = IndiceTarifasLatam(df_p, aliases=self._aliases_tabela(), curinga=self.BR_IATA_ALIAS)
+        origem, destino = self._rota_fatura(df_fatura)
+        linhas = indice.resolver(origem, destino, df_fatura["Tipo_Serviço"], regra="primeira", usar_curinga=True)
+        achou = linhas >= 0
+        if not achou.any():
             return pd.DataFrame()
 
-        best = all_found.drop_duplicates("__ROW_ID__", keep="first")
+        best = indice.tabela.iloc[linhas[achou]].reset_index(drop=True)
+        best["__ROW_ID__"] = df_fatura["__ROW_ID__"].to_numpy()[achou]
+        best = best.drop_duplicates("__ROW_ID__", keep="first")
         keep = ["__ROW_ID__", "Valor_Tarifa_Acordo", "Fonte_Tarifa"]
         if "Frete_Minimo" in best.columns:
             keep.append("Frete_Minimo")
         return best[keep].copy()
 
+    # ---------------------------------------------------------------------
+    # MATCH: JUN/RES (ida; sem tarifa de ida, tenta a volta como devolução)
+    # ---------------------------------------------------------------------
+    def _match_jun_res(self, df: pd.DataFrame, df_acordos: pd.DataFrame) -> pd.DataFrame:
+        df_a = df_acordos.copy().rename(columns={"Tipo_Servico": "Tipo_Serviço", "Valor_Tarifa": "Valor_Tarifa_Acordo"})
+        for col in ("Origem", "Destino", "Tipo_Serviço"):
+            if col in df_a.columns:
+                df_a[col] = map_category(df_a[col], std_text)
+        cols = [c for c in df_a.columns if c not in df.columns] + ["__EH_DEV__"]
+        if df.empty or df_a.empty:
+            return pd.DataFrame(columns=["__ROW_ID__"] + cols)
+
+        # Vigente mais recente (<= Data); sem vigente, a futura mais próxima
+        indice = IndiceTarifasLatam(df_a)
+        origem, destino, tipo = df["Origem"], df["Destino"], df["Tipo_Serviço"]
+        ida = indice.resolver(origem, destino, tipo, datas=df["Data"], regra="mais_proxima")
+        volta = np.full(len(df), -1, dtype=np.int64)
+        sem_ida = ida < 0
+        if sem_ida.any():
+            volta[sem_ida] = indice.resolver(
+                destino[sem_ida], origem[sem_ida], tipo[sem_ida], datas=df["Data"][sem_ida], regra="mais_proxima"
+            )
+
+        # Ida primeiro, depois as devoluções (mesma ordem dos merges antigos)
+        pos = np.concatenate([np.flatnonzero(ida >= 0), np.flatnonzero(volta >= 0)])
+        linhas = np.where(ida >= 0, ida, volta)[pos]
+        out = indice.tabela.iloc[linhas][[c for c in cols if c != "__EH_DEV__"]].reset_index(drop=True)
+        out.insert(0, "__ROW_ID__", df["__ROW_ID__"].to_numpy()[pos])
+        out["__EH_DEV__"] = sem_ida[pos]
+        return out.drop_duplicates("__ROW_ID__", keep="first")
+
+    # ---------------------------------------------------------------------
+    # FALLBACKS: JUN/RES -> VELOZ -> PADRÃO (cada etapa só vê quem ficou sem tarifa)
+    # ---------------------------------------------------------------------
+    def _resolver_tarifas(
+        self,
+        df: pd.DataFrame,
+        df_acordos: pd.DataFrame,
+        df_veloz: pd.DataFrame,
+        df_padrao: pd.DataFrame,
+    ) -> pd.DataFrame:
+        """Uma linha por __ROW_ID__ com tarifa: colunas da tabela escolhida + auxiliares (__EH_DEV__ etc.)."""
+        jun_res_matches = self._match_jun_res(df, df_acordos)
+
+        need_veloz = df[~df["__ROW_ID__"].isin(jun_res_matches["__ROW_ID__"])]
+        veloz_matches = self._match_veloz(need_veloz, df_veloz) if (not need_veloz.empty and not df_veloz.empty) else pd.DataFrame()
+        matched = pd.concat([jun_res_matches["__ROW_ID__"], veloz_matches.get("__ROW_ID__", pd.Series(dtype=np.int64))])
+
+        need_padrao = df[~df["__ROW_ID__"].isin(matched)]
+        padrao_matches = self._match_padrao(need_padrao, df_padrao) if (not need_padrao.empty and not df_padrao.empty) else pd.DataFrame()
+
+        # Colunas sempre presentes (mesmo sem nenhum match VELOZ), na ordem de antes
+        cols = list(jun_res_matches.columns)
+        for c in ("Valor_Tarifa_Acordo", "Faixa_Peso_Usada", "Data_Efetivacao_Tarifa", "Fonte_Tarifa",
+                  "__Status_Veloz", "Frete_Minimo", *veloz_matches.columns, *padrao_matches.columns):
+            if c not in cols:
+                cols.append(c)
+        partes = [m for m in (jun_res_matches, veloz_matches, padrao_matches) if not m.empty]
+        if not partes:
+            return pd.DataFrame(columns=cols)
+        return pd.concat(partes, ignore_index=True).reindex(columns=cols)
+
     # ---------------------------------------------------------------------
     # CORE: merge principal + fallbacks + cálculos finais
     # ---------------------------------------------------------------------
@@ -330,76 +409,32 @@ class LatamFreightComparer:
         df_acordos: pd.DataFrame,
         df_veloz: pd.DataFrame,
         df_padrao: pd.DataFrame,
+        df_db: pd.DataFrame,
     ) -> pd.DataFrame:
         if df_fatura.empty:
             return df_fatura
 
         df = df_fatura.copy()
 
-        # Normalização mínima
+        # Normalização mínima (chaves como category: std_text roda uma vez por valor distinto)
         if "Data" in df.columns:
             df["Data"] = pd.to_datetime(df["Data"], errors="coerce", dayfirst=True)
         for col in ("Origem", "Destino", "Tipo_Serviço"):
             if col in df.columns:
-                df[col] = df[col].apply(std_text)
-
-        # Prepara acordos base
-        df_a = df_acordos.copy().rename(columns={"Tipo_Servico": "Tipo_Serviço", "Valor_Tarifa": "Valor_Tarifa_Acordo"})
-        for col in ("Origem", "Destino", "Tipo_Serviço"):
-            if col in df_a.columns:
-                df_a[col] = df_a[col].apply(std_text)
-
-        # Etapa 1: JUN/RES (ida e fallback de volta)
-        ida = pd.merge(df, df_a, on=["Origem", "Destino", "Tipo_Serviço"], how="left")
-        ida_past = ida[ida["Data_Efetivacao_Tarifa"] <= ida["Data"]].copy()
-        ida_future = ida[ida["Data_Efetivacao_Tarifa"] > ida["Data"]]
-        ida_best_past = ida_past.drop_duplicates("__ROW_ID__", keep="first")
-        ida_best_future = ida_future.drop_duplicates("__ROW_ID__", keep="first")
-        ida_best = pd.concat([ida_best_past, ida_best_future]).drop_duplicates("__ROW_ID__", keep="first")
-        ida_best["__EH_DEV__"] = False
-
-        still_unmatched = df[~df["__ROW_ID__"].isin(ida_best["__ROW_ID__"])]
-        if not still_unmatched.empty:
-            volta = pd.merge(
-                still_unmatched,
-                df_a,
-                left_on=["Destino", "Origem", "Tipo_Serviço"],
-                right_on=["Origem", "Destino", "Tipo_Serviço"],
-                how="left",
-            )
-            volta_past = volta[volta["Data_Efetivacao_Tarifa"] <= volta["Data"]].copy()
-            volta_future = volta[volta["Data_Efetivacao_Tarifa"] > volta["Data"]]
-            volta_best_past = volta_past.drop_duplicates("__ROW_ID__", keep="first")
-            volta_best_future = volta_future.drop_duplicates("__ROW_ID__", keep="first")
-            volta_best = pd.concat([volta_best_past, volta_best_future]).drop_duplicates("__ROW_ID__", keep="first")
-            volta_best["__EH_DEV__"] = True
-            jun_res_matches = pd.concat([ida_best, volta_best])
-        else:
-            jun_res_matches = ida_best
+                df[col] = map_category(df[col], std_text)
 
-        # Etapa 2: VELOZ fallback
-        matched_ids_s1 = jun_res_matches["__ROW_ID__"]
-        need_veloz = df[~df["__ROW_ID__"].isin(matched_ids_s1)].copy()
-        veloz_matches = self._match_veloz(need_veloz, df_veloz) if (not need_veloz.empty and not df_veloz.empty) else pd.DataFrame()
-        s1_s2 = pd.concat([jun_res_matches, veloz_matches])
-
-        # Etapa 3: PADRÃO fallback
-        matched_ids_s2 = s1_s2["__ROW_ID__"]
-        need_padrao = df[~df["__ROW_ID__"].isin(matched_ids_s2)].copy()
-        padrao_matches = self._match_padrao(need_padrao, df_padrao) if (not need_padrao.empty and not df_padrao.empty) else pd.DataFrame()
-        all_matches = pd.concat([s1_s2, padrao_matches])
+        # Etapas JUN/RES (ida e volta) -> VELOZ -> PADRÃO, resolvidas pelos índices de rota
+        all_matches = self._resolver_tarifas(df, df_acordos, df_veloz, df_padrao)
 
         # Merge final (traz __Status_Veloz e Faixa_Peso_Usada quando houver)
         cols_add = [c for c in all_matches.columns if c not in df.columns or c == "__ROW_ID__"]
         out = pd.merge(df, all_matches[cols_add], on="__ROW_ID__", how="left")
 
-        # Enriquecimento com DB
-        df_ctc = get_ctcs(out["Documento"].astype(str).dropna().unique().tolist())
-        df_ctc_peso = get_ctc_peso(out["Documento"].astype(str).dropna().unique().tolist())
-        if not df_ctc.empty:
-            out = pd.merge(out, df_ctc, on="Documento", how="left")
-        if not df_ctc_peso.empty:
-            out = pd.merge(out, df_ctc_peso, on="Documento", how="left")
+        # Enriquecimento com DB (já buscado junto com o tipo de serviço)
+        db_cols = [c for chave, cols in self.DB_COLS_CTC.items()
+                   if not df_db.empty and df_db[chave].notna().any() for c in cols]
+        if db_cols:
+            out = pd.merge(out, df_db[["Documento", *db_cols]], on="Documento", how="left")
 
         # Tipagem numérica
         cols_num_convert = [
@@ -459,6 +494,10 @@ class LatamFreightComparer:
             ),
         )
 
+        # Status e fonte da tarifa como category (status com vocabulário fixo)
+        out["Status"] = as_category(out["Status"], STATUS_VOCAB)
+        out["Fonte_Tarifa"] = as_category(out["Fonte_Tarifa"])
+
         # Limpeza de auxiliares
         out = out.drop(columns=["__EH_DEV__", "Faixa_Peso_Usada", "__Status_Veloz"], errors="ignore")
         return out.reset_index(drop=True)
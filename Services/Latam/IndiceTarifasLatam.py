@@ -0,0 +1,213 @@
+# C:\Programs\Aéreo-Comparativos\Services\Latam\IndiceTarifasLatam.py
+
+from __future__ import annotations
+import re
+from typing import Dict, Sequence
+import numpy as np
+import pandas as pd
+
+from Utils.Category_Helpers import replace_category
+
+
+class _GruposChave:
+    """
+    Linhas de uma tabela agrupadas por chave. Guarda a 1ª linha de cada chave (ordem da tabela)
+    e, quando há datas, as vigências ordenadas por (chave, data) para busca binária.
+    """
+
+    def __init__(self, chaves: Sequence[np.ndarray], linhas: np.ndarray, datas: np.ndarray | None = None):
+        linhas = np.asarray(linhas, dtype=np.int64)
+        self.chaves = None
+        self.primeira = self._vig_chave = np.zeros(0, dtype=np.int64)
+        if not len(linhas):
+            return
+        mi = pd.MultiIndex.from_arrays([np.asarray(k, dtype=object)[linhas] for k in chaves])
+        codes, self.chaves = mi.factorize()
+        inicio = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(self.chaves)))])
+        self.primeira = linhas[np.argsort(codes, kind="stable")][inicio[:-1]]
+        if datas is not None:
+            self._indexar_vigencias(codes, linhas, datas[linhas])
+
+    def _indexar_vigencias(self, codes: np.ndarray, linhas: np.ndarray, datas: np.ndarray) -> None:
+        # Cada data vira o seu posto (1..K) entre as datas distintas da tabela; a chave composta
+        # grupo * (K + 1) + posto cabe em int64 e ordena por rota e depois por data.
+        ok = ~np.isnat(datas)
+        self._datas = np.unique(datas[ok])
+        self._passo = len(self._datas) + 1
+        chave = codes[ok] * self._passo + np.searchsorted(self._datas, datas[ok]) + 1
+        ordem = np.lexsort((linhas[ok], chave))  # empate de data: ordem da tabela
+        self._vig_chave = chave[ordem]
+        self._vig_linha = linhas[ok][ordem]
+        # posição do início de cada sequência de mesma (rota, data)
+        pos = np.arange(len(ordem))
+        novo = np.concatenate([[True], self._vig_chave[1:] != self._vig_chave[:-1]])
+        self._vig_inicio = np.maximum.accumulate(np.where(novo, pos, 0)) if len(pos) else pos
+
+    def grupo(self, chaves: Sequence[np.ndarray]) -> np.ndarray:
+        """Código da chave de cada consulta (-1 = chave inexistente)."""
+        n = len(chaves[0])
+        if self.chaves is None or n == 0:
+            return np.full(n, -1, dtype=np.int64)
+        return self.chaves.get_indexer(pd.MultiIndex.from_arrays([np.asarray(k, dtype=object) for k in chaves]))
+
+    def mais_proxima(self, grupo: np.ndarray, datas: np.ndarray) -> np.ndarray:
+        """
+        Vigência mais recente com data <= consulta; sem nenhuma, a futura mais próxima
+        (-1 = sem data em nenhum dos lados). Uma busca binária por consulta.
+        """
+        out = np.full(len(grupo), -1, dtype=np.int64)
+        ok = ~np.isnat(datas)
+        if not ok.any() or not len(self._vig_chave):
+            return out
+        g = grupo[ok]
+        alvo = g * self._passo + np.searchsorted(self._datas, datas[ok], side="right")
+        pos = np.searchsorted(self._vig_chave, alvo, side="right")
+        n = len(self._vig_chave)
+
+        ant = np.clip(pos - 1, 0, n - 1)
+        tem_passado = (pos > 0) & (self._vig_chave[ant] // self._passo == g)
+        prox = np.clip(pos, 0, n - 1)
+        tem_futuro = (pos < n) & (self._vig_chave[prox] // self._passo == g)
+        out[ok] = np.where(
+            tem_passado,
+            self._vig_linha[self._vig_inicio[ant]],
+            np.where(tem_futuro, self._vig_linha[prox], -1),
+        )
+        return out
+
+
+def _como_datas(valores) -> np.ndarray:
+    """datetime64[ns] (NaT onde não for data)."""
+    return pd.Series(pd.to_datetime(pd.Series(valores).to_numpy(), errors="coerce")).to_numpy(dtype="datetime64[ns]")
+
+
+class IndiceTarifasLatam:
+    """
+    Índice de uma tabela de tarifas por (Origem, Destino, Tipo_Serviço), montado uma vez por tabela.
+
+    Os aliases da tabela (ex.: 'SAO PAULO' -> 'SAO', 'BRASIL' -> 'BR') são aplicados na montagem,
+    e as linhas com a origem ou o destino curinga ('BR') ganham índices próprios por
+    (Destino, Tipo) e (Origem, Tipo). A vigência é resolvida como um merge_asof por rota: as datas
+    ficam ordenadas por rota e cada consulta faz uma busca binária — memória linear em
+    linhas da fatura + linhas da tabela, sem o produto cartesiano rota x vigências.
+
+    Exemplo:
+        idx = IndiceTarifasLatam(df_veloz, aliases={"SAO PAULO": "SAO", "BRASIL": "BR"}, curinga="BR")
+        linhas = idx.resolver(origem, destino, tipo, datas=df["Data"], regra="mais_proxima", usar_curinga=True)
+        # linhas[i] = posição em idx.tabela escolhida para a consulta i (-1 = sem tarifa)
+    """
+
+    REGRAS = ("primeira", "mais_proxima")
+
+    def __init__(
+        self,
+        tabela: pd.DataFrame,
+        aliases: Dict[str, str] | None = None,
+        curinga: str | None = None,
+        col_data: str = "Data_Efetivacao_Tarifa",
+    ):
+        """
+        Args:
+            tabela (pd.DataFrame): Tarifas com 'Origem', 'Destino' e 'Tipo_Serviço' já padronizados.
+            aliases (dict): Troca de valores exatos em Origem/Destino feita na montagem.
+            curinga (str): Origem/Destino que vale para qualquer aeroporto (ex.: 'BR').
+            col_data (str): Coluna de vigência usada pela regra 'mais_proxima'.
+        """
+        self.tabela = tabela.reset_index(drop=True)
+        if aliases:
+            for col in ("Origem", "Destino"):
+                self.tabela[col] = replace_category(self.tabela[col], aliases)
+        origem = self.tabela["Origem"].to_numpy(dtype=object)
+        destino = self.tabela["Destino"].to_numpy(dtype=object)
+        tipo = self.tabela["Tipo_Serviço"].to_numpy(dtype=object)
+        datas = _como_datas(self.tabela[col_data]) if col_data in self.tabela.columns else None
+        self._com_datas = datas is not None
+
+        # Estágios de busca: (índice, quais chaves da consulta usar)
+        todas = np.arange(len(self.tabela))
+        self._estagios = [(_GruposChave([origem, destino, tipo], todas, datas), (0, 1, 2))]
+        if curinga is not None:
+            self._estagios += [
+                (_GruposChave([destino, tipo], np.flatnonzero(origem == curinga), datas), (1, 2)),
+                (_GruposChave([origem, tipo], np.flatnonzero(destino == curinga), datas), (0, 2)),
+            ]
+
+    def __len__(self) -> int:
+        return len(self.tabela)
+
+    def resolver(self, origem, destino, tipo, datas=None, regra: str = "primeira",
+                 usar_curinga: bool = False) -> np.ndarray:
+        """
+        Linha da tabela escolhida para cada consulta (-1 = sem tarifa).
+
+        Com `usar_curinga`, quem não tem a rota exata procura com o curinga na origem e, se
+        ainda faltar, com o curinga no destino (vale o 1º estágio em que a rota existe).
+
+        Regras:
+            - 'primeira': 1ª linha da rota na ordem da tabela (sem data).
+            - 'mais_proxima': vigente mais recente (data da tarifa <= data da consulta); sem
+              vigente, a futura mais próxima. Empates de data ficam na ordem da tabela.
+              Consultas ou tarifas sem data nunca casam.
+        """
+        if regra not in self.REGRAS:
+            raise ValueError(f"Regra desconhecida: {regra!r}. Use uma de {self.REGRAS}.")
+        if regra == "mais_proxima" and not self._com_datas:
+            raise ValueError("Tabela sem coluna de vigência para a regra 'mais_proxima'.")
+
+        consulta = [np.asarray(a, dtype=object) for a in (origem, destino, tipo)]
+        n = len(consulta[0])
+        datas_consulta = _como_datas(datas) if regra == "mais_proxima" else None
+        out = np.full(n, -1, dtype=np.int64)
+        falta = np.arange(n)
+        for grupos, usar in self._estagios[: 3 if usar_curinga else 1]:
+            if not len(falta):
+                break
+            g = grupos.grupo([consulta[i][falta] for i in usar])
+            tem = g >= 0
+            sel, g = falta[tem], g[tem]
+            if regra == "primeira":
+                out[sel] = grupos.primeira[g]
+            else:
+                out[sel] = grupos.mais_proxima(g, datas_consulta[sel])
+            falta = falta[~tem]
+        return out
+
+
+class FaixasPesoLatam:
+    """
+    Faixas de peso de uma tabela (colunas '0+', '0p5+', '10+'...) em forma de arrays: limites em
+    ordem crescente e a matriz de tarifas (linha da tabela x faixa). Cada peso acha a sua faixa
+    (maior limite <= peso) com np.searchsorted.
+
+    Exemplo:
+        faixas = FaixasPesoLatam(idx.tabela)
+        col = faixas.faixa(pesos)                 # -1 = abaixo da 1ª faixa ou peso nulo
+        valores = faixas.tarifas(linhas, col)     # NaN onde col == -1
+    """
+
+    COLUNA_FAIXA = re.compile(r"^\d+(p\d+)?\+$")
+
+    def __init__(self, tabela: pd.DataFrame):
+        cols = [c for c in tabela.columns if isinstance(c, str) and self.COLUNA_FAIXA.match(c)]
+        limites = np.array([float(c.replace("p", ".").replace("+", "")) for c in cols], dtype=np.float64)
+        # limites repetidos ('1+' e '1p0+'): vale a 1ª coluna da planilha
+        self.limites, primeira = np.unique(limites, return_index=True)
+        self.colunas = [cols[i] for i in primeira]
+        self.matriz = tabela[self.colunas].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def __len__(self) -> int:
+        return len(self.colunas)
+
+    def faixa(self, pesos) -> np.ndarray:
+        """Posição da faixa de cada peso em `colunas` (-1 = sem faixa)."""
+        pesos = np.asarray(pesos, dtype=np.float64)
+        col = np.searchsorted(self.limites, pesos, side="right") - 1
+        col[np.isnan(pesos)] = -1
+        return col
+
+    def tarifas(self, linhas: np.ndarray, col: np.ndarray) -> np.ndarray:
+        """Tarifa da faixa `col` na linha `linhas` da tabela (NaN sem faixa)."""
+        out = np.full(len(col), np.nan)
+        ok = col >= 0
+        out[ok] = self.matriz[np.asarray(linhas)[ok], col[ok]]
+        return out
@@ -8,6 +8,9 @@ from Routes import ComparadorFretes, Main, KPI_Map
 from Config import Appconfig, Paths
 from Routes import HistoricoDocs
 from Utils.Files import ensure_dirs
+from Db import pool_stats
+from Repositories.Repositorio_TabelasFretesLatam import get_padrao_store
+from Repositories.Repositorio_CacheEnriquecimento import get_enriquecimento_cache
 import locale
 import numpy as np # Necessário para checar np.isnan
 
@@ -73,7 +76,17 @@ def create_app() -> Flask:
         CACHE_DIR=base_data_dir / "Cache",
     )
     ensure_dirs(paths.UPLOAD_DIR, paths.OUTPUT_DIR, paths.CACHE_DIR)
-    app.config["APP_CFG"] = Appconfig(paths=paths)
+    app_cfg = Appconfig(paths=paths)
+    app.config["APP_CFG"] = app_cfg
+
+    # Cache de enriquecimento do banco na pasta de cache do app
+    get_enriquecimento_cache(app_cfg.paths.CACHE_DIR)
+
+    # Tabelas PADRAO LATAM: carrega já na subida e recarrega em segundo plano quando mudarem
+    try:
+        get_padrao_store().start(app_cfg.tarifas.PADRAO_POLL_S)
+    except Exception as e:  # noqa: BLE001
+        print(f"Aviso: não foi possível pré-carregar as tabelas PADRAO: {e}")
 
     # Blueprints sob o mesmo prefixo
     app.register_blueprint(Main.bp, url_prefix=f"{BASE_PREFIX}/")
@@ -81,10 +94,14 @@ def create_app() -> Flask:
     app.register_blueprint(KPI_Map.bp, url_prefix=f"{BASE_PREFIX}/kpi") 
     app.register_blueprint(HistoricoDocs.bp, url_prefix=f"{BASE_PREFIX}/historico")
 
-    # Health no prefixo (facilita teste via Nginx)
+    # Health no prefixo (facilita teste via Nginx); inclui o pool do banco e o cache de enriquecimento
     @app.get(f"{BASE_PREFIX}/healthz")
     def healthz():
-        return {"status": "ok"}, 200
+        return {
+            "status": "ok",
+            "db_pool": pool_stats(),
+            "enriquecimento_cache": get_enriquecimento_cache().estatisticas(),
+        }, 200
 
     return app
 
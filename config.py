@@ -1,5 +1,6 @@
 # config.py
 from __future__ import annotations
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List
@@ -31,6 +32,16 @@ class IOconfig:
     ALLOWED_PDF_EXTS: List[str] = field(default_factory=lambda: [".pdf"])
     ALLOWED_EXCEL_EXTS: List[str] = field(default_factory=lambda: [".xlsx"])
 
+@dataclass(frozen=True)
+class Extractionconfig:
+    # processos para extrair PDFs de um batch / fatias de páginas de um PDF (1 = serial)
+    MAX_WORKERS: int = field(default_factory=lambda: min(4, os.cpu_count() or 1))
+
+@dataclass(frozen=True)
+class Tarifasconfig:
+    # segundos entre verificações da pasta PADRAO (0 = só carrega na subida, sem recarga automática)
+    PADRAO_POLL_S: float = field(default_factory=lambda: float(os.getenv("PADRAO_POLL_S", "60")))
+
 @dataclass(frozen=True)
 class Tuning:
     TOLERANCIA_PCT_DEFAULT: float = 1.0   # ±1.00%
@@ -43,3 +54,5 @@ class Appconfig:
     Services: Servicesconfig = Servicesconfig()
     io: IOconfig = IOconfig()
     tuning: Tuning = Tuning()
+    extraction: Extractionconfig = Extractionconfig()
+    tarifas: Tarifasconfig = Tarifasconfig()
@@ -4,6 +4,9 @@ from __future__ import annotations
 import re
 import json
 import uuid
+import shutil
+import hashlib
+import inspect
 from pathlib import Path
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -17,13 +20,22 @@ from flask import (
 
 from Config import Appconfig
 from Utils.Files import ensure_dirs, allowed_file
+from Utils.Parallel_Helpers import map_ordered
+from Utils.Cache_Helpers import ContentCache, file_sha256, source_version
+from Utils.Category_Helpers import categorize, concat_categorical
 
 # Importa fill_numeric_nans_with_zero do novo local (Utils.DataFrame_Helpers)
 from Utils.DataFrame_Helpers import fill_numeric_nans_with_zero
 
 # Importa o extrator
-from Repositories.Repositorio_FaturaLatam import extract_invoice_table as extract_invoice_table_latam
-from Services.Latam.ComparativoLatam import LatamFreightComparer 
+from Repositories.Repositorio_FaturaLatam import (
+    extract_invoice_table as extract_invoice_table_latam,
+    EXTRACTOR_VERSION as EXTRACTOR_VERSION_LATAM,
+)
+from Services.Latam.ComparativoLatam import (
+    LatamFreightComparer,
+    COMPARATOR_VERSION as COMPARATOR_VERSION_LATAM,
+)
 from Services.Latam.Latam_Metrics import LatamMetricsCalculator
 
 bp = Blueprint("fatura", __name__, template_folder="../Templates")
@@ -31,8 +43,10 @@ bp = Blueprint("fatura", __name__, template_folder="../Templates")
 # Dicionário de Serviços para centralizar a lógica por companhia
 COMPARISON_SERVICES = {
     'LATAM': {
-        'extractor': extract_invoice_table_latam,
+        'extractor': extract_invoice_table_latam, # extractor(pdf_path, page_workers, cache_dir) -> DataFrame
+        'extractor_version': EXTRACTOR_VERSION_LATAM, # chave do cache por conteúdo (SHA-256 do PDF)
         'comparator': LatamFreightComparer, # Classe armazenada
+        'comparator_version': COMPARATOR_VERSION_LATAM, # chave do cache de resultados (com batch, planilha e PADRÃO)
     },
     # 'AZUL': { # Futuramente, você adicionará a lógica da AZUL aqui
     #     'extractor': extract_invoice_table_azul,
@@ -40,6 +54,11 @@ COMPARISON_SERVICES = {
     # }
 }
 
+# Versão da etapa de saída (métricas + planilhas Excel) guardada no cache de resultados
+RESULTS_VERSION = source_version(
+    "resultados-1", __file__, inspect.getfile(LatamMetricsCalculator), inspect.getfile(fill_numeric_nans_with_zero)
+)
+
 # ---------------- Helpers ----------------
 
 def _now_stamp() -> str:
@@ -72,22 +91,21 @@ def _file_size_mb(filestorage) -> float:
     except Exception:
         return 0
 
-def _process_and_cache_pdf(pdf_path: Path, file_id: str, company: str, source_name: str | None = None) -> pd.DataFrame | None:
+def _cache_extracted_pdf(df_pdf: pd.DataFrame | None, error: Exception | None, pdf_path: Path,
+                         file_id: str, company: str, source_name: str | None = None) -> pd.DataFrame | None:
     app_cfg: Appconfig = current_app.config["APP_CFG"]
-    service = COMPARISON_SERVICES.get(company)
-    if not service or 'extractor' not in service:
-        flash(f"Companhia '{company}' não configurada para extração.")
+    if error is not None:
+        flash(f"Erro ao processar {pdf_path.name}: {error}")
         return None
-    
-    extractor_func = service['extractor']
     try:
-        df_pdf = extractor_func(str(pdf_path))
         if df_pdf is None or df_pdf.empty:
             flash(f"Nenhuma tabela encontrada em: {pdf_path.name} (Extrator: {company}).")
             return None
         if "__source_pdf" not in df_pdf.columns:
             df_pdf["__source_pdf"] = source_name or pdf_path.name
-        
+        # Rotas e tipo de serviço como category já na ingestão (feather em códigos + dicionário)
+        df_pdf = categorize(df_pdf)
+
         cache_path = app_cfg.paths.CACHE_DIR / f"{file_id}.feather"
         df_pdf.to_feather(cache_path)
         return df_pdf
@@ -95,6 +113,81 @@ def _process_and_cache_pdf(pdf_path: Path, file_id: str, company: str, source_na
         flash(f"Erro ao processar {pdf_path.name}: {e}")
         return None
 
+def _extraction_cache(company: str) -> ContentCache:
+    app_cfg: Appconfig = current_app.config["APP_CFG"]
+    service = COMPARISON_SERVICES[company]
+    return ContentCache(app_cfg.paths.CACHE_DIR / "extracao" / company, service.get('extractor_version', 'v0'))
+
+def _process_and_cache_pdfs(jobs: list[tuple[Path, str, str | None]], company: str) -> list[tuple[pd.DataFrame | None, str | None]]:
+    """
+    Extrai os PDFs de um batch em paralelo (pool de processos) e grava o cache de cada um.
+    `jobs` é uma lista de (pdf_path, file_id, source_name); o retorno segue a MESMA ordem,
+    com (DataFrame, sha256) por arquivo e DataFrame None nas posições que falharam
+    (o erro já foi reportado via flash).
+
+    PDFs idênticos a um já processado (mesmo SHA-256 e mesma versão do extrator) saem
+    direto do cache por conteúdo, sem passar pelo Camelot/pdfplumber. Nos demais, o extrator
+    guarda as tabelas brutas por página na mesma entrada, então uma nova tentativa após
+    falha/timeout (ou após mudar só o pós-processamento) retoma de onde parou.
+    """
+    app_cfg: Appconfig = current_app.config["APP_CFG"]
+    service = COMPARISON_SERVICES.get(company)
+    if not service or 'extractor' not in service:
+        flash(f"Companhia '{company}' não configurada para extração.")
+        return [(None, None)] * len(jobs)
+
+    cache = _extraction_cache(company)
+    hashes: list[str | None] = []
+    results: list[tuple[pd.DataFrame | None, Exception | None]] = []
+    pending: list[int] = []
+    for i, (pdf_path, _, _) in enumerate(jobs):
+        try:
+            sha = file_sha256(pdf_path)
+        except OSError as e:
+            hashes.append(None)
+            results.append((None, e))
+            continue
+        hashes.append(sha)
+        df_cached = cache.load_frame(sha)
+        results.append((df_cached, None))
+        if df_cached is None:
+            pending.append(i)
+
+    if pending:
+        extractor_func = service['extractor']
+        max_workers = app_cfg.extraction.MAX_WORKERS
+        # Um único PDF roda no processo da requisição e paraleliza por páginas;
+        # vários PDFs vão um por worker (sem pool aninhado dentro dos workers).
+        page_workers = max_workers if len(pending) == 1 else 1
+        extracted = map_ordered(
+            extractor_func,
+            [(str(jobs[i][0]), page_workers, str(cache.entry_dir(hashes[i]))) for i in pending],
+            max_workers=max_workers,
+        )
+        for i, (df_pdf, error) in zip(pending, extracted):
+            results[i] = (df_pdf, error)
+            if error is not None or df_pdf is None:
+                continue
+            # Motor escolhido + tempos por arquivo (extracao.json na entrada do cache)
+            info = df_pdf.attrs.get("extracao")
+            if info:
+                print(f"Extração {jobs[i][0].name}: {info}")
+            try:
+                if info:
+                    cache.save_json(hashes[i], info, name="extracao")
+                if not df_pdf.empty:
+                    cache.save_frame(hashes[i], df_pdf)
+            except Exception as e:
+                print(f"Aviso: falha ao gravar cache de extração de {jobs[i][0].name}: {e}")
+
+    return [
+        (_cache_extracted_pdf(df_pdf, error, pdf_path, file_id, company, source_name), sha)
+        for (pdf_path, file_id, source_name), (df_pdf, error), sha in zip(jobs, results, hashes)
+    ]
+
+def _process_and_cache_pdf(pdf_path: Path, file_id: str, company: str, source_name: str | None = None) -> pd.DataFrame | None:
+    return _process_and_cache_pdfs([(pdf_path, file_id, source_name)], company)[0][0]
+
 def _save_batch_manifest(batch_id: str, items: list[dict], company: str) -> Path:
     app_cfg: Appconfig = current_app.config["APP_CFG"]
     manifest_path = app_cfg.paths.CACHE_DIR / f"batch_{batch_id}.json"
@@ -102,6 +195,11 @@ def _save_batch_manifest(batch_id: str, items: list[dict], company: str) -> Path
     manifest_path.write_text(json.dumps(manifest_data, ensure_ascii=False, indent=2), encoding="utf-8")
     return manifest_path
 
+def _update_batch_manifest(batch_id: str, manifest: dict) -> None:
+    app_cfg: Appconfig = current_app.config["APP_CFG"]
+    manifest_path = app_cfg.paths.CACHE_DIR / f"batch_{batch_id}.json"
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+
 def _load_batch_manifest(batch_id: str) -> dict | None:
     app_cfg: Appconfig = current_app.config["APP_CFG"]
     manifest_path = app_cfg.paths.CACHE_DIR / f"batch_{batch_id}.json"
@@ -145,10 +243,131 @@ def _load_batch_df(batch_id: str) -> pd.DataFrame | None:
         flash("Nenhum cache para reconstruir o batch.")
         return None
         
-    df_all = pd.concat(dfs, ignore_index=True)
+    df_all = concat_categorical(dfs, ignore_index=True)
     df_all.to_feather(batch_feather)
     return df_all
 
+# ---------------- Cache de resultados ----------------
+# Reenviar a mesma planilha para o mesmo batch (refresh da página, novo download) devolve
+# df_export, df_display, métricas e as planilhas prontas, sem DB, matching nem Excel.
+# Chave: conteúdo do batch + SHA-256 da planilha de acordos + versão do PADRÃO em memória;
+# a versão do comparador/saída vai no nome dos artefatos (ContentCache).
+# Dados do banco (CTCs, pesos, tipo de serviço) não entram na chave: use "Recalcular"
+# ou POST /compare-batch/<id>/invalidate para descartar.
+
+def _results_cache(company: str) -> ContentCache:
+    app_cfg: Appconfig = current_app.config["APP_CFG"]
+    service = COMPARISON_SERVICES[company]
+    version = f"{service.get('comparator_version', 'v0')}.{RESULTS_VERSION}"
+    return ContentCache(app_cfg.paths.CACHE_DIR / "resultados" / company, version)
+
+def _batch_content_hash(manifest: dict, df_base: pd.DataFrame, service: dict) -> str:
+    """
+    Hash do conteúdo do batch. Usa os SHA-256 dos PDFs do manifesto (na ordem do batch) com
+    a versão do extrator; sem eles (rotas legadas), o hash do DataFrame consolidado.
+    O valor fica gravado no manifesto: depois do 1º comparativo o feather do batch é
+    sobrescrito pelo df_export e já não representa a entrada original.
+    """
+    if manifest.get("content_hash"):
+        return manifest["content_hash"]
+    shas = [it.get("sha256") for it in manifest.get("items", [])]
+    h = hashlib.sha256()
+    if shas and all(shas):
+        h.update(f"pdfs|{service.get('extractor_version', 'v0')}|{','.join(shas)}".encode("utf-8"))
+    else:
+        h.update(f"frame|{list(df_base.columns)!r}".encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(df_base, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def _result_key(batch_hash: str, acordos_path: Path, comparator) -> str:
+    versao_ref = getattr(comparator, "versao_referencias", lambda: "")()
+    return hashlib.sha256(f"{batch_hash}|{file_sha256(acordos_path)}|{versao_ref}".encode("utf-8")).hexdigest()
+
+def _excel_cache_name(cache: ContentCache, suffix: str = "") -> str:
+    return f"comparativo{suffix}.{cache.version}.xlsx"
+
+def _load_cached_result(cache: ContentCache, key: str) -> tuple[pd.DataFrame, pd.DataFrame, dict] | None:
+    # metrics.json é gravado por último: sem ele, a entrada está incompleta
+    metrics = cache.load_json(key, name="metrics")
+    if not metrics or metrics.get("version") != cache.version:
+        return None
+    entry = cache.entry_dir(key)
+    if not all((entry / _excel_cache_name(cache, sfx)).exists() for sfx in ("", ".zeros")):
+        return None
+    df_export = cache.load_frame(key, name="export")
+    df_display = cache.load_frame(key, name="display")
+    if df_export is None or df_display is None:
+        return None
+    return df_export, df_display, metrics["metrics"]
+
+def _store_result(cache: ContentCache, key: str, df_export: pd.DataFrame, df_display: pd.DataFrame,
+                  metrics: dict, out_xlsx_path: Path, out_xlsx_zeros_path: Path) -> None:
+    cache.save_frame(key, df_export, name="export")
+    cache.save_frame(key, df_display, name="display")
+    entry = cache.entry_dir(key)
+    for old in entry.glob("comparativo*.xlsx"):
+        old.unlink(missing_ok=True)
+    shutil.copyfile(out_xlsx_path, entry / _excel_cache_name(cache))
+    shutil.copyfile(out_xlsx_zeros_path, entry / _excel_cache_name(cache, ".zeros"))
+    cache.save_json(key, {"version": cache.version, "metrics": metrics}, name="metrics")
+
+def _run_comparison(service: dict, df_base: pd.DataFrame, acordos_path: Path,
+                    out_xlsx_path: Path, out_xlsx_zeros_path: Path) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """Comparação + métricas + as duas planilhas de saída. Retorna (df_export, df_display, metrics)."""
+    app_cfg: Appconfig = current_app.config["APP_CFG"]
+
+    # === LÓGICA DE COMPARAÇÃO ===
+    ComparatorClass = service['comparator']
+    comparer_instance = ComparatorClass(app_cfg)
+    df_export, df_display = comparer_instance.compare_fretes(df_base, str(acordos_path))
+
+    # === MÉTRICAS E SALVAMENTO ===
+    metrics_calculator = LatamMetricsCalculator(df_export)
+    metrics = metrics_calculator.calculate_metrics()
+
+    # 1. Cria a nova planilha com rotas sem tarifa, somando valores e contando ocorrências
+    df_sem_tarifa_completo = df_export[df_export['Status'] == 'TARIFA NAO LOCALIZADA'].copy()
+    df_rotas_sem_tarifa = pd.DataFrame() # Inicializa como um DataFrame vazio
+
+    if not df_sem_tarifa_completo.empty:
+        # Garante que a coluna de valor é numérica para a soma
+        df_sem_tarifa_completo['Valor_Frete'] = pd.to_numeric(df_sem_tarifa_completo['Valor_Frete'], errors='coerce').fillna(0)
+
+        # Agrupa por rota e usa .agg() para calcular a SOMA e a CONTAGEM
+        df_rotas_sem_tarifa = df_sem_tarifa_completo.groupby(
+            ['Origem', 'Destino', 'Tipo_Servico'], observed=True
+        ).agg(
+            Soma_Valor_Frete=('Valor_Frete', 'sum'),
+            Quantidade=('Valor_Frete', 'count') # Adiciona a contagem aqui
+        ).reset_index()
+
+        # Renomeia as colunas para clareza na nova aba
+        df_rotas_sem_tarifa.rename(columns={
+            'Origem': 'Origem da Rota',
+            'Destino': 'Destino da Rota',
+            'Tipo_Servico': 'Tipo de Serviço',
+            'Soma_Valor_Frete': 'Valor Total Cobrado (Sem Tarifa)' # Renomeia a coluna da soma
+        }, inplace=True)
+
+        # Ordena para mostrar as rotas mais custosas primeiro
+        df_rotas_sem_tarifa.sort_values(by='Valor Total Cobrado (Sem Tarifa)', ascending=False, inplace=True)
+        df_rotas_sem_tarifa['Valor Total Cobrado (Sem Tarifa)'] = df_rotas_sem_tarifa['Valor Total Cobrado (Sem Tarifa)'].round(2)
+
+    # 2. Salva o arquivo Excel principal com múltiplas abas
+    with pd.ExcelWriter(out_xlsx_path, engine='openpyxl') as writer:
+        df_export.to_excel(writer, sheet_name='Comparativo Completo', index=False)
+        if not df_rotas_sem_tarifa.empty:
+            df_rotas_sem_tarifa.to_excel(writer, sheet_name='Rotas Sem Tarifa', index=False)
+
+    # 3. Salva o arquivo Excel com zeros com múltiplas abas
+    df_export_zeros = fill_numeric_nans_with_zero(df_export)
+    with pd.ExcelWriter(out_xlsx_zeros_path, engine='openpyxl') as writer:
+        df_export_zeros.to_excel(writer, sheet_name='Comparativo (NaNs como 0)', index=False)
+        if not df_rotas_sem_tarifa.empty:
+            df_rotas_sem_tarifa.to_excel(writer, sheet_name='Rotas Sem Tarifa', index=False)
+
+    return df_export, df_display, metrics
+
 # ---------------- Hooks ----------------
 
 @bp.before_app_request
@@ -201,7 +420,7 @@ def process_pdfs():
         return redirect(url_for("fatura.tool_home"))
 
     batch_id = uuid.uuid4().hex[:12]
-    dfs, items = [], []
+    dfs, items, jobs = [], [], []
 
     for fil in files:
         fname = (fil.filename or "").strip()
@@ -219,17 +438,19 @@ def process_pdfs():
         except Exception as e:
             flash(f"Falha ao salvar {fname}: {e}")
             continue
+        jobs.append((pdf_path, file_id, fname))
 
-        df = _process_and_cache_pdf(pdf_path, file_id, company, source_name=fname)
+    # Extração em paralelo; o resultado volta na ordem de upload
+    for (pdf_path, file_id, _), (df, sha) in zip(jobs, _process_and_cache_pdfs(jobs, company)):
         if df is not None and not df.empty:
             dfs.append(df)
-            items.append({"file_id": file_id, "filename": pdf_path.name})
+            items.append({"file_id": file_id, "filename": pdf_path.name, "sha256": sha})
 
     if not dfs:
         flash("Nenhum PDF válido foi processado.")
         return redirect(url_for("fatura.tool_home"))
 
-    df_all = pd.concat(dfs, ignore_index=True)
+    df_all = concat_categorical(dfs, ignore_index=True)
     df_all.to_feather(paths.CACHE_DIR / f"batch_{batch_id}.feather")
     _save_batch_manifest(batch_id, items, company)
 
@@ -251,7 +472,9 @@ def use_existing_pdfs():
         return redirect(url_for("fatura.tool_home"))
 
     batch_id = uuid.uuid4().hex[:12]
-    dfs, items = [], []
+    # Um slot por arquivo selecionado, preenchido pelo cache ou pela extração (preserva a ordem)
+    slots: list[tuple[pd.DataFrame, dict] | None] = []
+    jobs, job_slots = [], []
 
     for filename in selected_files:
         pdf_company, file_id = _get_info_from_name(filename)
@@ -266,8 +489,9 @@ def use_existing_pdfs():
             try:
                 df = pd.read_feather(cache_path)
                 if "__source_pdf" not in df.columns: df["__source_pdf"] = filename
-                dfs.append(df)
-                items.append({"file_id": file_id, "filename": filename})
+                pdf_path = paths.UPLOAD_DIR / filename
+                sha = file_sha256(pdf_path) if pdf_path.exists() else None
+                slots.append((df, {"file_id": file_id, "filename": filename, "sha256": sha}))
                 continue
             except Exception as e:
                 flash(f"Cache de {filename} corrompido, reprocessando: {e}")
@@ -277,16 +501,22 @@ def use_existing_pdfs():
             flash(f"Arquivo '{filename}' não encontrado.")
             continue
 
-        df = _process_and_cache_pdf(pdf_path, file_id, company, source_name=filename)
+        jobs.append((pdf_path, file_id, filename))
+        job_slots.append(len(slots))
+        slots.append(None)
+
+    for (pdf_path, file_id, filename), slot, (df, sha) in zip(jobs, job_slots, _process_and_cache_pdfs(jobs, company)):
         if df is not None and not df.empty:
-            dfs.append(df)
-            items.append({"file_id": file_id, "filename": filename})
+            slots[slot] = (df, {"file_id": file_id, "filename": filename, "sha256": sha})
+
+    dfs = [df for df, _ in filter(None, slots)]
+    items = [item for _, item in filter(None, slots)]
 
     if not dfs:
         flash("Nenhum PDF válido selecionado para o batch.")
         return redirect(url_for("fatura.tool_home"))
 
-    df_all = pd.concat(dfs, ignore_index=True)
+    df_all = concat_categorical(dfs, ignore_index=True)
     df_all.to_feather(paths.CACHE_DIR / f"batch_{batch_id}.feather")
     _save_batch_manifest(batch_id, items, company)
 
@@ -325,68 +555,50 @@ def compare_batch_page(batch_id: str):
             acordos_path = paths.UPLOAD_DIR / f"{ts}_batch-{batch_id}_acordos.xlsx"
             acordos_file.save(str(acordos_path))
 
-            # === LÓGICA DE COMPARAÇÃO ===
-            ComparatorClass = service['comparator']
-            comparer_instance = ComparatorClass(app_cfg)
-            df_export, df_display = comparer_instance.compare_fretes(df_base, str(acordos_path))
+            # Planilhas de saída (nome com timestamp; o download pega a mais recente)
+            out_base = f"{ts}_batch-{batch_id}_{company}_comparativo"
+            out_xlsx_path = paths.OUTPUT_DIR / f"{out_base}.xlsx"
+            out_xlsx_zeros_path = paths.OUTPUT_DIR / f"{out_base}.zeros.xlsx"
 
-            # === MÉTRICAS E SALVAMENTO ===
-            metrics_calculator = LatamMetricsCalculator(df_export)
-            metrics = metrics_calculator.calculate_metrics()
+            # === CACHE DE RESULTADOS ===
+            # Falhas no cache nunca impedem o comparativo: viram aviso e o cálculo segue normal
+            cache, key, cached = None, None, None
+            refresh = (request.form.get("refresh") or "").lower() in {"1", "true", "on"}
+            try:
+                cache = _results_cache(company)
+                if not manifest.get("content_hash"):
+                    manifest["content_hash"] = _batch_content_hash(manifest, df_base, service)
+                    _update_batch_manifest(batch_id, manifest)
+                key = _result_key(manifest["content_hash"], acordos_path, service['comparator'])
+                if refresh:
+                    cache.invalidate(key)
+                else:
+                    cached = _load_cached_result(cache, key)
+            except Exception as e:
+                print(f"Aviso: cache de resultados indisponível para o batch {batch_id}: {e}")
+                cache = None
+
+            if cached is not None:
+                df_export, df_display, metrics = cached
+                entry = cache.entry_dir(key)
+                shutil.copyfile(entry / _excel_cache_name(cache), out_xlsx_path)
+                shutil.copyfile(entry / _excel_cache_name(cache, ".zeros"), out_xlsx_zeros_path)
+            else:
+                df_export, df_display, metrics = _run_comparison(
+                    service, df_base, acordos_path, out_xlsx_path, out_xlsx_zeros_path
+                )
+                if cache is not None:
+                    try:
+                        _store_result(cache, key, df_export, df_display, metrics, out_xlsx_path, out_xlsx_zeros_path)
+                        if key not in manifest.setdefault("results", []):
+                            manifest["results"].append(key)
+                            _update_batch_manifest(batch_id, manifest)
+                    except Exception as e:
+                        print(f"Aviso: falha ao gravar cache de resultados do batch {batch_id}: {e}")
 
             # >>> grava o mesmo dataframe da TABELA no cache usado pelo mapa <<<
             cache_batch = paths.CACHE_DIR / f"batch_{batch_id}.feather"
             df_export.to_feather(cache_batch)
-                        
-            # >>> INÍCIO DA ALTERAÇÃO <<<
-            # 1. Cria a nova planilha com rotas sem tarifa, somando valores e contando ocorrências
-            df_sem_tarifa_completo = df_export[df_export['Status'] == 'TARIFA NAO LOCALIZADA'].copy()
-            df_rotas_sem_tarifa = pd.DataFrame() # Inicializa como um DataFrame vazio
-
-            if not df_sem_tarifa_completo.empty:
-                # Garante que a coluna de valor é numérica para a soma
-                df_sem_tarifa_completo['Valor_Frete'] = pd.to_numeric(df_sem_tarifa_completo['Valor_Frete'], errors='coerce').fillna(0)
-
-                # --- ALTERAÇÃO AQUI ---
-                # Agrupa por rota e usa .agg() para calcular a SOMA e a CONTAGEM
-                df_rotas_sem_tarifa = df_sem_tarifa_completo.groupby(
-                    ['Origem', 'Destino', 'Tipo_Servico']
-                ).agg(
-                    Soma_Valor_Frete=('Valor_Frete', 'sum'),
-                    Quantidade=('Valor_Frete', 'count') # Adiciona a contagem aqui
-                ).reset_index()
-                
-                # Renomeia as colunas para clareza na nova aba
-                df_rotas_sem_tarifa.rename(columns={
-                    'Origem': 'Origem da Rota',
-                    'Destino': 'Destino da Rota',
-                    'Tipo_Servico': 'Tipo de Serviço',
-                    'Soma_Valor_Frete': 'Valor Total Cobrado (Sem Tarifa)' # Renomeia a coluna da soma
-                }, inplace=True)
-
-                # Ordena para mostrar as rotas mais custosas primeiro
-                df_rotas_sem_tarifa.sort_values(by='Valor Total Cobrado (Sem Tarifa)', ascending=False, inplace=True)
-                df_rotas_sem_tarifa['Valor Total Cobrado (Sem Tarifa)'] = df_rotas_sem_tarifa['Valor Total Cobrado (Sem Tarifa)'].round(2)
-                
-            # 2. Prepara os nomes dos arquivos de saída
-            out_base = f"{ts}_batch-{batch_id}_{company}_comparativo"
-            out_xlsx_path = paths.OUTPUT_DIR / f"{out_base}.xlsx"
-            out_xlsx_zeros_path = paths.OUTPUT_DIR / f"{out_base}.zeros.xlsx"
-            
-            # 3. Salva o arquivo Excel principal com múltiplas abas
-            with pd.ExcelWriter(out_xlsx_path, engine='openpyxl') as writer:
-                df_export.to_excel(writer, sheet_name='Comparativo Completo', index=False)
-                if not df_rotas_sem_tarifa.empty:
-                    df_rotas_sem_tarifa.to_excel(writer, sheet_name='Rotas Sem Tarifa', index=False)
-
-            # 4. Salva o arquivo Excel com zeros com múltiplas abas
-            df_export_zeros = fill_numeric_nans_with_zero(df_export)
-            with pd.ExcelWriter(out_xlsx_zeros_path, engine='openpyxl') as writer:
-                df_export_zeros.to_excel(writer, sheet_name='Comparativo (NaNs como 0)', index=False)
-                if not df_rotas_sem_tarifa.empty:
-                    df_rotas_sem_tarifa.to_excel(writer, sheet_name='Rotas Sem Tarifa', index=False)
-            
-            # >>> FIM DA ALTERAÇÃO <<<
 
             return render_template(
                 "Tools/AnaliseFrete.html",
@@ -395,6 +607,7 @@ def compare_batch_page(batch_id: str):
                 table_html=df_display.to_html(classes="table table-sm table-hover", index=False, justify="left", na_rep="-"),
                 rows=len(df_display),
                 metrics=metrics,
+                from_cache=cached is not None,
                 download_url=url_for("fatura.download_batch", batch_id=batch_id)
             )
         except Exception as e:
@@ -412,6 +625,21 @@ def compare_batch_page(batch_id: str):
         metrics=None
     )
 
+@bp.post("/compare-batch/<batch_id>/invalidate")
+def invalidate_batch_results(batch_id: str):
+    """Descarta os resultados em cache deste batch (ex.: após mudança no banco)."""
+    manifest = _load_batch_manifest(batch_id)
+    if not manifest or manifest.get("company") not in COMPARISON_SERVICES:
+        flash("Sessão inválida. Envie os arquivos novamente.")
+        return redirect(url_for("fatura.tool_home"))
+
+    cache = _results_cache(manifest["company"])
+    for key in manifest.pop("results", []):
+        cache.invalidate(key)
+    _update_batch_manifest(batch_id, manifest)
+    flash("Resultados em cache descartados. O próximo comparativo será recalculado.")
+    return redirect(url_for("fatura.compare_batch_page", batch_id=batch_id))
+
 @bp.get("/download/batch/<batch_id>")
 def download_batch(batch_id: str):
     app_cfg: Appconfig = current_app.config["APP_CFG"]
@@ -10,6 +10,7 @@ import pandas as pd
 from flask import Blueprint, current_app, jsonify, render_template, request, url_for
 
 from Config import Appconfig
+from Utils.Category_Helpers import STATUS_VOCAB, as_category, map_category
 
 bp = Blueprint("kpi_map", __name__, template_folder="../Templates")
 
@@ -78,14 +79,14 @@ def _load_batch_feather(batch_id: str) -> pd.DataFrame:
         if col not in df.columns:
             df[col] = np.nan
 
-    # limpeza
-    df["Origem"]  = df["Origem"].astype(str).str.strip().str.upper()
-    df["Destino"] = df["Destino"].astype(str).str.strip().str.upper()
+    # limpeza (uma vez por valor distinto; rotas e status ficam como category)
+    df["Origem"]  = map_category(df["Origem"], lambda v: str(v).strip().upper())
+    df["Destino"] = map_category(df["Destino"], lambda v: str(v).strip().upper())
     for c in ["Valor_Frete","Valor_Tarifa","Valor_Frete_Tabela","Valor_Tarifa_Tabela",
               "Diferenca_Frete","Diferenca_Tarifa","Dif_%","Peso Taxado"]:
         df[c] = _safe_num(df[c])
 
-    df["Status"] = df["Status"].astype(str).str.strip()
+    df["Status"] = as_category(map_category(df["Status"], lambda v: str(v).strip()), STATUS_VOCAB)
     # flags
     df["__COM_DIF__"] = (df["Diferenca_Frete"].abs() > EPS) | (df["Diferenca_Tarifa"].abs() > EPS)
     df["__DEV__"] = df["Status"].eq("DEVOLUCAO")
@@ -114,17 +115,27 @@ def _load_iata_master() -> pd.DataFrame:
 
 # ----------------------- aggregates ------------------
 def _expand_aliases(df: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    for _, row in df.iterrows():
-        origs = SAO_IATAS if row["Origem"] == "SAO" else [row["Origem"]]
-        dests = SAO_IATAS if row["Destino"] == "SAO" else [row["Destino"]]
-        for o in origs:
-            for d in dests:
-                newr = row.copy()
-                newr["Origem"] = o
-                newr["Destino"] = d
-                rows.append(newr)
-    return pd.DataFrame(rows, columns=df.columns)
+    """
+    Cada linha com 'SAO' na origem e/ou no destino vira uma linha por aeroporto de São Paulo
+    (origem x destino, nessa ordem). Vetorizado: repete as posições e calcula as novas chaves.
+    """
+    origem = df["Origem"].to_numpy(dtype=object)
+    destino = df["Destino"].to_numpy(dtype=object)
+    n_o = np.where(origem == "SAO", len(SAO_IATAS), 1)
+    n_d = np.where(destino == "SAO", len(SAO_IATAS), 1)
+    rep = n_o * n_d
+    pos = np.repeat(np.arange(len(df)), rep)
+    k = np.arange(len(pos)) - np.repeat(np.cumsum(rep) - rep, rep)  # índice da cópia dentro da linha
+    sao = np.array(SAO_IATAS, dtype=object)
+
+    out = df.iloc[pos].copy()
+    o, d = origem[pos], destino[pos]
+    o = np.where(n_o[pos] > 1, sao[k // n_d[pos]], o)
+    d = np.where(n_d[pos] > 1, sao[k % n_d[pos]], d)
+    vocab = pd.unique(np.concatenate([o, d]))  # origem e destino com as mesmas categorias
+    out["Origem"] = pd.Categorical(o, categories=np.sort(vocab))
+    out["Destino"] = pd.Categorical(d, categories=np.sort(vocab))
+    return out
 
 def _aggregate_routes(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
     if df.empty:
@@ -146,7 +157,7 @@ def _aggregate_routes(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
         "Peso Taxado": "sum",
     }
     g = (
-        df.groupby(["Origem","Destino"], as_index=False)
+        df.groupby(["Origem","Destino"], as_index=False, observed=True)
           .agg(base_aggs)
           .rename(columns={
               "Documento": "Qtde_Docs",
@@ -162,17 +173,17 @@ def _aggregate_routes(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
     )
 
     gm = (
-        df.groupby(["Origem","Destino"], as_index=False)[["Valor_Frete","Valor_Tarifa","Peso Taxado"]]
+        df.groupby(["Origem","Destino"], as_index=False, observed=True)[["Valor_Frete","Valor_Tarifa","Peso Taxado"]]
           .mean()
           .rename(columns={"Valor_Frete":"Media_Frete","Valor_Tarifa":"Media_Tarifa","Peso Taxado":"Media_Peso"})
     )
     g = g.merge(gm, on=["Origem","Destino"], how="left")
 
     nodes_df = pd.DataFrame({"IATA": pd.unique(pd.concat([df["Origem"], df["Destino"]], ignore_index=True))})
-    out_counts = g.groupby("Origem")["Qtde_Docs"].sum().rename("out_count")
-    in_counts  = g.groupby("Destino")["Qtde_Docs"].sum().rename("in_count")
-    out_val    = g.groupby("Origem")["Soma_Frete"].sum().rename("sum_out_frete")
-    in_val     = g.groupby("Destino")["Soma_Frete"].sum().rename("sum_in_frete")
+    out_counts = g.groupby("Origem", observed=True)["Qtde_Docs"].sum().rename("out_count")
+    in_counts  = g.groupby("Destino", observed=True)["Qtde_Docs"].sum().rename("in_count")
+    out_val    = g.groupby("Origem", observed=True)["Soma_Frete"].sum().rename("sum_out_frete")
+    in_val     = g.groupby("Destino", observed=True)["Soma_Frete"].sum().rename("sum_in_frete")
     nodes_df = (nodes_df
                 .merge(out_counts, left_on="IATA", right_index=True, how="left")
                 .merge(in_counts,  left_on="IATA", right_index=True, how="left")
@@ -182,8 +193,8 @@ def _aggregate_routes(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
         ["out_count","in_count","sum_out_frete","sum_in_frete"]
     ].fillna(0)
 
-    deg_out = g.groupby("Origem")["Destino"].nunique().rename("deg_out")
-    deg_in  = g.groupby("Destino")["Origem"].nunique().rename("deg_in")
+    deg_out = g.groupby("Origem", observed=True)["Destino"].nunique().rename("deg_out")
+    deg_in  = g.groupby("Destino", observed=True)["Origem"].nunique().rename("deg_in")
     nodes_df = (nodes_df.merge(deg_out, left_on="IATA", right_index=True, how="left")
                          .merge(deg_in,  left_on="IATA", right_index=True, how="left"))
     nodes_df[["deg_out","deg_in"]] = nodes_df[["deg_out","deg_in"]].fillna(0)
@@ -334,7 +345,7 @@ def node_summary(batch_id: str):
 
     def _top(dd: pd.DataFrame, by_cols: List[str]) -> List[Dict]:
         if dd.empty: return []
-        gg = (dd.groupby(by_cols, as_index=False)
+        gg = (dd.groupby(by_cols, as_index=False, observed=True)
                 .agg({"Documento":"count","Valor_Frete":"sum","__COM_DIF__":"sum"})
                 .rename(columns={"Documento":"docs","Valor_Frete":"frete","__COM_DIF__":"com_dif"})
                 .sort_values(by=["docs","frete"], ascending=False)
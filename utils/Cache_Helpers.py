@@ -0,0 +1,151 @@
+# C:\Programs\Aéreo-Comparativos\Utils\Cache_Helpers.py
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+def file_sha256(path: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo, lendo em blocos.
+
+    Args:
+        path (str | Path): Caminho do arquivo.
+        chunk_size (int): Tamanho do bloco de leitura em bytes.
+
+    Returns:
+        str: Hash hexadecimal (64 caracteres).
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def source_version(tag: str, *source_files: str | Path) -> str:
+    """
+    Monta uma string de versão a partir de uma etiqueta manual + hash do código-fonte.
+    Qualquer alteração nos arquivos informados gera uma versão nova, invalidando o cache.
+
+    Exemplo: source_version("latam-1", __file__) -> 'latam-1-3f9a0c1d2e4b'
+    """
+    h = hashlib.sha256()
+    for f in source_files:
+        try:
+            h.update(Path(f).read_bytes())
+        except OSError:
+            h.update(str(f).encode("utf-8"))
+    return f"{tag}-{h.hexdigest()[:12]}"
+
+def atomic_write(dest: Path, write_func) -> None:
+    # Grava num temporário e renomeia: leitores nunca veem um arquivo pela metade
+    tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        write_func(tmp)
+        os.replace(tmp, dest)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+def write_feather_stream(frames: Iterable[pd.DataFrame], dest: Path, dtypes: dict[str, str]) -> int:
+    """
+    Grava DataFrames em sequência num único feather (Arrow IPC), sem concatenar em memória.
+    `dtypes` fixa o esquema ('float64' ou 'string' por coluna), para que chunks com colunas
+    vazias não mudem o tipo no meio do arquivo. Retorna o total de linhas gravadas.
+    """
+    import pyarrow as pa  # já exigido pelo pandas para feather/parquet
+
+    schema = pa.schema([(c, pa.float64() if t == "float64" else pa.string()) for c, t in dtypes.items()])
+    total = 0
+
+    def _write(tmp: Path) -> None:
+        nonlocal total
+        with pa.ipc.new_file(tmp, schema) as writer:
+            for df in frames:
+                arrays = []
+                for col, t in dtypes.items():
+                    s = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+                    if t != "float64":
+                        s = s.where(s.isna(), s.astype(str))
+                    arrays.append(pa.array(s, type=schema.field(col).type, from_pandas=True))
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+                total += len(df)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(dest, _write)
+    return total
+
+class ContentCache:
+    """
+    Cache em disco endereçado por conteúdo: cada entrada é uma pasta `<root>/<hash[:2]>/<hash>`
+    e os artefatos dentro dela carregam a versão no nome (`<nome>.<versao>.<fmt>`).
+    Trocar a versão torna as entradas antigas invisíveis; elas são podadas na próxima gravação.
+    """
+
+    def __init__(self, root: str | Path, version: str, fmt: str = "feather"):
+        if fmt not in ("feather", "parquet"):
+            raise ValueError(f"Formato de cache não suportado: {fmt}")
+        self.root = Path(root)
+        self.version = re.sub(r"[^A-Za-z0-9_.\-]", "_", version)
+        self.fmt = fmt
+
+    def entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _frame_path(self, key: str, name: str) -> Path:
+        return self.entry_dir(key) / f"{name}.{self.version}.{self.fmt}"
+
+    def load_frame(self, key: str, name: str = "frame") -> pd.DataFrame | None:
+        """Retorna o DataFrame em cache ou None (ausente, de outra versão ou ilegível)."""
+        path = self._frame_path(key, name)
+        if not path.exists():
+            return None
+        try:
+            return pd.read_feather(path) if self.fmt == "feather" else pd.read_parquet(path)
+        except Exception as e:
+            print(f"Aviso: cache ilegível em {path.name}, ignorando: {e}")
+            return None
+
+    def save_frame(self, key: str, df: pd.DataFrame, name: str = "frame") -> Path:
+        """Grava o DataFrame da versão atual e remove as versões antigas do mesmo artefato."""
+        entry = self.entry_dir(key)
+        entry.mkdir(parents=True, exist_ok=True)
+        path = self._frame_path(key, name)
+        df = df.reset_index(drop=True)
+        if self.fmt == "feather":
+            atomic_write(path, lambda tmp: df.to_feather(tmp))
+        else:
+            atomic_write(path, lambda tmp: df.to_parquet(tmp, index=False))
+        for old in entry.glob(f"{name}.*.{self.fmt}"):
+            if old != path:
+                old.unlink(missing_ok=True)
+        return path
+
+    def load_json(self, key: str, name: str = "meta") -> dict | None:
+        path = self.entry_dir(key) / f"{name}.json"
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            return None
+
+    def save_json(self, key: str, data: dict, name: str = "meta") -> Path:
+        entry = self.entry_dir(key)
+        entry.mkdir(parents=True, exist_ok=True)
+        path = entry / f"{name}.json"
+        payload = json.dumps(data, ensure_ascii=False, indent=2, default=str)
+        atomic_write(path, lambda tmp: tmp.write_text(payload, encoding="utf-8"))
+        return path
+
+    def invalidate(self, key: str | None = None) -> None:
+        """Remove uma entrada (ou o cache inteiro, se `key` for None)."""
+        target = self.entry_dir(key) if key else self.root
+        shutil.rmtree(target, ignore_errors=True)
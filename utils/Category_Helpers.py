@@ -0,0 +1,95 @@
+# C:\Programs\Aéreo-Comparativos\Utils\Category_Helpers.py
+
+from __future__ import annotations
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------------------------
+# Vocabulário categórico compartilhado: rotas (aeroportos), tipo de serviço, status e fonte
+# da tarifa viajam como `category` pelo comparador, pelos feathers de cache e pelo KPI_Map.
+# A normalização (std_text, aliases) roda uma vez por valor distinto, não por linha, e
+# merges/groupbys/feather trabalham sobre os códigos inteiros.
+# ---------------------------------------------------------------------------
+
+# Colunas-chave da fatura categorizadas na ingestão (feather por PDF e do batch)
+KEY_COLS = ["Origem", "Destino", "Tipo_Serviço"]
+
+# Status do comparador (ordem fixa: os códigos não mudam de um batch para outro)
+STATUS_VOCAB = [
+    "COBRADO - TARIFADO", "FRETE MINIMO", "DEVOLUCAO", "PESO EXCEDENTE", "TARIFA NAO LOCALIZADA", "ERRO",
+]
+
+
+def _categorias(valores: np.ndarray) -> tuple[np.ndarray, pd.Index]:
+    """Códigos + categorias em ordem alfabética quando possível (groupby sai na mesma ordem do object)."""
+    try:
+        return pd.factorize(valores, sort=True)
+    except TypeError:  # tipos misturados não ordenam
+        return pd.factorize(valores)
+
+
+def map_category(s: pd.Series, func: Callable[[object], object]) -> pd.Series:
+    """
+    Aplica `func` a cada valor DISTINTO de `s` (nulos inclusive, como no `.apply`) e devolve
+    uma coluna `category` com o resultado. Valores que passam a coincidir (ex.: 'gru ' e 'GRU')
+    viram uma categoria só; resultados nulos ficam NaN.
+    """
+    codes, uniques = pd.factorize(s)
+    valores = list(np.asarray(uniques, dtype=object))
+    nulos = codes < 0
+    if nulos.any():
+        # o factorize junta None/NaN/NaT num nulo só, mas str(None) != str(nan): um código por tipo de nulo
+        tipos = s[nulos].map(type)
+        por_tipo = {t: s[nulos][tipos == t].iloc[0] for t in pd.unique(tipos)}
+        codes = codes.copy()
+        codes[nulos] = len(valores) + pd.Index(list(por_tipo)).get_indexer(tipos)
+        valores += list(por_tipo.values())
+    mapped = np.empty(len(valores), dtype=object)
+    mapped[:] = [func(u) for u in valores]
+    novos, categorias = _categorias(mapped)
+    return pd.Series(
+        pd.Categorical.from_codes(novos[codes] if len(codes) else codes, categories=categorias),
+        index=s.index, name=s.name,
+    )
+
+
+def replace_category(s: pd.Series, mapping: dict) -> pd.Series:
+    """`Series.replace` de valores exatos, feito nas categorias (replace em category está depreciado)."""
+    return map_category(s, lambda v: mapping.get(v, v))
+
+
+def as_category(s: pd.Series, vocab: Sequence[str] = ()) -> pd.Series:
+    """`s` como category; com `vocab`, essas categorias vêm primeiro e na ordem dada."""
+    if not vocab:
+        return s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+    conhecidas = set(vocab)
+    extras = [v for v in pd.unique(s.dropna()) if v not in conhecidas]
+    return s.astype(pd.CategoricalDtype(list(vocab) + extras))
+
+
+def categorize(df: pd.DataFrame, cols: Iterable[str] = KEY_COLS) -> pd.DataFrame:
+    """Converte as colunas de texto presentes em `cols` para category (cópia rasa)."""
+    out = df.copy(deep=False)
+    for c in cols:
+        if c in out.columns and not pd.api.types.is_numeric_dtype(out[c]):
+            out[c] = as_category(out[c])
+    return out
+
+
+def concat_categorical(frames: Sequence[pd.DataFrame], **kwargs) -> pd.DataFrame:
+    """
+    `pd.concat` que mantém as colunas category: o pandas só preserva o tipo quando as categorias
+    são idênticas; aqui todas passam a usar a união das categorias antes de concatenar.
+    """
+    frames = list(frames)
+    cat_cols = {c for f in frames for c in f.columns if isinstance(f[c].dtype, pd.CategoricalDtype)}
+    for c in cat_cols:
+        valores = [as_category(f[c]) for f in frames if c in f.columns]
+        try:
+            uniao = pd.api.types.union_categoricals(valores, ignore_order=True).categories
+        except TypeError:  # categorias de tipos diferentes (ex.: texto x número): fica object
+            continue
+        frames = [f.assign(**{c: f[c].astype(pd.CategoricalDtype(uniao))}) if c in f.columns else f for f in frames]
+    return pd.concat(frames, **kwargs)
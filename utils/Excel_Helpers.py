@@ -0,0 +1,44 @@
+# C:\Programs\Aéreo-Comparativos\Utils\Excel_Helpers.py
+
+from __future__ import annotations
+import importlib.util
+import os
+from pathlib import Path
+
+import pandas as pd
+
+# Ordem de preferência no modo "auto": calamine (Rust, opcional: pip install python-calamine) e openpyxl
+EXCEL_ENGINES = {"calamine": "python_calamine", "openpyxl": "openpyxl"}
+FALLBACK_ENGINE = "openpyxl"
+
+def engine_available(engine: str) -> bool:
+    module = EXCEL_ENGINES.get(engine)
+    return module is not None and importlib.util.find_spec(module) is not None
+
+def resolve_excel_engine(preferred: str | None = None) -> str:
+    """
+    Escolhe o motor de leitura de Excel.
+
+    Usa `preferred` ou a variável EXCEL_ENGINE ('auto', 'calamine' ou 'openpyxl') se o motor
+    estiver instalado; no modo 'auto' (padrão) pega o primeiro disponível de EXCEL_ENGINES.
+    """
+    wanted = (preferred or os.getenv("EXCEL_ENGINE", "auto")).strip().lower()
+    if wanted != "auto":
+        if engine_available(wanted):
+            return wanted
+        print(f"Aviso: motor de Excel '{wanted}' indisponível. Usando seleção automática.")
+    return next((eng for eng in EXCEL_ENGINES if engine_available(eng)), FALLBACK_ENGINE)
+
+def open_excel(path: str | Path, engine: str | None = None) -> pd.ExcelFile:
+    """
+    Abre o workbook com o motor resolvido; se ele falhar, tenta de novo com openpyxl.
+    O motor efetivo fica em `ExcelFile.engine`.
+    """
+    engine = resolve_excel_engine(engine)
+    try:
+        return pd.ExcelFile(path, engine=engine)
+    except Exception as e:
+        if engine == FALLBACK_ENGINE:
+            raise
+        print(f"Aviso: motor '{engine}' falhou ao abrir '{Path(path).name}' ({e}). Usando {FALLBACK_ENGINE}.")
+        return pd.ExcelFile(path, engine=FALLBACK_ENGINE)
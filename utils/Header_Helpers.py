@@ -0,0 +1,62 @@
+# C:\Programs\Aéreo-Comparativos\Utils\Header_Helpers.py
+
+from __future__ import annotations
+import re
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+class HeaderAliasMatcher:
+    """
+    Normaliza cabeçalhos extraídos de PDFs para os nomes padrão de uma companhia.
+
+    Os aliases viram UMA regex combinada (um grupo nomeado por alias, na ordem do dicionário)
+    e o resultado de cada cabeçalho bruto fica memorizado: como as faturas repetem o mesmo
+    cabeçalho em todas as páginas, a partir da 2ª tabela a normalização é só uma consulta.
+
+    Exemplo:
+        matcher = HeaderAliasMatcher({r"^origem$": "Origem"}, [("TaxasPeso", "Taxas|Peso")])
+        matcher(["ORIGEM", "Outras TaxasPeso"])  # -> ['Origem', 'Outras Taxas', 'Peso']
+    """
+
+    def __init__(self, aliases: Dict[str, str], splits: Sequence[Tuple[str, str]] = (), maxsize: int = 1024):
+        """
+        Args:
+            aliases (dict): regex (aplicada em minúsculas, sem diferenciar caixa) -> nome padrão.
+                Vale o PRIMEIRO alias que casar, na ordem do dicionário.
+            splits (list): pares (trecho, trecho com '|') para separar células que o PDF grudou.
+            maxsize (int): Quantidade de cabeçalhos distintos memorizados.
+        """
+        self.targets: List[str] = list(aliases.values())
+        self.splits: Tuple[Tuple[str, str], ...] = tuple(splits)
+        self._combined = re.compile(
+            "|".join(f"(?P<a{i}>{rx})" for i, rx in enumerate(aliases)), flags=re.I
+        ) if aliases else None
+        # Com todos os padrões ancorados em '^' a regex combinada devolve o 1º alias que casa;
+        # sem âncora ela devolveria o casamento mais à esquerda, então testa um a um.
+        self._patterns = None if all(rx.startswith("^") for rx in aliases) else [
+            re.compile(rx, flags=re.I) for rx in aliases
+        ]
+        self._normalize_cached = lru_cache(maxsize=maxsize)(self._normalize)
+
+    def __call__(self, cols: Sequence) -> List[str]:
+        """Retorna uma lista nova (o chamador pode alterá-la sem afetar o cache)."""
+        return list(self._normalize_cached(tuple(str(c or "") for c in cols)))
+
+    def map_name(self, name: str) -> str:
+        key = name.lower()
+        if self._patterns is not None:
+            return next((tgt for rx, tgt in zip(self._patterns, self.targets) if rx.search(key)), name)
+        m = self._combined.search(key) if self._combined is not None else None
+        return self.targets[int(m.lastgroup[1:])] if m else name
+
+    def _split_cell(self, cell: str) -> List[str]:
+        c0 = re.sub(r"\s+", " ", cell).strip()
+        for old, new in self.splits:
+            c0 = c0.replace(old, new)
+        return [p.strip() for p in c0.split("|")]
+
+    def _normalize(self, cols: Tuple[str, ...]) -> Tuple[str, ...]:
+        return tuple(self.map_name(part) for cell in cols for part in self._split_cell(cell))
+
+    def cache_info(self):
+        return self._normalize_cached.cache_info()
@@ -1,5 +1,8 @@
 # C:\Programs\Aéreo-Comparativos\Utils\Numeric_Helpers
 
+import re
+from typing import Callable
+
 import pandas as pd
 import numpy as np
 
@@ -42,17 +45,162 @@ def smart_to_numeric(val):
 def to_numeric_cols(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
     """
     Aplica a conversão numérica inteligente (smart_to_numeric) a uma lista de colunas de um DataFrame.
-    
+
+    Vetorizada (smart_to_numeric_series); colunas que já são float64 passam direto.
+    O DataFrame de entrada não é alterado (cópia rasa: só as colunas convertidas são novas).
+
     Args:
         df (pd.DataFrame): DataFrame a ser processado.
         cols (list[str]): Lista de nomes das colunas para conversão.
-        
+
     Returns:
         pd.DataFrame: DataFrame com as colunas especificadas convertidas para numérico.
     """
-    df_out = df.copy()
+    df_out = df.copy(deep=False)
     for c in cols:
-        if c in df_out.columns:
-            # Aplica a função de conversão inteligente a cada valor da coluna
-            df_out[c] = df_out[c].apply(smart_to_numeric)
-    return df_out
\ No newline at end of file
+        if c in df_out.columns and df_out[c].dtype != np.float64:
+            df_out[c] = smart_to_numeric_series(df_out[c])
+    return df_out
+
+def parse_money(val):
+    """
+    Valor monetário de planilha (pt-BR ou US) → float.
+
+    Descarta tudo que não for dígito, ',', '.' ou '-'; com ',' e '.' juntos o ponto é milhar
+    ('R$ 1.234,56' → 1234.56), só com ',' ela é o decimal. O que não converter vira NaN.
+    """
+    if pd.isna(val): return np.nan
+    if isinstance(val, (int, float, np.number)): return float(val)
+    s = re.sub(r"[^\d,.\-]", "", str(val))
+    s = s.replace(".", "").replace(",", ".") if ("," in s and "." in s) else s.replace(",", ".")
+    try: return float(s)
+    except ValueError: return np.nan
+
+
+# ---------------------------------------------------------------------------
+# Versões vetorizadas: mesmos resultados das funções escalares, coluna inteira de uma vez.
+# Cada texto distinto é tratado uma vez só (pd.factorize), num array de largura fixa do numpy
+# (np.strings roda em C; o .str do pandas em colunas object é um loop Python por célula).
+# Um único pd.to_numeric só decide quais textos já são números válidos — a conversão final é
+# a do float() do Python (o to_numeric erra a última casa em alguns casos).
+# Tipos raros (datas, Decimal, np.bool_...) e textos longos vão um a um pela função escalar.
+# ---------------------------------------------------------------------------
+
+_NUMERIC_TYPES = (int, float, np.number)
+_FLOAT_ONLY_CODES = np.array([ord(c) for c in "_eEnN"], dtype=np.uint32)
+_MAX_TEXTO = 64  # acima disso o texto não é um valor de planilha: evita inflar o array de largura fixa
+
+def float_or_nan(s: str) -> float:
+    try:
+        return float(s)
+    except (ValueError, TypeError):
+        return np.nan
+
+def floats_from_text(txt: np.ndarray, fallback: Callable[[str], float] = float_or_nan) -> np.ndarray:
+    """
+    Textos já normalizados → float igual a float(txt). O to_numeric só separa os válidos; o resto
+    (que ele recusa, mas o float() pode aceitar: '1_000', dígitos não ASCII...) vai para `fallback`.
+    """
+    try:
+        return txt.astype(np.float64)
+    except (ValueError, TypeError):
+        pass
+    ok = pd.to_numeric(pd.Series(txt, dtype=object), errors="coerce").notna().to_numpy()
+    out = np.full(len(txt), np.nan)
+    try:
+        out[ok] = txt[ok].astype(np.float64)
+    except (ValueError, TypeError):
+        ok[:] = False
+    resto = ~ok
+    if txt.dtype.kind == "U" and len(txt):
+        # o float() só aceita o que o to_numeric recusa se houver '_', expoente/inf/nan ou não-ASCII
+        codes = txt.view(np.uint32).reshape(len(txt), -1)
+        resto &= (np.isin(codes, _FLOAT_ONLY_CODES) | (codes > 127)).any(axis=1)
+    for i in np.flatnonzero(resto):
+        out[i] = fallback(txt[i])
+    return out
+
+def keep_chars(u: np.ndarray, keep: Callable[[str], bool]) -> np.ndarray:
+    """Remove de cada texto (array de largura fixa) os caracteres c com keep(c) falso."""
+    if not len(u):
+        return u
+    codes = u.view(np.uint32).reshape(len(u), -1)
+    presentes = np.flatnonzero(np.bincount(codes.ravel()))
+    lut = np.zeros(int(presentes[-1]) + 1, dtype=bool)
+    lut[[c for c in presentes if c and keep(chr(c))]] = True
+    manter = lut[codes]
+    if manter.sum() == np.count_nonzero(codes):
+        return u
+    pos = np.cumsum(manter, axis=1) - 1
+    packed = np.zeros_like(codes)
+    packed[np.nonzero(manter)[0], pos[manter]] = codes[manter]
+    return packed.view(u.dtype).ravel()
+
+def vectorize_parser(s: pd.Series, text_rule: Callable[[np.ndarray], np.ndarray], scalar: Callable) -> pd.Series:
+    """
+    Aplica `text_rule` aos textos distintos da coluna (array numpy de str) e `scalar` aos demais
+    tipos, devolvendo float64 com o mesmo índice/nome. Nulos viram NaN; números, float(valor).
+    """
+    if s.dtype.kind in "biuf":
+        return pd.Series(s.to_numpy(dtype=np.float64, na_value=np.nan), index=s.index, name=s.name)
+
+    values = s.to_numpy(dtype=object)
+    out = np.full(len(values), np.nan)
+    if not len(values):
+        return pd.Series(out, index=s.index, name=s.name)
+
+    # classifica pelo tipo exato de cada valor (o factorize juntaria 1/True/np.True_ e 0.0/-0.0)
+    tipos = pd.Series(values, dtype=object).map(type)
+    uniq = pd.unique(tipos)
+    is_null = pd.isna(values)
+    is_num = tipos.isin([t for t in uniq if issubclass(t, _NUMERIC_TYPES)]).to_numpy() & ~is_null
+    is_txt = tipos.isin([t for t in uniq if issubclass(t, str)]).to_numpy()
+
+    if is_num.any():
+        out[is_num] = values[is_num].astype(np.float64)
+    if is_txt.any():
+        codes, textos = pd.factorize(values[is_txt])
+        textos = np.asarray(textos, dtype=object)
+        tamanhos = np.fromiter(map(len, textos), dtype=np.int64, count=len(textos))
+        parsed = np.full(len(textos), np.nan)
+        curto = tamanhos <= _MAX_TEXTO
+        if curto.any():
+            idx = np.flatnonzero(curto)
+            u = textos[idx].astype(str)
+            # largura fixa descarta '\x00' no fim do texto: esses (raríssimos) vão pelo escalar
+            ok = np.strings.str_len(u) == tamanhos[idx]
+            curto[idx[~ok]] = False
+            if ok.any():
+                parsed[idx[ok]] = text_rule(u[ok])
+        for i in np.flatnonzero(~curto):
+            parsed[i] = scalar(textos[i])
+        out[is_txt] = parsed[codes]
+    for i in np.flatnonzero(~(is_null | is_num | is_txt)):
+        out[i] = scalar(values[i])
+    return pd.Series(out, index=s.index, name=s.name)
+
+def _has(u: np.ndarray, sub: str) -> np.ndarray:
+    return np.strings.find(u, sub) >= 0
+
+_MONEY_CHAR = re.compile(r"[\d,.\-]")
+
+def _money_text(u: np.ndarray) -> np.ndarray:
+    u = keep_chars(u, lambda c: _MONEY_CHAR.fullmatch(c) is not None)
+    u = np.where(_has(u, ",") & _has(u, "."), np.strings.replace(u, ".", ""), u)
+    return floats_from_text(np.strings.replace(u, ",", "."))
+
+def _smart_text(u: np.ndarray) -> np.ndarray:
+    # espaços nas pontas não mudam nada: o float() já os ignora ('' e '  ' falham igual)
+    virg, ponto = _has(u, ","), _has(u, ".")
+    br = virg & ponto & (np.strings.rfind(u, ",") > np.strings.rfind(u, "."))
+    u = np.where(br, np.strings.replace(np.strings.replace(u, ".", ""), ",", "."),
+                 np.where(virg & ~ponto, np.strings.replace(u, ",", "."), u))
+    return floats_from_text(u)
+
+def parse_money_series(s: pd.Series) -> pd.Series:
+    """`parse_money` vetorizado."""
+    return vectorize_parser(s, _money_text, parse_money)
+
+def smart_to_numeric_series(s: pd.Series) -> pd.Series:
+    """`smart_to_numeric` vetorizado (mesma regra: o separador que aparece por último é o decimal)."""
+    return vectorize_parser(s, _smart_text, smart_to_numeric)
@@ -0,0 +1,89 @@
+# C:\Programs\Aéreo-Comparativos\Utils\Parallel_Helpers.py
+
+from __future__ import annotations
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, List, Tuple
+
+# Pool de processos compartilhado pelo app (criado sob demanda e reaproveitado entre requisições)
+_POOL: ProcessPoolExecutor | None = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+def get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Retorna o pool de processos do app, recriando-o apenas se o número de workers mudar.
+
+    Args:
+        max_workers (int): Quantidade de processos do pool.
+
+    Returns:
+        ProcessPoolExecutor: Pool pronto para uso.
+    """
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != max_workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = ProcessPoolExecutor(max_workers=max_workers)
+            _POOL_WORKERS = max_workers
+        return _POOL
+
+def _reset_process_pool() -> None:
+    """Descarta o pool atual (ex.: após um worker morrer), forçando a recriação no próximo uso."""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL, _POOL_WORKERS = None, 0
+
+def _run_serial(func: Callable[..., Any], args_list: List[tuple]) -> List[Tuple[Any, Exception | None]]:
+    results: List[Tuple[Any, Exception | None]] = []
+    for args in args_list:
+        try:
+            results.append((func(*args), None))
+        except Exception as e:
+            results.append((None, e))
+    return results
+
+def map_ordered(func: Callable[..., Any], args_list: Iterable[tuple], max_workers: int) -> List[Tuple[Any, Exception | None]]:
+    """
+    Executa `func(*args)` para cada item em paralelo e devolve os resultados NA ORDEM de entrada.
+
+    Cada posição do retorno é `(resultado, None)` ou `(None, exceção)`, para que o chamador
+    trate os erros item a item. Com 1 item (ou `max_workers <= 1`) roda no próprio processo,
+    evitando o custo de despachar para o pool. Se o pool quebrar, refaz tudo em série.
+
+    Args:
+        func: Função de nível de módulo (precisa ser serializável via pickle).
+        args_list: Argumentos posicionais de cada chamada.
+        max_workers (int): Limite de processos.
+
+    Returns:
+        list[tuple]: Pares (resultado, erro) alinhados com `args_list`.
+    """
+    args_list = list(args_list)
+    workers = min(max_workers, len(args_list))
+    if workers <= 1:
+        return _run_serial(func, args_list)
+
+    try:
+        pool = get_process_pool(max_workers)
+        futures = [pool.submit(func, *args) for args in args_list]
+    except (BrokenProcessPool, RuntimeError) as e:
+        print(f"Aviso: pool de processos indisponível ({e}). Executando em série.")
+        _reset_process_pool()
+        return _run_serial(func, args_list)
+
+    results: List[Tuple[Any, Exception | None]] = []
+    for fut in futures:
+        try:
+            results.append((fut.result(), None))
+        except BrokenProcessPool as e:
+            print(f"Aviso: pool de processos quebrou ({e}). Executando em série.")
+            _reset_process_pool()
+            return _run_serial(func, args_list)
+        except Exception as e:
+            results.append((None, e))
+    return results
@@ -6,6 +6,8 @@ import numpy as np
 import pandas as pd
 import re
 
+from Utils.Numeric_Helpers import floats_from_text, vectorize_parser
+
 # Funções de normalização e parsing de textos e numéricos, e códigos de serviços
 def to_num(val):
     """Números pt-BR/US e datas acidentais → float (ex.: 13/08/2025 → 13.8)."""
@@ -31,6 +33,36 @@ def to_num(val):
     except ValueError:
         return np.nan
 
+_TO_NUM_VAZIOS = ("", "-", "–", "—")
+_TO_NUM_DATA = re.compile(r"(\d{1,2})/(\d{1,2})(?:/\d{2,4})?")
+_TO_NUM_MOEDA = re.compile(r"(?i)r\$\s*")
+
+def _to_num_text(u: np.ndarray) -> np.ndarray:
+    u = np.strings.strip(u)
+    vazio = np.isin(u, _TO_NUM_VAZIOS)
+    # datas acidentais são raras: vão pela versão escalar
+    data = np.zeros(len(u), dtype=bool)
+    for i in np.flatnonzero(np.strings.find(u, "/") >= 0):
+        data[i] = _TO_NUM_DATA.fullmatch(u[i]) is not None
+    limpo = u
+    moeda = np.flatnonzero(np.strings.find(u, "$") >= 0)
+    if len(moeda):
+        limpo = u.astype(object)
+        limpo[moeda] = [_TO_NUM_MOEDA.sub("", str(x)) for x in u[moeda]]
+        limpo = limpo.astype(str)
+    limpo = np.strings.replace(limpo, " ", "")
+    ambos = (np.strings.find(limpo, ",") >= 0) & (np.strings.find(limpo, ".") >= 0)
+    limpo = np.where(ambos, np.strings.replace(limpo, ".", ""), limpo)
+    limpo = np.where(vazio | data, "", np.strings.replace(limpo, ",", "."))
+    out = floats_from_text(limpo)
+    for i in np.flatnonzero(data):
+        out[i] = to_num(str(u[i]))
+    return out
+
+def to_num_series(s: pd.Series) -> pd.Series:
+    """`to_num` vetorizado (mesmos resultados, coluna inteira de uma vez)."""
+    return vectorize_parser(s, _to_num_text, to_num)
+
 def strip_accents(s):
     if s is None: return ""
     return "".join(ch for ch in unicodedata.normalize("NFD", str(s)) if unicodedata.category(ch) != "Mn")
@@ -39,6 +71,11 @@ def std_text(s):
     if s is None: return ""
     return str(s).strip().upper()
 
+def std_text_series(s: pd.Series) -> pd.Series:
+    """`std_text` vetorizado (None vira "", os demais valores passam por str())."""
+    out = s.astype(str).str.strip().str.upper()
+    return out.mask(s.to_numpy(dtype=object) == None, "")  # noqa: E711 (comparação elemento a elemento)
+
 def normalize_label(s: str) -> str:
     t = strip_accents(str(s or "")).upper()
     return re.sub(r"\s+", " ", t).strip()